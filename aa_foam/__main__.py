@@ -0,0 +1,9 @@
+# coding: utf-8
+
+r"""python -m aa_foam : same as the aafoam command"""
+
+import sys
+
+from aa_foam.cli import main
+
+sys.exit(main())
@@ -0,0 +1,427 @@
+# coding: utf-8
+
+r"""aafoam : single entry point of the command line tools
+
+aafoam <subcommand> [arguments], e.g.
+
+aafoam yplus 1 1.225 0.000018375 1 1
+aafoam grading cells 10 0.01 0.1
+aafoam forces -t 0 -l 200
+
+Building the parser only needs argparse : the modules of a subcommand, and numpy / scipy / matplotlib with them,
+are imported when it runs, so that 'aafoam --help' and 'aafoam <subcommand> --help' start fast.
+The bin/aaFoam*.py scripts run the same subcommands.
+
+"""
+
+from argparse import ArgumentParser, Namespace
+from typing import Callable, List, Tuple
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+# ****** *
+# Fields *
+# ****** *
+
+def _add_diff(parser: ArgumentParser) -> None:
+    parser.add_argument('file_1', help="First file for diff")
+    parser.add_argument('file_2', help="Second file for diff")
+    parser.add_argument('-p', '--percentage',
+                        default=False,
+                        action='store_true',
+                        help="Express the difference in percentage")
+
+
+def _run_diff(args: Namespace) -> int:
+    from aa_foam.diffing import diff_non_uniform_fields
+    try:
+        diff_non_uniform_fields(args.file_1, args.file_2, percentage=args.percentage)
+    except (AssertionError, FileNotFoundError) as e:
+        logger.error(e)
+        print(e)
+    return 0
+
+
+# ******************** *
+# Near wall and meshes *
+# ******************** *
+
+def _add_yplus(parser: ArgumentParser) -> None:
+    parser.add_argument('u_inf', type=float, help="Freestream velocity [m/s]")
+    parser.add_argument('rho', type=float, help="Density [kg/m3]")
+    parser.add_argument('mu', type=float, help="Dynamic viscosity [kg/m s]")
+    parser.add_argument('L', type=float, help="Reference length [m]")
+    parser.add_argument('y_plus', type=float, help="Desired y+")
+    parser.add_argument('-c', '--correlation', default='white',
+                        help="Skin friction correlation (white, schlichting, prandtl, ittc57, blasius)")
+
+
+def _run_yplus(args: Namespace) -> int:
+    from aa_foam.y_plus import y_plus_calc
+
+    logger.info("**** INPUT ****")
+
+    logger.info(f"    U [m/s] : {args.u_inf:.8f}")
+    logger.info(f"rho [kg/m3] : {args.rho:.3f}")
+    logger.info(f"mu [kg/m.s] : {args.mu:.8f}")
+    logger.info(f"      L [m] : {args.L:.6f}")
+    logger.info(f"         y+ : {args.y_plus:.3f}")
+    logger.info(f"         cf : {args.correlation}")
+
+    delta_s, re_x, nu = y_plus_calc(args.u_inf, args.rho, args.mu, args.L, args.y_plus, args.correlation)
+
+    logger.info("**** OUTPUT ****")
+
+    logger.info(f"Delta S (wall spacing) : {delta_s:.8f}")
+    logger.info(f"       Reynolds number : {re_x:.8f}")
+    logger.info(f"   Kinematic viscosity : {nu:.8f}")
+    return 0
+
+
+def _add_vl(parser: ArgumentParser) -> None:
+    parser.add_argument('first_layer', type=float, help="First layer thickness")
+    parser.add_argument('growth_ratio', type=float, help="Expansion ratio")
+    parser.add_argument('nb_layers', type=int, help="Number of layers")
+
+
+def _run_vl(args: Namespace) -> int:
+    from aa_foam.viscous_layer import viscous_layer_mesh
+
+    print("**** INPUT ****")
+
+    print(f"First layer thickness : {args.first_layer:.8f}")
+    print(f"         Growth ratio : {args.growth_ratio:.3f}")
+    print(f"            Nb layers : {args.nb_layers}")
+
+    total, outermost, _ = viscous_layer_mesh(args.first_layer, args.growth_ratio, args.nb_layers)
+
+    print("**** OUTPUT ****")
+
+    print(f"         Total thickness : {total:.8f}")
+    print(f"Outermost cell thickness : {outermost:.8f}")
+    return 0
+
+
+def _add_grading(parser: ArgumentParser) -> None:
+    modes = parser.add_subparsers(dest='mode', metavar='mode')
+    modes.required = True
+    ratio = modes.add_parser('ratio', help="Expansion ratio from nb cells, starting length and domain length")
+    ratio.add_argument('L', type=float, help="Length [m]")
+    ratio.add_argument('x_min', type=float, help="Minimum / starting cell size [m]")
+    ratio.add_argument('N', type=int, help="Nb cells")
+    cells = modes.add_parser('cells', help="Number of cells and expansion ratio from L, xmin, xmax")
+    cells.add_argument('L', type=float, help="Length [m]")
+    cells.add_argument('x_min', type=float, help="Minimum / starting cell size [m]")
+    cells.add_argument('x_max', type=float, help="Maximum / ending cell size [m]")
+
+
+def _run_grading(args: Namespace) -> int:
+    from aa_foam.grading import expansion_ratio_from_cells_and_length, number_of_cells_and_expansion_ratio
+
+    logger.info("**** INPUT ****")
+
+    logger.info(f"    L [m] : {args.L:.8f}")
+    logger.info(f"x_min [m] : {args.x_min:.8f}")
+    if args.mode == 'ratio':
+        logger.info(f" Nb cells : {args.N}")
+        R, r = expansion_ratio_from_cells_and_length(args.L, args.x_min, args.N)
+    else:
+        logger.info(f"x_max [m] : {args.x_max:.8f}")
+        N, R, r = number_of_cells_and_expansion_ratio(args.L, args.x_min, args.x_max)
+
+    logger.info("**** OUTPUT ****")
+
+    if args.mode == 'cells':
+        logger.info(f"       Number of cells : {N}")
+    logger.info(f"Size ratio (max / min) : {float(R):.8f}")
+    logger.info(f"          Growth ratio : {float(r):.8f}")
+    return 0
+
+
+def _add_plan(parser: ArgumentParser) -> None:
+    parser.add_argument('u_inf', type=float, help="Freestream velocity [m/s]")
+    parser.add_argument('rho', type=float, help="Density [kg/m3]")
+    parser.add_argument('mu', type=float, help="Dynamic viscosity [kg/m s]")
+    parser.add_argument('L', type=float, help="Reference length [m]")
+    parser.add_argument('y_plus', type=float, help="Desired y+")
+    parser.add_argument('far_field_size', type=float, help="Far field cell size [m]")
+    parser.add_argument('outer_length', type=float, help="Distance from the wall to the far field [m]")
+    parser.add_argument('-g', '--growth_ratio', type=float, default=1.2, help="Layers growth ratio")
+    parser.add_argument('-n', '--nb_layers', type=int, default=None,
+                        help="Number of layers (default: up to the layer fraction of the far field size)")
+    parser.add_argument('-f', '--layer_fraction', type=float, default=0.1,
+                        help="Outermost layer thickness of the default number of layers / far field size")
+    parser.add_argument('-c', '--correlation', default='white',
+                        help="Skin friction correlation (white, schlichting, prandtl, ittc57, blasius)")
+
+
+def _run_plan(args: Namespace) -> int:
+    from aa_foam.mesh_planner import plan_near_wall_mesh
+
+    logger.info("**** INPUT ****")
+
+    logger.info(f"           U [m/s] : {args.u_inf:.8f}")
+    logger.info(f"       rho [kg/m3] : {args.rho:.3f}")
+    logger.info(f"       mu [kg/m.s] : {args.mu:.8f}")
+    logger.info(f"             L [m] : {args.L:.6f}")
+    logger.info(f"                y+ : {args.y_plus:.3f}")
+    logger.info(f"Far field size [m] : {args.far_field_size:.6f}")
+    logger.info(f"  Outer length [m] : {args.outer_length:.6f}")
+    logger.info(f"      Growth ratio : {args.growth_ratio:.3f}")
+
+    plan = plan_near_wall_mesh(args.u_inf, args.rho, args.mu, args.L, args.y_plus, args.far_field_size,
+                               args.outer_length, args.growth_ratio, args.nb_layers, args.correlation,
+                               args.layer_fraction)
+
+    logger.info("**** OUTPUT ****")
+
+    logger.info(f"Delta S (wall spacing) : {float(plan.first_layer):.8f}")
+    logger.info(f"       Reynolds number : {float(plan.reynolds):.8f}")
+    logger.info(f"             Nb layers : {int(plan.nb_layers)}")
+    logger.info(f"      Layers thickness : {float(plan.layers_thickness):.8f}")
+    logger.info(f"Outermost layer thick. : {float(plan.outermost_layer):.8f}")
+    if not plan.valid:
+        raise ValueError("The outer block cannot be graded (layers thicker than the outer length ?)")
+    logger.info(f"   Outer block N cells : {int(plan.outer_nb_cells)}")
+    logger.info(f"Outer block size ratio : {float(plan.outer_size_ratio):.8f}")
+    logger.info(f"    Outer growth ratio : {float(plan.outer_growth_ratio):.8f}")
+    return 0
+
+
+# ************************** *
+# Cases and time directories *
+# ************************** *
+
+def _add_vof(parser: ArgumentParser) -> None:
+    parser.add_argument('-c', '--case',
+                        default='.',
+                        help="Path to the case")
+    parser.add_argument('-f', '--field',
+                        default='alpha.water',
+                        help="Name of the vof field")
+    parser.add_argument('-o', '--output',
+                        default='vof_series.dat',
+                        help="Output file, the times already in it are not processed again")
+    parser.add_argument('-w', '--workers',
+                        type=int,
+                        default=None,
+                        help="Number of worker processes (default : number of CPUs)")
+
+
+def _run_vof(args: Namespace) -> int:
+    from aa_foam.vof_utils import vof_time_series, VOF_SERIES_COLUMNS
+    rows = vof_time_series(args.case, args.field, args.output, args.workers)
+    print(" ".join(f"{c:>14s}" for c in VOF_SERIES_COLUMNS))
+    for row in rows:
+        print(" ".join(f"{v:14.6g}" for v in row))
+    return 0
+
+
+def _add_ywall(parser: ArgumentParser) -> None:
+    parser.add_argument('nu', type=float, help="Kinematic viscosity [m2/s]")
+    parser.add_argument('-c', '--case',
+                        default='.',
+                        help="Path to the case")
+    parser.add_argument('-p', '--patches',
+                        nargs='*',
+                        default=None,
+                        help="Patches (default : all the wall patches)")
+    parser.add_argument('-r', '--rho',
+                        type=float,
+                        default=1.,
+                        help="Density, if wallShearStress is not kinematic (compressible cases)")
+    parser.add_argument('-w', '--workers',
+                        type=int,
+                        default=None,
+                        help="Number of worker processes (default : number of CPUs)")
+
+
+def _run_ywall(args: Namespace) -> int:
+    from aa_foam.wall_y_plus import y_plus_time_series, Y_PLUS_SERIES_COLUMNS
+    series = y_plus_time_series(args.case, args.nu,
+                                None if args.patches is None else [p.encode() for p in args.patches],
+                                rho=args.rho, workers=args.workers)
+    for patch, rows in series.items():
+        print(f"**** {patch.decode()} ****")
+        print(" ".join(f"{c:>14s}" for c in Y_PLUS_SERIES_COLUMNS))
+        for row in rows:
+            print(" ".join(f"{v:14.6g}" for v in row))
+    return 0
+
+
+def _add_inlet(parser: ArgumentParser) -> None:
+    parser.add_argument('table', help="Operating points table (columns case U D nu or Re, optionally k_s)")
+    parser.add_argument('-p', '--patch',
+                        default='inlet',
+                        help="Inlet patch name")
+    parser.add_argument('-f', '--fields',
+                        nargs='*',
+                        default=None,
+                        help="Fields to write (default : k epsilon omega nut)")
+    parser.add_argument('-s', '--start_time',
+                        default='0',
+                        help="Start time directory")
+    parser.add_argument('-t', '--template',
+                        default=None,
+                        help="Case whose field files are copied to the cases that do not have them")
+    parser.add_argument('-i', '--internal',
+                        action='store_true',
+                        help="Also set the internal fields to the inlet values")
+    parser.add_argument('-l', '--length_scale_ratio',
+                        type=float,
+                        default=0.07,
+                        help="Turbulent length scale / diameter")
+    parser.add_argument('-w', '--workers',
+                        type=int,
+                        default=None,
+                        help="Number of worker processes (default : number of CPUs)")
+
+
+def _run_inlet(args: Namespace) -> int:
+    from aa_foam.inlet_conditions import write_inlet_conditions, INLET_FIELDS
+    fields = INLET_FIELDS if args.fields is None else args.fields
+    cases = write_inlet_conditions(args.table, args.patch, fields, args.start_time, args.template,
+                                   args.internal, args.length_scale_ratio, workers=args.workers)
+    print(" ".join([f"{'case':<30s}"] + [f"{f:>14s}" for f in fields]))
+    for case, values in cases.items():
+        print(" ".join([f"{case:<30s}"] + [f"{values[f]:14.6g}" for f in fields]))
+    return 0
+
+
+# ******************* *
+# Live plots and runs *
+# ******************* *
+
+def _add_forces(parser: ArgumentParser) -> None:
+    parser.add_argument('-l', '--last',
+                        type=int,
+                        default=100,
+                        help="Range of plot based on last n measurement")
+    parser.add_argument('-t', '--timestep',
+                        type=int,
+                        default=0,
+                        help="Timestep subfolder name where the force.dat lives in the postProcessing folder")
+    parser.add_argument('-r', '--refresh',
+                        type=int,
+                        default=1,
+                        help="Refresh frequency in seconds")
+    parser.add_argument('-p', '--precision',
+                        type=int,
+                        default=4,
+                        help="Number of decimal digits")
+
+
+def _run_forces(args: Namespace) -> int:
+    from aa_foam.watchers import checks, watch_forces
+    file_ok, msg = checks(args.timestep)  # so that logging messages are not in the animate loop
+    print(msg)
+    if not file_ok:
+        return 1
+    watch_forces(args.timestep, args.last, args.refresh, args.precision)
+    return 0
+
+
+def _add_coefs(parser: ArgumentParser) -> None:
+    parser.add_argument("coef_file", help="Path to the coefficient.dat file")
+    parser.add_argument('-l', '--last',
+                        type=int,
+                        default=100,
+                        help="Range of plot based on last n measurement")
+    parser.add_argument('-r', '--refresh',
+                        type=int,
+                        default=1,
+                        help="Refresh frequency in seconds")
+    parser.add_argument('-p', '--precision',
+                        type=int,
+                        default=4,
+                        help="Number of decimal digits")
+
+
+def _run_coefs(args: Namespace) -> int:
+    from os.path import isfile
+    if not isfile(args.coef_file):
+        print("ERROR : The specified coefficients file could not be found")
+        return 1
+    from aa_foam.watchers import watch_coefficients
+    watch_coefficients(args.coef_file, args.last, args.refresh, args.precision)
+    return 0
+
+
+def _add_mem(parser: ArgumentParser) -> None:
+    # the options are parsed by memory_usage (aafoam mem -h for its help)
+    pass
+
+
+def _run_mem(args: Namespace) -> int:
+    from aa_foam.memory_usage import memory_usage_main
+    sys.argv = [f"{sys.argv[0]} mem"] + args.mem_options
+    memory_usage_main()
+    return 0
+
+
+# *********** *
+# Entry point *
+# *********** *
+
+# name, help, arguments definition, run (returns the exit code)
+SUBCOMMANDS: List[Tuple[str, str, Callable[[ArgumentParser], None], Callable[[Namespace], int]]] = [
+    ('diff', "Diff-ing (of data, meaning data1 minus data2) of 2 OpenFOAM files", _add_diff, _run_diff),
+    ('yplus', "YPlus computations", _add_yplus, _run_yplus),
+    ('vl', "Viscous layers meshing computations", _add_vl, _run_vl),
+    ('grading', "Expansion ratio or number of cells of a graded edge", _add_grading, _run_grading),
+    ('plan', "Near wall mesh planning : y+ -> viscous layers -> outer block grading", _add_plan, _run_plan),
+    ('vof', "VOF time series (interface area, phase volume and centre of mass)", _add_vof, _run_vof),
+    ('ywall', "y+ statistics on the wall patches for all the time directories", _add_ywall, _run_ywall),
+    ('inlet', "Turbulence inlet values of operating points, written to the cases", _add_inlet, _run_inlet),
+    ('forces', "Live graphs of forces", _add_forces, _run_forces),
+    ('coefs', "Live graphs of coefficients", _add_coefs, _run_coefs),
+    ('mem', "Memory usage (aafoam mem -h for the options)", _add_mem, _run_mem),
+]
+
+
+def build_parser() -> ArgumentParser:
+    r"""Parser of the aafoam command line, one subparser per subcommand"""
+    parser = ArgumentParser(prog='aafoam', description="OpenFOAM utilities")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Debug logging")
+    subparsers = parser.add_subparsers(dest='subcommand', metavar='subcommand')
+    subparsers.required = True
+    for name, help_, add_arguments, run in SUBCOMMANDS:
+        subparser = subparsers.add_parser(name, help=help_, description=help_, add_help=name != 'mem')
+        add_arguments(subparser)
+        subparser.set_defaults(run=run)
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    r"""Run an aafoam subcommand
+
+    Parameters
+    ----------
+    argv: command line arguments, sys.argv[1:] by default
+
+    Returns
+    -------
+    exit code
+
+    """
+    parser = build_parser()
+    args, extra = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    if args.subcommand == 'mem':
+        args.mem_options = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s :: %(levelname)6s :: %(message)s')
+    try:
+        return args.run(args)
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        print(f"ERROR : {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
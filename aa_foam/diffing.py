@@ -10,7 +10,7 @@ import logging
 
 import numpy as np
 
-from aa_foam.utils import is_binary_format
+from aa_foam.utils import is_binary_format, open_foam_file
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +32,7 @@ def parse_field_all(fn: str) -> Tuple[List[bytes], np.ndarray, dict, int, int, i
     numpy array of internal field and boundary dict
 
     """
-    with open(fn, "rb") as f:
+    with open_foam_file(fn) as f:
         content = f.readlines()
         internal, n, n2, num = _parse_internal_field_content(content)
         boundary = _parse_boundary_content(content)
@@ -51,9 +51,61 @@ def parse_internal_field(fn: str) -> np.ndarray:
     numpy array of internal field
 
     """
-    with open(fn, "rb") as f:
+    with open_foam_file(fn) as f:
         content = f.readlines()
-        return _parse_internal_field_content(content)
+        data = _parse_internal_field_content(content)
+        # nonuniform data comes with its position in the file
+        return data[0] if isinstance(data, tuple) else data
+
+
+def parse_internal_field_cells(fn: str, cells: np.ndarray) -> Union[np.ndarray, float]:
+    """Parse internal field values of some cells only, the other values are not converted
+
+    Parameters
+    ----------
+    fn : file name
+    cells : cell indices
+
+    Returns
+    -------
+    numpy array of the internal field values of the cells (value if uniform)
+
+    """
+    with open_foam_file(fn) as f:
+        content = f.readlines()
+    is_binary = is_binary_format(content)
+    cells = np.asarray(cells, dtype=np.int64)
+    for ln, lc in enumerate(content):
+        if lc.startswith(b'internalField'):
+            if b'nonuniform' in lc and not is_binary:
+                lines = content[ln + 3:ln + 3 + int(content[ln + 1])]
+                if b'scalar' in lc:
+                    return np.array([float(lines[i]) for i in cells])
+                return np.array([lines[i][1:-2].split() for i in cells], dtype=float)
+            data = _parse_internal_field_content(content)
+            return data[0][cells] if isinstance(data, tuple) else data
+    return None
+
+
+def parse_field(fn: str) -> Tuple[Union[np.ndarray, float], Dict[bytes, Dict[bytes, Union[np.ndarray, float]]]]:
+    """Parse internal and boundary field, the file being read once
+
+    Parameters
+    ----------
+    fn : file name
+
+    Returns
+    -------
+    internal field and boundary dict, the nonuniform values being (num, num_components) arrays, also for
+    the scalar fields, and the uniform values floats or (num_components,) arrays : the shapes tell them apart
+    (see patch_integrals.face_values)
+
+    """
+    with open_foam_file(fn) as f:
+        content = f.readlines()
+        data = _parse_internal_field_content(content)
+        internal = data[0].reshape(len(data[0]), -1) if isinstance(data, tuple) else data
+        return internal, _parse_boundary_content(content, rows=True)
 
 
 def _parse_internal_field_content(content: List[bytes]) -> Union[np.ndarray, Tuple[np.ndarray, int, int, int], None]:
@@ -80,6 +132,33 @@ def _parse_internal_field_content(content: List[bytes]) -> Union[np.ndarray, Tup
     return None
 
 
+def is_uniform(values: Union[float, np.ndarray], num_rows: int) -> bool:
+    """Are field values uniform, rather than one row per cell / face (num_rows) ?
+
+    The shapes are compared : the nonuniform values have num_rows rows, as (num_rows, num_components) arrays
+    (see parse_field) or, for the scalar fields, 1-d arrays (see parse_internal_field), the uniform values are
+    floats, (num_components,) arrays or single (1, num_components) rows, the latter being the unambiguous form
+    of a uniform vector / tensor on 3, 6 or 9 cells / faces.
+
+    """
+    values = np.asarray(values)
+    if values.ndim == 0:
+        return True
+    if values.ndim == 1:
+        return len(values) != num_rows
+    return len(values) == 1 and num_rows != 1
+
+
+def field_rows(values: Union[float, np.ndarray], num_rows: int) -> np.ndarray:
+    """Field values with one row per cell / face (num_rows), the uniform values being broadcast (see is_uniform)"""
+    values = np.asarray(values, dtype=float)
+    if not is_uniform(values, num_rows):
+        return values
+    if values.ndim > 1:
+        values = values[0]
+    return np.broadcast_to(values, (num_rows,) + values.shape)
+
+
 def parse_boundary_field(fn: str) -> Dict[bytes, Dict[bytes, Union[np.ndarray, float]]]:
     """Parse boundary field, extract to dict
 
@@ -92,17 +171,19 @@ def parse_boundary_field(fn: str) -> Dict[bytes, Dict[bytes, Union[np.ndarray, f
     dict of boundary field
 
     """
-    with open(fn, "rb") as f:
+    with open_foam_file(fn) as f:
         content = f.readlines()
         return _parse_boundary_content(content)
 
 
-def _parse_boundary_content(content: List[bytes]) -> Dict[bytes, Dict[bytes, Union[np.ndarray, float]]]:
+def _parse_boundary_content(content: List[bytes],
+                             rows: bool = False) -> Dict[bytes, Dict[bytes, Union[np.ndarray, float]]]:
     """Parse each boundary from boundaryField
 
     Parameters
     ----------
     content :
+    rows : nonuniform values as (num, num_components) arrays, also for the scalar fields
 
     Returns
     -------
@@ -119,7 +200,7 @@ def _parse_boundary_content(content: List[bytes]) -> Dict[bytes, Dict[bytes, Uni
             lc = content[n]
             if b'nonuniform' in lc:
                 v, _, _, _ = _parse_data_nonuniform(content, n, n2, is_binary)
-                pd[lc.split()[0]] = v
+                pd[lc.split()[0]] = v.reshape(len(v), -1) if rows else v
                 if not is_binary:
                     n += len(v) + 4
                 else:
@@ -180,7 +261,7 @@ def _parse_data_nonuniform(content: List[bytes],
         nn = 1
         if b'vector' in content[n]:
             nn = 3
-        elif b'symmtensor' in content[n]:
+        elif b'symmTensor' in content[n]:
             nn = 6
         elif b'tensor' in content[n]:
             nn = 9
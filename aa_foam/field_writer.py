@@ -0,0 +1,177 @@
+# coding: utf-8
+
+r"""OpenFOAM field files writer (ASCII and binary)
+
+Writes a volume field (scalar, vector, symmTensor or tensor) from numpy arrays,
+the internal field and the nonuniform boundary values being streamed by chunks of rows.
+The files can be read back with diffing.parse_field and by OpenFOAM.
+
+"""
+
+from typing import Dict, Union, BinaryIO
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Field type by number of components
+FIELD_TYPES = {1: 'scalar', 3: 'vector', 6: 'symmTensor', 9: 'tensor'}
+
+# Banner and separator of the headers of the OpenFOAM files
+BANNER = r"""/*--------------------------------*- C++ -*----------------------------------*\
+  =========                 |
+  \\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox
+   \\    /   O peration     |
+    \\  /    A nd           |
+     \\/     M anipulation  |
+\*---------------------------------------------------------------------------*/
+"""
+
+SEPARATOR = "// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //\n"
+
+_Value = Union[float, list, np.ndarray]
+
+
+def _text(s: Union[str, bytes]) -> str:
+    """str from str or bytes (the parsers use bytes for names)"""
+    return s.decode() if isinstance(s, bytes) else str(s)
+
+
+def _num_components(values: np.ndarray) -> int:
+    """Number of components of the rows of a nonuniform field"""
+    return 1 if values.ndim == 1 else int(np.prod(values.shape[1:]))
+
+
+def format_uniform(value: _Value) -> str:
+    """Uniform value entry, e.g. 'uniform 0' or 'uniform (1 0 0)'"""
+    value = np.asarray(value, dtype=float)
+    if value.ndim == 0:
+        return f"uniform {float(value)!r}"
+    return "uniform (" + " ".join(repr(v) for v in value.ravel().tolist()) + ")"
+
+
+def _write_ascii_rows(f: BinaryIO, values: np.ndarray, chunk_size: int) -> None:
+    """Write the rows of a nonuniform field, one per line, (a b c) for the non scalar rows"""
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        if chunk.ndim == 1:
+            lines = map(repr, chunk.tolist())
+        else:
+            lines = ("(" + " ".join(map(repr, row)) + ")" for row in chunk.reshape(len(chunk), -1).tolist())
+        f.write(("\n".join(lines) + "\n").encode())
+
+
+def _write_binary_rows(f: BinaryIO, values: np.ndarray, chunk_size: int) -> None:
+    """Write the rows of a nonuniform field as little endian doubles"""
+    for start in range(0, len(values), chunk_size):
+        f.write(np.ascontiguousarray(values[start:start + chunk_size], dtype='<f8').tobytes())
+
+
+def _write_nonuniform(f: BinaryIO, values: np.ndarray, binary: bool, chunk_size: int) -> None:
+    """Write a nonuniform List entry value, from the List<type> keyword to the closing parenthesis"""
+    f.write(f"nonuniform List<{FIELD_TYPES[_num_components(values)]}> \n{len(values)}\n(".encode())
+    if binary:
+        _write_binary_rows(f, values, chunk_size)
+        f.write(b")\n")
+    else:
+        f.write(b"\n")
+        _write_ascii_rows(f, values, chunk_size)
+        f.write(b")\n")
+
+
+def _write_entry(f: BinaryIO,
+                 key: str,
+                 value: Union[str, bytes, _Value],
+                 num_values: int,
+                 binary: bool,
+                 chunk_size: int,
+                 indent: str) -> None:
+    """Write a 'key value;' entry, numeric values being written uniform or nonuniform"""
+    f.write(f"{indent}{key:<16}".encode())
+    if isinstance(value, (str, bytes)):
+        f.write(f"{_text(value)};\n".encode())
+        return
+    value = np.asarray(value, dtype=float)
+    if value.ndim == 0 or len(value) != num_values:
+        f.write(f"{format_uniform(value)};\n".encode())
+        return
+    _write_nonuniform(f, value, binary, chunk_size)
+    f.write(b";\n")
+
+
+def write_field(fn: str,
+                internal: _Value,
+                boundary: Dict[Union[str, bytes], Dict[Union[str, bytes], Union[str, bytes, _Value]]] = None,
+                boundary_sizes: Dict[Union[str, bytes], int] = None,
+                object_name: str = None,
+                dimensions: str = "[0 0 0 0 0 0 0]",
+                location: str = None,
+                num_cell: int = None,
+                binary: bool = False,
+                chunk_size: int = 2**16) -> None:
+    """Write a volume field file
+
+    Parameters
+    ----------
+    fn: file name
+    internal: internal field, numpy array (one row per cell) or uniform value (then num_cell is not needed)
+    boundary: boundary field, dict by patch name of dicts of entries,
+              e.g. {'inlet': {'type': 'fixedValue', 'value': 1.}, 'outlet': {'type': 'zeroGradient'}}
+              the numeric values are written uniform, or nonuniform if they have one row per patch face
+    boundary_sizes: number of faces by patch name, used to decide if a patch value is uniform or not,
+                    (e.g. {name: b.num for name, b in mesh.boundary.items()}), by default the values of
+                    more than one row and not a single vector / tensor are nonuniform
+    object_name: object name in the header, the file name by default
+    dimensions: dimensions, e.g. '[0 1 -1 0 0 0 0]'
+    location: location in the header, e.g. the time directory name
+    num_cell: number of cells, to decide if the internal field is uniform when it is a single vector / tensor
+    binary: write the nonuniform values in binary format
+    chunk_size: number of rows written at once
+
+    """
+    internal = np.asarray(internal, dtype=float)
+    uniform_internal = internal.ndim == 0 or (internal.ndim == 1 and num_cell is not None
+                                              and len(internal) != num_cell)
+    num_components = internal.size if uniform_internal else _num_components(internal)
+    if num_components not in FIELD_TYPES:
+        raise ValueError(f"Cannot write a field with {num_components} components")
+    field_class = "vol" + FIELD_TYPES[num_components][0].upper() + FIELD_TYPES[num_components][1:] + "Field"
+    if object_name is None:
+        object_name = fn.replace("\\", "/").rstrip("/").split("/")[-1]
+
+    header = [BANNER, "FoamFile\n{\n",
+              "    version     2.0;\n",
+              f"    format      {'binary' if binary else 'ascii'};\n"]
+    if binary:
+        header.append('    arch        "LSB;label=32;scalar=64";\n')
+    header.append(f"    class       {field_class};\n")
+    if location is not None:
+        header.append(f'    location    "{location}";\n')
+    header += [f"    object      {object_name};\n", "}\n", SEPARATOR, "\n",
+               f"dimensions      {dimensions};\n\n"]
+
+    with open(fn, "wb") as f:
+        f.write("".join(header).encode())
+        f.write(b"internalField   ")
+        if uniform_internal:
+            f.write(f"{format_uniform(internal)};\n".encode())
+        else:
+            _write_nonuniform(f, internal, binary, chunk_size)
+            f.write(b";\n")
+
+        f.write(b"\nboundaryField\n{\n")
+        for patch, entries in (boundary or {}).items():
+            f.write(f"    {_text(patch)}\n    {{\n".encode())
+            for key, value in entries.items():
+                num = -1
+                if boundary_sizes is not None:
+                    num = boundary_sizes.get(patch, boundary_sizes.get(_text(patch).encode(), -1))
+                elif not isinstance(value, (str, bytes)):
+                    value = np.asarray(value, dtype=float)
+                    if value.ndim > 1 or (value.ndim == 1 and num_components == 1 and len(value) > 1):
+                        num = len(value)
+                _write_entry(f, _text(key), value, num, binary, chunk_size, indent="        ")
+            f.write(b"    }\n")
+        f.write(b"}\n\n\n" + ("// " + "*" * 73 + " //\n").encode())
+    logger.info(f"Wrote {object_name} ({field_class}) to {fn}")
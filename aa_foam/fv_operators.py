@@ -0,0 +1,158 @@
+# coding: utf-8
+
+r"""Finite volume operators on a FoamMesh
+
+Face interpolation, face sum, divergence and Gauss gradient operators,
+vectorized over the mesh faces (the faces contributions are scattered
+to the cells with numpy.bincount), and derived quantities
+(vorticity and Q-criterion) for fields from parse_internal_field.
+
+The field arrays have one row per cell (scalar fields are 1D,
+vector fields are (num_cell, 3) ...).
+
+"""
+
+from typing import Dict, Union
+import logging
+
+import numpy as np
+
+from aa_foam.mesh_parser import FoamMesh
+
+logger = logging.getLogger(__name__)
+
+
+def _cell_sum(index: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    """Sum of values (one row per index) into n cells"""
+    if values.ndim == 1:
+        return np.bincount(index, values, minlength=n)
+    flat = values.reshape(len(values), -1)
+    out = np.empty((n, flat.shape[1]))
+    for j in range(flat.shape[1]):
+        out[:, j] = np.bincount(index, flat[:, j], minlength=n)
+    return out.reshape((n,) + values.shape[1:])
+
+
+def interpolation_weights(mesh: FoamMesh) -> np.ndarray:
+    """Linear interpolation weights of the owner cells values on the inner faces
+
+    w = |Sf.(Cn - Cf)| / (|Sf.(Cf - Co)| + |Sf.(Cn - Cf)|), as in OpenFOAM
+
+    """
+    mesh.ensure_geometry()
+    n = mesh.num_inner_face
+    sf = mesh.face_area_vectors[:n]
+    cf = mesh.face_centres[:n]
+    sfd_owner = np.abs(np.einsum('ij,ij->i', sf, cf - mesh.cell_centres[mesh.owner_array[:n]]))
+    sfd_neighbour = np.abs(np.einsum('ij,ij->i', sf, mesh.cell_centres[mesh.neighbour_array] - cf))
+    return sfd_neighbour / (sfd_owner + sfd_neighbour)
+
+
+def interpolate(mesh: FoamMesh,
+                field: np.ndarray,
+                boundary_values: Dict[bytes, Union[float, np.ndarray]] = None,
+                weights: np.ndarray = None) -> np.ndarray:
+    """Linear interpolation of a cell field to the faces
+
+    Parameters
+    ----------
+    mesh: FoamMesh object
+    field: cell values
+    boundary_values: values on the boundary faces by patch name (bytes, as in mesh.boundary),
+                     a patch not in the dict gets the values of the cells next to it (zero gradient)
+    weights: interpolation weights (see interpolation_weights), computed if None
+
+    Returns
+    -------
+    face values (one row per face)
+
+    """
+    field = np.asarray(field, dtype=float)
+    if weights is None:
+        weights = interpolation_weights(mesh)
+    n = mesh.num_inner_face
+    w = weights.reshape((-1,) + (1,) * (field.ndim - 1))
+    face_values = np.empty((mesh.num_face,) + field.shape[1:])
+    face_values[:n] = w * field[mesh.owner_array[:n]] + (1. - w) * field[mesh.neighbour_array]
+    face_values[n:] = field[mesh.owner_array[n:]]
+    if boundary_values is not None:
+        for patch, values in boundary_values.items():
+            b = mesh.boundary[patch]
+            face_values[b.start:b.start + b.num] = values
+    return face_values
+
+
+def face_sum(mesh: FoamMesh, face_values: np.ndarray) -> np.ndarray:
+    """Sum of face values into the cells, added to the owner and subtracted from the neighbour
+    (the face values are oriented along the face area vectors, e.g. fluxes)
+
+    Parameters
+    ----------
+    mesh: FoamMesh object
+    face_values: face values (one row per face)
+
+    Returns
+    -------
+    cell values
+
+    """
+    face_values = np.asarray(face_values, dtype=float)
+    n = mesh.num_inner_face
+    return (_cell_sum(mesh.owner_array, face_values, mesh.num_cell)
+            - _cell_sum(mesh.neighbour_array, face_values[:n], mesh.num_cell))
+
+
+def divergence(mesh: FoamMesh, face_flux: np.ndarray) -> np.ndarray:
+    """Divergence from face fluxes (e.g. phi = Sf.Uf), sum of the outgoing fluxes over the cell volume"""
+    mesh.ensure_geometry()
+    div = face_sum(mesh, face_flux)
+    return div / mesh.cell_volumes.reshape((-1,) + (1,) * (div.ndim - 1))
+
+
+def flux(mesh: FoamMesh,
+         field: np.ndarray,
+         boundary_values: Dict[bytes, Union[float, np.ndarray]] = None) -> np.ndarray:
+    """Face fluxes Sf.Uf of a cell vector field (linear interpolation)"""
+    mesh.ensure_geometry()
+    return np.einsum('ij,ij->i', mesh.face_area_vectors, interpolate(mesh, field, boundary_values))
+
+
+def gauss_gradient(mesh: FoamMesh,
+                   field: np.ndarray,
+                   boundary_values: Dict[bytes, Union[float, np.ndarray]] = None) -> np.ndarray:
+    """Gauss gradient with linear interpolation: sum(Sf * phi_f) / V
+
+    Parameters
+    ----------
+    mesh: FoamMesh object
+    field: cell values, scalar (num_cell,) or vector (num_cell, 3)
+    boundary_values: values on the boundary faces by patch name (see interpolate)
+
+    Returns
+    -------
+    gradient, (num_cell, 3) for a scalar field,
+    (num_cell, 3, 3) for a vector field with grad[:, i, j] = d u_j / d x_i (OpenFOAM convention)
+
+    """
+    mesh.ensure_geometry()
+    face_values = interpolate(mesh, field, boundary_values)
+    sf = mesh.face_area_vectors
+    if face_values.ndim == 1:
+        sf_phi = sf * face_values[:, None]
+    else:
+        sf_phi = sf[:, :, None] * face_values[:, None, :]
+    grad = face_sum(mesh, sf_phi)
+    return grad / mesh.cell_volumes.reshape((-1,) + (1,) * (grad.ndim - 1))
+
+
+def vorticity(grad_u: np.ndarray) -> np.ndarray:
+    """Vorticity (curl of U) from the velocity gradient (OpenFOAM convention, see gauss_gradient)"""
+    return np.stack([grad_u[:, 1, 2] - grad_u[:, 2, 1],
+                     grad_u[:, 2, 0] - grad_u[:, 0, 2],
+                     grad_u[:, 0, 1] - grad_u[:, 1, 0]], axis=1)
+
+
+def q_criterion(grad_u: np.ndarray) -> np.ndarray:
+    """Q-criterion from the velocity gradient: 0.5 * (tr(gradU)^2 - tr(gradU & gradU))"""
+    trace = np.einsum('kii->k', grad_u)
+    return 0.5 * (trace ** 2 - np.einsum('kij,kji->k', grad_u, grad_u))
@@ -7,11 +7,11 @@ https://github.com/aqeelahmed168/OpenFoamCaseSetupWithPython
 
 """
 
-from typing import Tuple
+from collections import namedtuple
+from typing import List, Tuple
 import logging
 
 import numpy as np
-from scipy.optimize import fsolve
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +71,51 @@ def number_of_cells_and_expansion_ratio(L: float,
     return int(N), R, r
 
 
+def numbers_of_cells_and_expansion_ratios(L: np.ndarray,
+                                          xmin: np.ndarray,
+                                          xmax: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """ Get numbers of cells and expansion ratios given arrays of Length of domain,
+    min and max cell size (vectorized number_of_cells_and_expansion_ratio, the arrays are broadcast together).
+
+    The invalid entries (same conditions as number_of_cells_and_expansion_ratio)
+    do not raise, they are reported in the valid mask.
+
+    Parameters
+    ----------
+    L : length of domain
+    xmin : minimum cell size
+    xmax : maximum cell size
+
+    Returns
+    -------
+    N : numbers of cells (0 for the invalid entries)
+    R : size ratios (max cell size / min cell size) aka grading (nan for the invalid entries)
+    r: local growth ratios (size ratio between adjacent cells) (nan for the invalid entries)
+    valid : True for the valid entries
+
+    """
+    L, xmin, xmax = np.broadcast_arrays(np.asarray(L, dtype=float),
+                                        np.asarray(xmin, dtype=float),
+                                        np.asarray(xmax, dtype=float))
+    valid = (L > 0) & (xmin > 0) & (xmax >= xmin) & (xmax <= L / 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        #   FirstToLastCellExpansionRatio
+        R = np.where(valid, xmax / xmin, np.nan)
+
+        #   CellToCellExpansionRatio
+        r = np.where(valid, (L - xmin) / (L - (xmin * R)), np.nan)
+
+        #   Number of cells
+        N = np.where(xmin == xmax, np.ceil(L / xmin), np.ceil(np.log(R) / np.log(r) + 1))
+    N = np.where(valid, N, 0).astype(np.int64)
+
+    num_invalid = int(valid.size - np.count_nonzero(valid))
+    if num_invalid:
+        logger.warning(f"{num_invalid} invalid (L, xmin, xmax) entries")
+    return N, R, r, valid
+
+
 def expansion_ratio_from_cells_and_length(L: float,
                                           xmin: float,
                                           N: int) -> Tuple[float, float]:
@@ -109,6 +154,468 @@ def expansion_ratio_from_cells_and_length(L: float,
     def func(R):
         return np.log(R) / np.log((L - xmin) / (L - (xmin * R))) + 1 - N
 
-    R = fsolve(func, 1.01)
+    # scipy is only imported when needed, it is slow to import
+    from scipy.optimize import fsolve
+    R = fsolve(func, 1.01)[0]
     r = R ** (1 / (N - 1))
     return R, r
+
+
+def _log_series_sum(u: np.ndarray, N: np.ndarray) -> np.ndarray:
+    """log(1 + r + ... + r^(N-1)) with r = exp(u), and its derivative with respect to u,
+    without overflow for large N * u nor cancellation for small u"""
+    a = np.abs(u)
+    small = a < 1e-300
+    a = np.where(small, 1., a)
+    # for u > 0 : sum = exp((N - 1) u) * (1 - exp(-N u)) / (1 - exp(-u)), for u < 0 : (1 - exp(N u)) / (1 - exp(u))
+    log_sum = np.log(-np.expm1(-N * a)) - np.log(-np.expm1(-a)) + np.where(u > 0, (N - 1) * a, 0.)
+    # and sum(u) = exp((N - 1) u) * sum(-u) for the derivative
+    derivative = N / -np.expm1(-N * a) - 1. / -np.expm1(-a)
+    derivative = np.where(u > 0, derivative, N - 1 - derivative)
+    log_sum = np.where(small, np.log(N), log_sum)
+    derivative = np.where(small, 0.5 * (N - 1), derivative)
+    return log_sum, derivative
+
+
+def expansion_ratios_from_cells_and_length(L: np.ndarray,
+                                           xmin: np.ndarray,
+                                           N: np.ndarray,
+                                           tol: float = 1e-13,
+                                           max_iter: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+    """ Get expansion ratios given arrays of Length of domain, number of cells,
+    and min cell size (vectorized expansion_ratio_from_cells_and_length, the arrays are broadcast together).
+
+    The geometric series equation xmin * (1 + r + ... + r^(N-1)) = L is solved for all the entries at once
+    for u = log(r), by Newton iterations kept in a bracket of the root (bisection when a Newton step leaves it).
+    The log of the series sum is convex in u, the iterations start from the upper end of the bracket
+    so that the Newton steps converge monotonically.
+
+    Parameters
+    ----------
+    L: length of domain
+    xmin : minimum cell size
+    N : number of cells
+    tol : tolerance on log(r)
+    max_iter : maximum number of iterations
+
+    Returns
+    -------
+    R : size ratio (max cell size / min cell size) aka grading
+    r : local growth ratio (size ratio between adjacent cells)
+
+    """
+    L, xmin, N = np.broadcast_arrays(np.asarray(L, dtype=float), np.asarray(xmin, dtype=float), np.asarray(N))
+    if np.any(L <= 0):
+        msg = "L should be strictly positive"
+        logger.error(msg)
+        raise ValueError(msg)
+    if np.any(xmin <= 0):
+        msg = "xmin should be strictly positive"
+        logger.error(msg)
+        raise ValueError(msg)
+    if not np.issubdtype(N.dtype, np.integer) or np.any(N < 2):
+        msg = "The number of cells should be an int >= 2"
+        logger.error(msg)
+        raise ValueError(msg)
+    if np.any(xmin > L / 2):
+        msg = "xmin should be smaller than half the domain length"
+        logger.error(msg)
+        raise ValueError(msg)
+
+    shape = L.shape
+    N = N.astype(float).ravel()
+    log_s = np.log(L / xmin).ravel()
+    # Brackets of u = log(r) : r^(N-1) <= L / xmin for r > 1, L / xmin <= 1 / (1 - r) for r < 1
+    grows = log_s > np.log(N)
+    lo = np.where(grows, 0., np.log1p(-(xmin / L).ravel()))
+    hi = np.where(grows, log_s / (N - 1), 0.)
+    u = hi.copy()
+    # Only the entries not converged yet are iterated
+    active = np.arange(len(u))
+    for _ in range(max_iter):
+        ua, na = u[active], N[active]
+        log_sum, derivative = _log_series_sum(ua, na)
+        h = log_sum - log_s[active]
+        # h increases with u, shrink the bracket
+        lo_a = np.where(h < 0, ua, lo[active])
+        hi_a = np.where(h > 0, ua, hi[active])
+        lo[active], hi[active] = lo_a, hi_a
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u_new = ua - h / derivative
+        outside = ~((u_new > lo_a) & (u_new < hi_a))
+        u_new = np.where(outside, 0.5 * (lo_a + hi_a), u_new)
+        converged = np.abs(u_new - ua) <= tol * np.maximum(1., np.abs(ua))
+        u[active] = u_new
+        active = active[~converged]
+        if len(active) == 0:
+            break
+    else:
+        logger.warning(f"{len(active)} expansion ratio(s) did not converge in {max_iter} iterations")
+    u = u.reshape(shape)
+    return np.exp((N.reshape(shape) - 1) * u), np.exp(u)
+
+
+# ******************************* *
+# Multi-grading (blockMesh edges) *
+# ******************************* *
+
+EdgeGrading = namedtuple('EdgeGrading', 'num_cells, lengths, cells, ratios')
+
+
+def _segment_length(first: np.ndarray, last: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """Length of n cells growing geometrically from a first to a last cell size (0 for n = 0)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = (last / first) ** (1. / np.maximum(n - 1, 1))
+        length = (last * r - first) / (r - 1.)
+    length = np.where(np.abs(r - 1.) < 1e-12, n * first, length)
+    length = np.where(n == 1, first, length)
+    return np.where(n == 0, 0., length)
+
+
+def _growth_cells(first: np.ndarray, last: np.ndarray, max_growth: float) -> np.ndarray:
+    """Number of cells to grow from first to last with a growth ratio <= max_growth (0 if first == last)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = 1 + np.ceil(np.log(np.maximum(last, first) / np.minimum(last, first)) / np.log(max_growth) - 1e-9)
+    return np.where(np.isclose(first, last, rtol=1e-12, atol=0.), 0, n).astype(np.int64)
+
+
+def _match_end_sizes(first: np.ndarray, last: np.ndarray, matches: np.ndarray) -> None:
+    """Make the last cell size of edge i equal to the first cell size of edge j for each (i, j) of matches,
+    the smallest specified size winning (nan : not specified), in place"""
+    i, j = matches[:, 0], matches[:, 1]
+    for _ in range(len(matches) + 1):
+        sizes = np.fmin(last[i], first[j])
+        # an edge end in several junctions gets the smallest size
+        new_last, new_first = last.copy(), first.copy()
+        np.fmin.at(new_last, i, sizes)
+        np.fmin.at(new_first, j, sizes)
+        if np.array_equal(new_last, last, equal_nan=True) and np.array_equal(new_first, first, equal_nan=True):
+            break
+        last[:], first[:] = new_last, new_first
+
+
+def _side_growth(end: np.ndarray, plateau: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """log of the growth ratio between adjacent cells of the n cells going from an end size to the plateau size
+    (for n = 0, between the end size and the plateau size, as for a cell of that size next to the edge)"""
+    return np.abs(np.log(plateau / end)) / np.maximum(n - 1, 1)
+
+
+def _plateau_sizes(L: np.ndarray,
+                   a: np.ndarray,
+                   b: np.ndarray,
+                   n1: np.ndarray,
+                   n2: np.ndarray,
+                   n3: np.ndarray,
+                   bisection_iter: int) -> np.ndarray:
+    """Plateau sizes for which the growth (n1 cells from a), the plateau (n2 cells) and the shrink (n3 cells to b)
+    fill the edges, the total length increases with the plateau size"""
+    lo, hi = np.zeros(len(L)), L.copy()
+    for _ in range(bisection_iter):
+        mid = 0.5 * (lo + hi)
+        too_long = _segment_length(a, mid, n1) + n2 * mid + _segment_length(b, mid, n3) > L
+        hi = np.where(too_long, mid, hi)
+        lo = np.where(too_long, lo, mid)
+    return 0.5 * (lo + hi)
+
+
+def _fill_edges(L: np.ndarray,
+                a: np.ndarray,
+                b: np.ndarray,
+                p: np.ndarray,
+                n1: np.ndarray,
+                n2: np.ndarray,
+                n3: np.ndarray,
+                edges: np.ndarray,
+                max_growth: float,
+                bisection_iter: int,
+                max_iter: int = 1000) -> np.ndarray:
+    """Plateau sizes of the edges (indices), the numbers of cells being updated in place so that the plateau
+    size stays below the maximum size p and the growth ratio between adjacent cells below max_growth
+
+    The plateau size only decreases along the iterations: a plateau too large (for p or for a side) gets
+    one more cell, a side going down too fast to a plateau smaller than its end size gets a cell of the plateau
+    (the edges without plateau cells left are left as they are, see the single segment fallback).
+
+    """
+    log_growth = np.log(max_growth) + 1e-9
+    plateau = np.zeros(len(L))
+    active = np.asarray(edges, dtype=np.int64)
+    for _ in range(max_iter):
+        if not len(active):
+            break
+        i = active
+        plateau[i] = _plateau_sizes(L[i], a[i], b[i], n1[i], n2[i], n3[i], bisection_iter)
+        fast = [_side_growth(end[i], plateau[i], n[i]) > log_growth for end, n in ((a, n1), (b, n3))]
+        high = ((plateau[i] > p[i] * (1. + 1e-9)) | (fast[0] & (plateau[i] > a[i]))
+                | (fast[1] & (plateau[i] > b[i])))
+        low = [f & ~high & (n2[i] > 0) for f in fast]
+        n2[i[high]] += 1
+        for move, n in zip(low, (n1, n3)):
+            j = i[move]
+            n[j] = np.maximum(n[j] + 1, 2)
+            n2[j] -= 1
+        active = i[high | low[0] | low[1]]
+    else:
+        logger.warning(f"{len(active)} edge(s) did not converge in {max_iter} iterations")
+    return plateau
+
+
+def _fit_edges(L: np.ndarray,
+               a: np.ndarray,
+               b: np.ndarray,
+               p: np.ndarray,
+               total: np.ndarray,
+               edges: np.ndarray,
+               n1: np.ndarray,
+               n2: np.ndarray,
+               n3: np.ndarray,
+               plateau: np.ndarray,
+               max_growth: float,
+               bisection_iter: int) -> np.ndarray:
+    """Give a total number of cells to the edges (indices), the numbers of cells and the plateau sizes being
+    updated in place, returns the edges updated (not the ones with too many cells for their end sizes)
+
+    The plateau size is bisected, the sides having the fewest cells for the growth ratio at each plateau size,
+    then solved for the numbers of cells found below the crossing of the edge length.
+
+    """
+    i = np.asarray(edges, dtype=np.int64)
+    L, a, b, p, total = L[i], a[i], b[i], p[i], total[i]
+
+    def counts(size):
+        c1, c3 = _growth_cells(a, size, max_growth), _growth_cells(b, size, max_growth)
+        return c1, total - c1 - c3, c3
+
+    lo, hi = 1e-6 * np.minimum(np.minimum(a, b), L / total), p.copy()
+    for _ in range(bisection_iter):
+        mid = 0.5 * (lo + hi)
+        c1, c2, c3 = counts(mid)
+        length = _segment_length(a, mid, c1) + c2 * mid + _segment_length(b, mid, c3)
+        # too many side cells : the plateau is too far from the end sizes
+        too_long = np.where(c2 < 0, mid > np.maximum(a, b), length > L)
+        hi = np.where(too_long, mid, hi)
+        lo = np.where(too_long, lo, mid)
+    c1, c2, c3 = counts(lo)
+    ok = c2 >= 0
+    i, c1, c2, c3 = i[ok], c1[ok], c2[ok], c3[ok]
+    n1[i], n2[i], n3[i] = c1, c2, c3
+    plateau[i] = _plateau_sizes(L[ok], a[ok], b[ok], c1, c2, c3, bisection_iter)
+    return i
+
+
+def _single_segment_cells(L: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Number of cells of a single segment from the first to the last cell size (rounded, at least 1)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n = np.where(np.isclose(a, b, rtol=1e-12, atol=0.), L / a, np.log(b / a) / np.log((L - a) / (L - b)) + 1)
+    return np.maximum(1, np.round(np.nan_to_num(n, nan=1., posinf=1., neginf=1.))).astype(np.int64)
+
+
+def _segments(L: np.ndarray,
+              a: np.ndarray,
+              b: np.ndarray,
+              plateau: np.ndarray,
+              cells: np.ndarray,
+              one: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(num_edge, 3) lengths and expansion ratios of the segments (one : single segment edges)"""
+    n1, n2, n3 = cells.T
+    lengths = np.zeros(cells.shape)
+    ratios = np.ones(cells.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lengths[:, 0] = np.where(one, L, _segment_length(a, plateau, n1))
+        lengths[:, 1] = n2 * plateau
+        lengths[:, 2] = np.where(one, 0., _segment_length(b, plateau, n3))
+        ratios[:, 0] = np.where(one, b / a, np.where(n1 > 1, plateau / a, 1.))
+        ratios[:, 2] = np.where(~one & (n3 > 1), b / plateau, 1.)
+    return lengths, ratios
+
+
+def _segment_end_sizes(lengths: np.ndarray,
+                       cells: np.ndarray,
+                       ratios: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """First and last cell sizes of segments (nan for the segments without cells)"""
+    n = np.asarray(cells, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.asarray(ratios, dtype=float) ** (1. / np.maximum(n - 1., 1.))
+        first = np.where(np.abs(r - 1.) < 1e-12, lengths / n, lengths * (r - 1.) / (r ** n - 1.))
+    first = np.where(n > 0, first, np.nan)
+    return first, first * np.asarray(ratios, dtype=float)
+
+
+def max_adjacent_ratio(lengths: np.ndarray, cells: np.ndarray, ratios: np.ndarray) -> np.ndarray:
+    """ Largest size ratio (>= 1) between adjacent cells of edges, inside their segments and at the
+    junctions of the segments
+
+    Parameters
+    ----------
+    lengths, cells, ratios : (..., num_segment) lengths, numbers of cells and expansion ratios of the segments
+                             of edges (e.g. the EdgeGrading arrays)
+
+    """
+    lengths = np.asarray(lengths, dtype=float)
+    cells = np.asarray(cells)
+    ratios = np.asarray(ratios, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inside = np.exp(np.abs(np.log(ratios)) / np.maximum(cells - 1, 1))
+    worst = np.where(cells > 1, inside, 1.).max(axis=-1)
+    first, last = _segment_end_sizes(lengths, cells, ratios)
+    # last cell of the previous segment with cells
+    previous = np.full(first.shape[:-1], np.nan)
+    for k in range(cells.shape[-1]):
+        with np.errstate(invalid='ignore'):
+            junction = np.maximum(first[..., k] / previous, previous / first[..., k])
+        worst = np.fmax(worst, junction)
+        previous = np.where(cells[..., k] > 0, last[..., k], previous)
+    return worst
+
+
+def design_edge_gradings(L: np.ndarray,
+                         first: np.ndarray,
+                         last: np.ndarray,
+                         max_size: np.ndarray,
+                         max_growth: float = 1.2,
+                         matches: np.ndarray = None,
+                         groups: np.ndarray = None,
+                         bisection_iter: int = 60) -> EdgeGrading:
+    """ Design the multi-grading of blockMesh edges, all the edges at once (the arrays are broadcast together)
+
+    Each edge gets up to 3 segments: a growth from the first cell size to a plateau size (at most the maximum
+    cell size), a uniform segment at the plateau size, and a shrink to the last cell size, the growth ratio
+    between adjacent cells staying below max_growth. The plateau size is solved so that the integer numbers
+    of cells fill the edge. If the edge is too short for the uniform segment, the growth and shrink segments
+    meet at a smaller peak size, and if it is too short for both, a single segment goes from the first
+    to the last cell size (with a warning if its growth ratio is over max_growth).
+
+    Parameters
+    ----------
+    L : length of the edges
+    first : first cell sizes (nan : not specified, see matches)
+    last : last cell sizes (nan : not specified, see matches)
+    max_size : maximum cell sizes
+    max_growth : maximum growth ratio between adjacent cells
+    matches : pairs (i, j) of edges of adjacent blocks, the last cell size of edge i has to be equal
+              to the first cell size of edge j (the smallest specified size is used,
+              the sizes not specified at all are the maximum cell sizes)
+    groups : group label of each edge, the edges of a group (e.g. the parallel edges of a block,
+             or the edges shared by adjacent blocks) get the same number of cells, the largest one of the group,
+             the plateau size of the edges getting more cells being lowered (with a warning for the edges
+             that cannot get them within the growth ratio)
+    bisection_iter : number of bisection iterations for the plateau sizes
+
+    Returns
+    -------
+    EdgeGrading, arrays with one row per edge:
+    num_cells : total number of cells
+    lengths, cells, ratios : (num_edge, 3) lengths, numbers of cells and expansion ratios (last / first) of
+    the growth, uniform and shrink segments (0 cells for an unused segment)
+
+    """
+    if max_growth <= 1:
+        msg = "max_growth should be greater than 1"
+        logger.error(msg)
+        raise ValueError(msg)
+    shape = np.broadcast(np.asarray(L), np.asarray(first), np.asarray(last), np.asarray(max_size)).shape
+    L, a, b, p = [np.array(x, dtype=float).ravel() for x in np.broadcast_arrays(L, first, last, max_size)]
+    if np.any(L <= 0) or np.any(p <= 0):
+        msg = "L and max_size should be strictly positive"
+        logger.error(msg)
+        raise ValueError(msg)
+    if matches is not None and len(matches):
+        _match_end_sizes(a, b, np.asarray(matches, dtype=np.int64).reshape(-1, 2))
+    a = np.where(np.isnan(a), p, a)
+    b = np.where(np.isnan(b), p, b)
+    if np.any(a <= 0) or np.any(b <= 0):
+        msg = "The first and last cell sizes should be strictly positive"
+        logger.error(msg)
+        raise ValueError(msg)
+    p = np.maximum(p, np.maximum(a, b))
+    num_edge = len(L)
+
+    # Growth, uniform, shrink : the number of uniform cells is rounded up, then the plateau size solved
+    n1, n3 = _growth_cells(a, p, max_growth), _growth_cells(b, p, max_growth)
+    middle = L - _segment_length(a, p, n1) - _segment_length(b, p, n3)
+    three = middle >= 0.5 * p
+    n2 = np.where(three, np.maximum(1, np.ceil(middle / p - 1e-9)), 0).astype(np.int64)
+
+    # Growth and shrink meeting at a peak size : the numbers of cells are rounded down for the estimated peak,
+    # the peak size solved is then too large and uniform cells are added until the growth ratios are met
+    peak = (L * (max_growth - 1.) + a + b) / (2. * max_growth)
+    two = ~three & (peak > np.maximum(a, b))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        n1 = np.where(two, 1 + np.floor(np.log(peak / a) / np.log(max_growth)), n1).astype(np.int64)
+        n3 = np.where(two, 1 + np.floor(np.log(peak / b) / np.log(max_growth)), n3).astype(np.int64)
+
+    # Single segment from the first to the last cell size
+    one = ~three & ~two
+    single = _single_segment_cells(L, a, b)
+    n1 = np.where(one, single, n1).astype(np.int64)
+    n3 = np.where(one, 0, n3)
+
+    plateau = _fill_edges(L, a, b, p, n1, n2, n3, np.flatnonzero(~one), max_growth, bisection_iter)
+
+    # Short edges with close end sizes may not have room for a plateau above both : the single segment is
+    # then kept if its ratio is lower
+    cells = np.stack([n1, n2, n3], axis=1)
+    lengths, ratios = _segments(L, a, b, plateau, cells, one)
+    worst = max_adjacent_ratio(lengths, cells, ratios)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        single_ratio = np.where(single > 1, np.maximum(b / a, a / b) ** (1. / (single - 1)), np.inf)
+    fallback = ~one & (worst > max_growth) & (single_ratio < worst)
+    n1[fallback], n2[fallback], n3[fallback] = single[fallback], 0, 0
+    one |= fallback
+
+    if groups is not None:
+        _, group = np.unique(np.broadcast_to(np.asarray(groups), shape).ravel(), return_inverse=True)
+        total = n1 + n2 + n3
+        target = np.zeros(group.max() + 1, dtype=np.int64)
+        np.maximum.at(target, group, total)
+        changed = np.flatnonzero(target[group] > total)
+        fitted = _fit_edges(L, a, b, p, target[group], changed, n1, n2, n3, plateau, max_growth, bisection_iter)
+        one[fitted] = False
+        if len(fitted) < len(changed):
+            logger.warning(f"{len(changed) - len(fitted)} edge(s) cannot get the number of cells of their group")
+
+    cells = np.stack([n1, n2, n3], axis=1)
+    lengths, ratios = _segments(L, a, b, plateau, cells, one)
+
+    too_fast = max_adjacent_ratio(lengths, cells, ratios) > max_growth * (1. + 1e-6)
+    if np.any(too_fast):
+        logger.warning(f"{int(too_fast.sum())} edge(s) too short to go from the first to the last cell size "
+                       f"with a growth ratio below {max_growth}")
+
+    return EdgeGrading(cells.sum(axis=1).reshape(shape),
+                       lengths.reshape(shape + (3,)), cells.reshape(shape + (3,)), ratios.reshape(shape + (3,)))
+
+
+def grading_string(lengths: np.ndarray, cells: np.ndarray, ratios: np.ndarray, precision: int = 6) -> str:
+    """ blockMesh grading of an edge, the expansion ratio for a single segment,
+    ((length fraction, cell fraction, expansion ratio) ...) for several segments
+
+    Parameters
+    ----------
+    lengths, cells, ratios : lengths, numbers of cells and expansion ratios of the segments of an edge
+                             (e.g. a row of the EdgeGrading arrays), the segments without cells are left out
+    precision : number of significant digits
+
+    """
+    used = np.asarray(cells) > 0
+    lengths = np.asarray(lengths, dtype=float)[used]
+    cells = np.asarray(cells)[used]
+    ratios = np.asarray(ratios, dtype=float)[used]
+    if len(cells) == 1:
+        return f"{ratios[0]:.{precision}g}"
+    return "(" + " ".join(f"({l_:.{precision}g} {c:.{precision}g} {r:.{precision}g})"
+                          for l_, c, r in zip(lengths / lengths.sum(), cells / cells.sum(), ratios)) + ")"
+
+
+def simple_grading(x: str, y: str, z: str) -> str:
+    """ blockMesh simpleGrading entry from the gradings of the 3 directions (see grading_string)"""
+    return f"simpleGrading ({x} {y} {z})"
+
+
+def edge_grading(gradings: List[str]) -> str:
+    """ blockMesh edgeGrading entry from the gradings of the 12 edges of a block (see grading_string)"""
+    if len(gradings) != 12:
+        msg = "edgeGrading needs the gradings of the 12 edges of the block"
+        logger.error(msg)
+        raise ValueError(msg)
+    return "edgeGrading (" + " ".join(gradings) + ")"
@@ -0,0 +1,225 @@
+# coding: utf-8
+
+r"""Turbulence inlet conditions for many cases
+
+From a table of operating points (one case directory per row), the k, epsilon, omega and nut inlet values
+are computed at once (see turbulent_intensity.inlet_turbulence) and written to the inlet patch of the
+field files of the start time directory of every case, the cases being processed by a pool of processes.
+
+The table is a whitespace separated text file, with a header line naming the columns
+(the header may start with #, the lines starting with # after it are comments) :
+
+    # case        U     D      nu      k_s
+    runs/U1       1.    0.1    1e-6    0
+    runs/U2       2.    0.1    1e-6    1e-5
+
+case, U (mean inlet velocity [m/s]), D (inlet diameter, or hydraulic diameter [m]) and either nu
+(kinematic viscosity [m2/s]) or Re are required, k_s (sand-grain roughness [m]) is optional.
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from os.path import join, isdir
+from typing import Dict, List, Union
+import gzip
+import logging
+import os
+import re
+import shutil
+
+import numpy as np
+
+from aa_foam.field_writer import format_uniform
+from aa_foam.turbulent_intensity import inlet_turbulence
+from aa_foam.utils import foam_file, open_foam_file
+
+logger = logging.getLogger(__name__)
+
+# Turbulence fields written by default
+INLET_FIELDS = ('k', 'epsilon', 'omega', 'nut')
+
+
+def read_operating_points(fn: str) -> Dict[str, Union[List[str], np.ndarray]]:
+    """Read a table of operating points
+
+    Returns
+    -------
+    dict by column name, 'case' being a list of str and the other columns numpy arrays
+
+    """
+    header = None
+    rows = []
+    with open(fn) as f:
+        for line in f:
+            words = line.split()
+            if not words:
+                continue
+            if header is None:
+                header = [w for w in words if w != '#']
+                if header[0].startswith('#'):
+                    header[0] = header[0][1:]
+                continue
+            if words[0].startswith('#'):
+                continue
+            if len(words) != len(header):
+                msg = f"{fn} : {len(words)} values instead of {len(header)} in line '{line.strip()}'"
+                logger.error(msg)
+                raise ValueError(msg)
+            rows.append(words)
+    if header is None or 'case' not in header:
+        msg = f"{fn} : no header line with a case column"
+        logger.error(msg)
+        raise ValueError(msg)
+    columns = {name: [row[i] for row in rows] for i, name in enumerate(header)}
+    return {name: values if name == 'case' else np.array(values, dtype=float) for name, values in columns.items()}
+
+
+def inlet_values(points: Dict[str, Union[List[str], np.ndarray]],
+                 length_scale_ratio: float = 0.07,
+                 c_mu: float = 0.09) -> Dict[str, np.ndarray]:
+    """k, epsilon, omega and nut inlet values of all the operating points
+
+    Parameters
+    ----------
+    points: operating points, dict by column name (see read_operating_points)
+    length_scale_ratio: turbulent length scale / diameter
+    c_mu: turbulence model constant
+
+    Returns
+    -------
+    dict by name ('k', 'epsilon', 'omega', 'nut', 'intensity', 'Re') of numpy arrays, one value per point
+
+    """
+    missing = [c for c in ('U', 'D') if c not in points]
+    if 'Re' not in points and 'nu' not in points:
+        missing.append('nu or Re')
+    if missing:
+        msg = f"Missing operating point columns : {', '.join(missing)}"
+        logger.error(msg)
+        raise ValueError(msg)
+    u, diameter = points['U'], points['D']
+    re_ = points['Re'] if 'Re' in points else np.abs(u) * diameter / points['nu']
+    turbulence = inlet_turbulence(re_, u, diameter, points.get('k_s', 0.), length_scale_ratio, c_mu)
+    return {'k': turbulence.k,
+            'epsilon': turbulence.epsilon,
+            'omega': turbulence.omega,
+            'nut': turbulence.k / turbulence.omega,
+            'intensity': turbulence.intensity,
+            'Re': re_}
+
+
+def _find_block(content: bytes, name: bytes, start: int = 0) -> slice:
+    """Slice of the content between the braces of the dictionary 'name { ... }' found after start"""
+    m = re.compile(rb'(^|\s)"?' + re.escape(name) + rb'"?\s*\{', re.M).search(content, start)
+    if m is None:
+        raise KeyError(name.decode())
+    depth = 1
+    for brace in re.finditer(rb'[{}]', content[m.end():]):
+        depth += 1 if brace.group() == b'{' else -1
+        if not depth:
+            return slice(m.end(), m.end() + brace.start())
+    raise KeyError(f"{name.decode()} (no closing brace)")
+
+
+def set_uniform_value(content: bytes, patch: str, value: float, internal: bool = False) -> bytes:
+    """Set the value entry of a patch of the content of a field file to a uniform value
+
+    The patch type is kept. If internal, the internal field is set to the same uniform value.
+
+    """
+    entry = format_uniform(value).encode()
+    block = _find_block(content, patch.encode(), _find_block(content, b'boundaryField').start)
+    body = content[block]
+    m = re.search(rb'(^|\s)value\s[^;]*;', body)
+    if m is not None:
+        body = body[:m.start()] + m.group(1) + b'value           ' + entry + b';' + body[m.end():]
+    else:
+        body = body.rstrip(b' ') + b'        value           ' + entry + b';\n    '
+    content = content[:block.start] + body + content[block.stop:]
+    if internal:
+        content, n = re.subn(rb'(^|\n)internalField\s[^;]*;', rb'\1internalField   ' + entry + b';', content, 1)
+        if not n:
+            raise KeyError('internalField')
+    return content
+
+
+def _write_case_inlet(case: str,
+                      values: Dict[str, float],
+                      patch: str,
+                      time: str,
+                      template: str,
+                      internal: bool) -> List[str]:
+    """Set the inlet values of the field files of a case, the missing files being copied from the template"""
+    written = []
+    if template is not None:
+        os.makedirs(join(case, time), exist_ok=True)
+    for field, value in values.items():
+        fn = join(case, time, field)
+        if foam_file(fn) is None and template is not None and foam_file(join(template, time, field)) is not None:
+            src = foam_file(join(template, time, field))
+            shutil.copyfile(src, fn + ('.gz' if src.endswith('.gz') else ''))
+        path = foam_file(fn)
+        if path is None:
+            logger.warning(f"{case} : no {time}/{field} file")
+            continue
+        with open_foam_file(fn) as f:
+            content = f.read()
+        content = set_uniform_value(content, patch, value, internal)
+        with (gzip.open(path, 'wb') if path.endswith('.gz') else open(path, 'wb')) as f:
+            f.write(content)
+        written.append(field)
+    return written
+
+
+def write_inlet_conditions(table: Union[str, Dict[str, Union[List[str], np.ndarray]]],
+                           patch: str = 'inlet',
+                           fields: List[str] = INLET_FIELDS,
+                           time: str = '0',
+                           template: str = None,
+                           internal: bool = False,
+                           length_scale_ratio: float = 0.07,
+                           c_mu: float = 0.09,
+                           workers: int = None) -> Dict[str, Dict[str, float]]:
+    """Compute the turbulence inlet values of the operating points and write them to the cases
+
+    Parameters
+    ----------
+    table: operating points file name or dict (see read_operating_points)
+    patch: inlet patch name
+    fields: fields written, among INLET_FIELDS (the cases usually have either epsilon or omega,
+            the missing files are skipped)
+    time: start time directory name
+    template: case whose field files are copied to the cases that do not have them
+    internal: also set the internal fields to the inlet values
+    length_scale_ratio: turbulent length scale / diameter
+    c_mu: turbulence model constant
+    workers: number of worker processes, os.cpu_count() if None
+
+    Returns
+    -------
+    dict by case of the dicts of the inlet values, by field name
+
+    """
+    points = read_operating_points(table) if isinstance(table, str) else table
+    unknown = [f for f in fields if f not in INLET_FIELDS]
+    if unknown:
+        msg = f"Unknown inlet fields {', '.join(unknown)}, should be among {', '.join(INLET_FIELDS)}"
+        logger.error(msg)
+        raise ValueError(msg)
+    values = inlet_values(points, length_scale_ratio, c_mu)
+    cases = {case: {f: float(values[f][i]) for f in fields} for i, case in enumerate(points['case'])}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {case: executor.submit(_write_case_inlet, case, case_values, patch, time, template, internal)
+                   for case, case_values in cases.items() if isdir(join(case, time)) or template is not None}
+        for case in cases:
+            if case not in futures:
+                logger.warning(f"{case} : no {time} directory")
+                continue
+            try:
+                written = futures[case].result()
+            except (KeyError, OSError, ValueError) as e:
+                logger.warning(f"{case} : inlet values not written ({e!r})")
+                continue
+            logger.info(f"{case} : {', '.join(written) if written else 'no field'} written")
+    return cases
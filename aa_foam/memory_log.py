@@ -0,0 +1,275 @@
+# coding: utf-8
+
+r"""Compact binary time-series log of memory usage samples.
+
+The log is a small header followed by fixed size little-endian records,
+one record per process per sample, so that appending a sample is a single
+write of a few tens of bytes per process and reading the log back is a
+single numpy.fromfile call.
+
+The program names are stored once, in a text sidecar file (<log>.names),
+the records only holding the index of the name.
+
+Since version 2, each record also holds the simulated time and iteration
+of the monitored solver at the time of the sample (nan and -1 if unknown).
+
+"""
+
+import os
+import struct
+from typing import Tuple, List, Dict, Iterable
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MEMORY_LOG_MAGIC = b'AAFMEM'
+MEMORY_LOG_VERSION = 2
+MEMORY_LOG_HEADER = struct.Struct('<6sH')
+
+# Memory values are in KiB
+MEMORY_LOG_DTYPES = {
+    1: np.dtype([('time', '<f8'),
+                 ('pid', '<i4'),
+                 ('program', '<i4'),
+                 ('private', '<f4'),
+                 ('shared', '<f4'),
+                 ('swap', '<f4'),
+                 ('rss', '<f4')]),
+    2: np.dtype([('time', '<f8'),
+                 ('pid', '<i4'),
+                 ('program', '<i4'),
+                 ('private', '<f4'),
+                 ('shared', '<f4'),
+                 ('swap', '<f4'),
+                 ('rss', '<f4'),
+                 ('sim_time', '<f8'),
+                 ('iteration', '<i8')])}
+
+
+def names_file(fn: str) -> str:
+    r"""Path to the program names sidecar file of a memory log"""
+    return f"{fn}.names"
+
+
+def _read_header(f) -> int:
+    r"""Read and check the header of a memory log, return the format version"""
+    header = f.read(MEMORY_LOG_HEADER.size)
+    if len(header) != MEMORY_LOG_HEADER.size:
+        raise ValueError(f"{f.name} is not a memory log (truncated header)")
+    magic, version = MEMORY_LOG_HEADER.unpack(header)
+    if magic != MEMORY_LOG_MAGIC:
+        raise ValueError(f"{f.name} is not a memory log")
+    if version not in MEMORY_LOG_DTYPES:
+        raise ValueError(f"Unsupported memory log version {version} in {f.name}")
+    return version
+
+
+def _read_names(fn: str) -> List[str]:
+    r"""Program names of a memory log"""
+    try:
+        with open(names_file(fn), encoding='utf-8') as f:
+            return [line.rstrip('\n') for line in f]
+    except FileNotFoundError:
+        return []
+
+
+class MemoryLogWriter(object):
+    r"""Append memory usage samples to a memory log
+
+    Parameters
+    ----------
+    fn : log file name, created if it does not exist, appended to otherwise
+
+    """
+    def __init__(self, fn: str):
+        self.fn = fn
+        self.dtype = MEMORY_LOG_DTYPES[MEMORY_LOG_VERSION]
+        if os.path.isfile(fn) and os.path.getsize(fn) > 0:
+            with open(fn, 'rb') as f:
+                if _read_header(f) != MEMORY_LOG_VERSION:
+                    raise ValueError(f"Cannot append to {fn}, it was written with another log version")
+            self._f = open(fn, 'ab')
+            # Drop a partial record left by an interrupted write
+            size = self._f.seek(0, os.SEEK_END)
+            extra = (size - MEMORY_LOG_HEADER.size) % self.dtype.itemsize
+            if extra:
+                logger.warning(f"Dropping a truncated record at the end of {fn}")
+                self._f.truncate(size - extra)
+        else:
+            self._f = open(fn, 'wb')
+            self._f.write(MEMORY_LOG_HEADER.pack(MEMORY_LOG_MAGIC, MEMORY_LOG_VERSION))
+        self.names = {name: i for i, name in enumerate(_read_names(fn))}
+        self._names_f = open(names_file(fn), 'a', encoding='utf-8')
+
+    def _name_index(self, name: str) -> int:
+        r"""Index of a program name, registered in the sidecar file if new"""
+        name = name.replace('\n', ' ')
+        try:
+            return self.names[name]
+        except KeyError:
+            self.names[name] = len(self.names)
+            self._names_f.write(name + '\n')
+            self._names_f.flush()
+            return self.names[name]
+
+    def write_sample(self,
+                     t: float,
+                     processes: Iterable[Tuple],
+                     sim_time: float = float('nan'),
+                     iteration: int = -1) -> None:
+        r"""Append a sample
+
+        Parameters
+        ----------
+        t : sample time (seconds since the epoch)
+        processes : (pid, program, private, shared, swap, rss, ...) for each process, memory in KiB
+        sim_time : simulated time of the solver at the time of the sample
+        iteration : iteration of the solver at the time of the sample
+
+        """
+        processes = list(processes)
+        records = np.empty(len(processes), dtype=self.dtype)
+        for i, process in enumerate(processes):
+            pid, name, private, shared, swap, rss = process[:6]
+            records[i] = (t, pid, self._name_index(name), private, shared, swap, rss, sim_time, iteration)
+        # One write per sample, whatever the number of processes
+        self._f.write(records.tobytes())
+        self._f.flush()
+
+    def close(self) -> None:
+        r"""Close the log"""
+        self._f.close()
+        self._names_f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_memory_log(fn: str) -> Tuple[np.ndarray, List[str]]:
+    r"""Read a memory log
+
+    Parameters
+    ----------
+    fn : log file name
+
+    Returns
+    -------
+    A tuple of the records (numpy structured array with the fields
+    time, pid, program, private, shared, swap and rss, memory in KiB,
+    and sim_time and iteration since version 2)
+    and of the program names (indexed by the program field)
+
+    """
+    with open(fn, 'rb') as f:
+        version = _read_header(f)
+        dtype = MEMORY_LOG_DTYPES[version]
+        size = os.fstat(f.fileno()).st_size - MEMORY_LOG_HEADER.size
+        # The last record may be incomplete if the log is being written
+        records = np.fromfile(f, dtype=dtype, count=size // dtype.itemsize)
+    return records, _read_names(fn)
+
+
+def memory_log_series(records: np.ndarray,
+                      names: List[str],
+                      field: str = 'rss',
+                      by_pid: bool = False) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    r"""Memory time series per program (all the processes of a program summed) or per process
+
+    Parameters
+    ----------
+    records : records from read_memory_log
+    names : program names from read_memory_log
+    field : 'private', 'shared', 'swap' or 'rss'
+    by_pid : one series per process rather than per program
+
+    Returns
+    -------
+    A dictionary where the key is the program name (program [pid] if by_pid)
+    and the value is a tuple of the sample times and memory values [KiB]
+
+    """
+    keys = records['pid'] if by_pid else records['program']
+    series = {}
+    for key in np.unique(keys):
+        selection = records[keys == key]
+        times, inverse = np.unique(selection['time'], return_inverse=True)
+        values = np.zeros(len(times))
+        np.add.at(values, inverse, selection[field])
+        name = names[selection['program'][0]]
+        series[f"{name} [{key}]" if by_pid else name] = (times, values)
+    return series
+
+
+def memory_log_peak_and_growth(records: np.ndarray,
+                               names: List[str],
+                               field: str = 'rss',
+                               by_pid: bool = False) -> Dict[str, Tuple[float, float]]:
+    r"""Peak and growth rate of memory per program or per process
+
+    The growth rate is the slope of a least squares linear fit of the memory over time.
+
+    Returns
+    -------
+    A dictionary where the key is the program name (program [pid] if by_pid)
+    and the value is a tuple of the peak [KiB] and of the growth rate [KiB/s]
+
+    """
+    stats = {}
+    for name, (times, values) in memory_log_series(records, names, field, by_pid).items():
+        if len(times) > 1:
+            growth = float(np.polyfit(times - times[0], values, 1)[0])
+        else:
+            growth = 0.
+        stats[name] = (float(values.max()), growth)
+    return stats
+
+
+def memory_progress_series(records: np.ndarray,
+                           names: List[str],
+                           n_cells: int = None,
+                           field: str = 'rss',
+                           program: str = None) -> Dict[str, np.ndarray]:
+    r"""Joint time series of memory and solver progress
+
+    Parameters
+    ----------
+    records : records from read_memory_log (version >= 2)
+    names : program names from read_memory_log
+    n_cells : number of cells of the case, to compute the memory per million cells
+    field : 'private', 'shared', 'swap' or 'rss'
+    program : only account for the processes of this program, all processes if None
+
+    Returns
+    -------
+    A dictionary of arrays (one value per sample) :
+    'time' [s], 'sim_time', 'iteration', 'memory' [MiB],
+    'memory_per_million_cells' [MiB] (only if n_cells is given) and
+    'growth_per_iteration' [MiB / iteration] (nan where the iteration did not change)
+
+    """
+    if 'sim_time' not in records.dtype.names:
+        raise ValueError("The memory log does not hold the solver progress (log version 1)")
+    if program is not None:
+        records = records[records['program'] == names.index(program)]
+    times, first, inverse = np.unique(records['time'], return_index=True, return_inverse=True)
+    memory = np.zeros(len(times))
+    np.add.at(memory, inverse, records[field])
+    memory /= 1024.
+    series = {'time': times,
+              'sim_time': records['sim_time'][first],
+              'iteration': records['iteration'][first],
+              'memory': memory}
+    if n_cells is not None:
+        series['memory_per_million_cells'] = memory / (n_cells / 1e6)
+    growth = np.full(len(times), np.nan)
+    if len(times) > 1:
+        d_iteration = np.diff(series['iteration']).astype(float)
+        d_memory = np.diff(memory)
+        np.divide(d_memory, d_iteration, out=growth[1:], where=d_iteration > 0)
+    series['growth_per_iteration'] = growth
+    return series
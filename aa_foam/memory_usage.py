@@ -78,7 +78,12 @@ import time
 import errno
 import os
 import sys
-from typing import Tuple, List
+import threading
+from collections import namedtuple
+from typing import Tuple, List, Dict, Union
+
+from aa_foam.memory_log import MemoryLogWriter
+from aa_foam.solver_progress import SolverLogProgress, DatFileProgress
 
 
 # The following
@@ -92,18 +97,17 @@ def std_exceptions(etype, value, tb):
     else:
         sys.__excepthook__(etype, value, tb)
 
-
-sys.excepthook = std_exceptions
-
 #
 #   Define some global variables
 #
 
 PAGESIZE = os.sysconf("SC_PAGE_SIZE") / 1024  # KiB
-our_pid = os.getpid()
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")  # per second
 
-have_pss = 0
-have_swap_pss = 0
+# OpenFOAM programs that are not named <something>Foam
+OPENFOAM_UTILITIES = ('blockMesh', 'snappyHexMesh', 'extrudeMesh', 'checkMesh', 'renumberMesh',
+                      'decomposePar', 'reconstructPar', 'reconstructParMesh', 'redistributePar',
+                      'mapFields', 'setFields', 'topoSet', 'postProcess')
 
 
 class Unbuffered(object):
@@ -171,9 +175,14 @@ def parse_options():
             'version',
             'total',
             'discriminate-by-pid',
-            'swap'
+            'swap',
+            'job=',
+            'record=',
+            'log=',
+            'dat=',
+            'activity'
         ]
-        opts, args = getopt.getopt(sys.argv[1:], "shtdSp:w:", long_options)
+        opts, args = getopt.getopt(sys.argv[1:], "shtdSap:w:j:o:", long_options)
     except getopt.GetoptError:
         sys.stderr.write(help())
         sys.exit(3)
@@ -189,6 +198,10 @@ def parse_options():
     show_swap = False
     watch = None
     only_total = False
+    job_pid = None
+    record_file = None
+    progress = None
+    activity = False
 
     for o, a in opts:
         if o in ('-s', '--split-args'):
@@ -199,6 +212,8 @@ def parse_options():
             discriminate_by_pid = True
         if o in ('-S', '--swap'):
             show_swap = True
+        if o in ('-a', '--activity'):
+            activity = True
         if o in ('-h', '--help'):
             sys.stdout.write(help())
             sys.exit(0)
@@ -217,6 +232,18 @@ def parse_options():
             except:
                 sys.stderr.write(help())
                 sys.exit(3)
+        if o in ('-j', '--job'):
+            try:
+                job_pid = int(a)
+            except:
+                sys.stderr.write(help())
+                sys.exit(3)
+        if o in ('-o', '--record'):
+            record_file = a
+        if o in ('--log',):
+            progress = SolverLogProgress(a)
+        if o in ('--dat',):
+            progress = DatFileProgress(a)
 
     return (
         split_args,
@@ -224,7 +251,11 @@ def parse_options():
         watch,
         only_total,
         discriminate_by_pid,
-        show_swap)
+        show_swap,
+        job_pid,
+        record_file,
+        progress,
+        activity)
 
 
 def help() -> str:
@@ -240,8 +271,19 @@ def help() -> str:
         '  -t, --total                 Show only the total value\n' \
         '  -d, --discriminate-by-pid   Show by process rather than by program\n' \
         '  -S, --swap                  Show swap information\n' \
+        '  -a, --activity              Show per process I/O, CPU and context'\
+        ' switches rates (OpenFOAM processes\n' \
+        '                              only if no pid is specified)\n' \
         '  -w <N>                      Measure and show process memory every'\
-        ' N seconds\n'
+        ' N seconds\n' \
+        '  -j, --job <pid>             Show per rank memory usage of the MPI job'\
+        ' (mpirun or solver PID)\n' \
+        '  -o, --record <file>         Append per process samples to a binary'\
+        ' memory log instead of printing\n' \
+        '  --log <file>                Tag the recorded samples with the time'\
+        ' and iteration from a solver log\n' \
+        '  --dat <file>                Tag the recorded samples with the time'\
+        ' and iteration from a postProcessing .dat file\n'
 
     return help_msg
 
@@ -265,77 +307,18 @@ def kernel_ver() -> Tuple[int, int, int]:
     return int(kv[0]), int(kv[1]), int(kv[2])
 
 
-# return Private,Shared,Swap(Pss),unique_id
-# Note shared is always a subset of rss (trs is not always)
-def getMemStats(pid: int):
-    global have_pss
-    global have_swap_pss
-    mem_id = pid  # unique
-    Private_lines = []
-    Shared_lines = []
-    Pss_lines = []
-    Rss = (int(proc.open(pid, 'statm').readline().split()[1])
-           * PAGESIZE)
-    Swap_lines = []
-    Swap_pss_lines = []
-
-    Swap = 0
-
-    if os.path.exists(proc.path(pid, 'smaps')):  # stat
-        smaps = 'smaps'
-        if os.path.exists(proc.path(pid, 'smaps_rollup')):
-            smaps = 'smaps_rollup'  # faster to process
-        lines = proc.open(pid, smaps).readlines()  # open
-        # Note we checksum smaps as maps is usually but
-        # not always different for separate processes.
-        mem_id = hash(''.join(lines))
-        for line in lines:
-            if line.startswith("Shared"):
-                Shared_lines.append(line)
-            elif line.startswith("Private"):
-                Private_lines.append(line)
-            elif line.startswith("Pss"):
-                have_pss = 1
-                Pss_lines.append(line)
-            elif line.startswith("Swap:"):
-                Swap_lines.append(line)
-            elif line.startswith("SwapPss:"):
-                have_swap_pss = 1
-                Swap_pss_lines.append(line)
-        Shared = sum([int(line.split()[1]) for line in Shared_lines])
-        Private = sum([int(line.split()[1]) for line in Private_lines])
-        # Note Shared + Private = Rss above
-        # The Rss in smaps includes video card mem etc.
-        if have_pss:
-            pss_adjust = 0.5 # add 0.5KiB as this avg error due to truncation
-            Pss = sum([float(line.split()[1])+pss_adjust for line in Pss_lines])
-            Shared = Pss - Private
-        if have_swap_pss:
-            # The kernel supports SwapPss, that shows proportional swap share.
-            # Note that Swap - SwapPss is not Private Swap.
-            Swap = sum([int(line.split()[1]) for line in Swap_pss_lines])
-        else:
-            # Note that Swap = Private swap + Shared swap.
-            Swap = sum([int(line.split()[1]) for line in Swap_lines])
-    elif (2, 6, 1) <= kernel_ver() <= (2, 6, 9):
-        Shared = 0  # lots of overestimation, but what can we do?
-        Private = Rss
-    else:
-        Shared = int(proc.open(pid, 'statm').readline().split()[2])
-        Shared *= PAGESIZE
-        Private = Rss - Shared
-    return Private, Shared, Swap, mem_id
-
-
 def getCmdName(pid: int,
                split_args: bool,
                discriminate_by_pid: bool,
-               exe_only=False) -> str:
-    cmdline = proc.open(pid, 'cmdline').read().split("\0")
+               exe_only=False,
+               proc_fs: Proc = None) -> str:
+    if proc_fs is None:
+        proc_fs = proc
+    cmdline = proc_fs.open(pid, 'cmdline').read().split("\0")
     if cmdline[-1] == '' and len(cmdline) > 1:
         cmdline = cmdline[:-1]
 
-    path = proc.path(pid, 'exe')
+    path = proc_fs.path(pid, 'exe')
     try:
         path = os.readlink(path)
         # Some symlink targets were seen to contain NULs on RHEL 5 at least
@@ -367,7 +350,7 @@ def getCmdName(pid: int,
     if exe_only:
         return exe
 
-    proc_status = proc.open(pid, 'status').readlines()
+    proc_status = proc_fs.open(pid, 'status').readlines()
     cmd = proc_status[0][6:-1]
     if exe.startswith(cmd):
         cmd = exe  # show non truncated version
@@ -385,7 +368,7 @@ def getCmdName(pid: int,
                 ppid = int(ps_line[6:-1])
                 break
         if ppid:
-            p_exe = getCmdName(ppid, False, False, exe_only=True)
+            p_exe = getCmdName(ppid, False, False, exe_only=True, proc_fs=proc_fs)
             if exe == p_exe:
                 cmd = exe
     if sys.version_info >= (3,):
@@ -426,9 +409,10 @@ def cmd_with_count(cmd, count) -> str:
 # 2 = accurate & can total
 # 1 = accurate only considering each process in isolation
 # -1= not available
-def val_accuracy(show_swap):
+def val_accuracy(show_swap, kv: Tuple[int, int, int] = None):
     """http://wiki.apache.org/spamassassin/TopSharedMemoryBug"""
-    kv = kernel_ver()
+    if kv is None:
+        kv = kernel_ver()
     pid = os.getpid()
     swap_accuracy = -1
     if kv[:2] == (2, 4):
@@ -489,81 +473,514 @@ def show_val_accuracy(ram_inacc, swap_inacc, only_total, show_swap):
             sys.exit(1)
 
 
-def get_memory_usage(pids_to_show: List[int],
-                     split_args: bool,
-                     discriminate_by_pid: bool,
+#
+#   Sampler
+#
+
+# Memory of a process, in KiB, with its activity (None if not sampled)
+ProcessMemory = namedtuple('ProcessMemory', 'pid, cmd, private, shared, swap, rss, mem_id, activity')
+
+# Cumulated activity of a process : bytes read / written from / to storage, CPU time [s],
+# voluntary and involuntary context switches, number of threads and monotonic time of the sample [s]
+ProcessActivity = namedtuple('ProcessActivity',
+                             'read_bytes, write_bytes, cpu_time, voluntary_switches, involuntary_switches, '
+                             'threads, time')
+
+# Activity of a process over a sampling interval : read and write rates [bytes/s],
+# CPU usage [cores], voluntary and involuntary context switches rates [1/s], number of threads
+ActivityRates = namedtuple('ActivityRates',
+                           'pid, cmd, ram, read_rate, write_rate, cpu_usage, voluntary_rate, involuntary_rate, '
+                           'threads')
+
+# Memory of a program (all its processes), in KiB
+ProgramMemory = namedtuple('ProgramMemory', 'cmd, private, shared, ram, swap, count')
+
+# Memory of all the programs, sorted by RAM used, and totals in KiB
+MemoryUsage = namedtuple('MemoryUsage', 'programs, total, total_swap')
+
+
+class MemorySampler(object):
+    r"""Memory usage sampler
+
+    The kernel version and the accuracy of the reported values are
+    determined once, so that a sampler can be called repeatedly at low cost.
+    The per call state is local to the call, a sampler can be shared between threads.
+
+    Parameters
+    ----------
+    proc_fs : slash-proc directory, the default one if None
+
+    """
+    def __init__(self, proc_fs: Proc = None):
+        self.proc = proc if proc_fs is None else proc_fs
+        self.kernel_version = kernel_ver()
+        # Set when a process shows Pss / SwapPss lines in its smaps
+        self.have_pss = False
+        self.have_swap_pss = False
+        self._accuracy = {}
+        self._previous_activity = {}
+        self._lock = threading.Lock()
+
+    # return Private,Shared,Swap(Pss),Rss,unique_id
+    # Note shared is always a subset of rss (trs is not always)
+    def mem_stats(self, pid: int) -> Tuple[float, float, float, float, int]:
+        r"""Private, shared, swap and RSS memory [KiB] and unique id of the memory of a process"""
+        mem_id = pid  # unique
+        Private_lines = []
+        Shared_lines = []
+        Pss_lines = []
+        Rss = (int(self.proc.open(pid, 'statm').readline().split()[1])
+               * PAGESIZE)
+        Swap_lines = []
+        Swap_pss_lines = []
+
+        Swap = 0
+
+        if os.path.exists(self.proc.path(pid, 'smaps')):  # stat
+            smaps = 'smaps'
+            if os.path.exists(self.proc.path(pid, 'smaps_rollup')):
+                smaps = 'smaps_rollup'  # faster to process
+            lines = self.proc.open(pid, smaps).readlines()  # open
+            # Note we checksum smaps as maps is usually but
+            # not always different for separate processes.
+            mem_id = hash(''.join(lines))
+            for line in lines:
+                if line.startswith("Shared"):
+                    Shared_lines.append(line)
+                elif line.startswith("Private"):
+                    Private_lines.append(line)
+                elif line.startswith("Pss:"):
+                    Pss_lines.append(line)
+                elif line.startswith("Swap:"):
+                    Swap_lines.append(line)
+                elif line.startswith("SwapPss:"):
+                    Swap_pss_lines.append(line)
+            if (Pss_lines and not self.have_pss) or (Swap_pss_lines and not self.have_swap_pss):
+                with self._lock:
+                    self.have_pss = self.have_pss or bool(Pss_lines)
+                    self.have_swap_pss = self.have_swap_pss or bool(Swap_pss_lines)
+            Shared = sum([int(line.split()[1]) for line in Shared_lines])
+            Private = sum([int(line.split()[1]) for line in Private_lines])
+            # Note Shared + Private = Rss above
+            # The Rss in smaps includes video card mem etc.
+            if Pss_lines:
+                pss_adjust = 0.5  # add 0.5KiB as this avg error due to truncation
+                Pss = sum([float(line.split()[1])+pss_adjust for line in Pss_lines])
+                Shared = Pss - Private
+            if Swap_pss_lines:
+                # The kernel supports SwapPss, that shows proportional swap share.
+                # Note that Swap - SwapPss is not Private Swap.
+                Swap = sum([int(line.split()[1]) for line in Swap_pss_lines])
+            else:
+                # Note that Swap = Private swap + Shared swap.
+                Swap = sum([int(line.split()[1]) for line in Swap_lines])
+        elif (2, 6, 1) <= self.kernel_version <= (2, 6, 9):
+            Shared = 0  # lots of overestimation, but what can we do?
+            Private = Rss
+        else:
+            Shared = int(self.proc.open(pid, 'statm').readline().split()[2])
+            Shared *= PAGESIZE
+            Private = Rss - Shared
+        return Private, Shared, Swap, Rss, mem_id
+
+    def activity_stats(self, pid: int) -> ProcessActivity:
+        r"""Cumulated I/O, CPU time, context switches and threads of a process
+
+        The I/O counters are nan if /proc/<pid>/io is not readable (process of another user).
+
+        """
+        try:
+            io = dict(line.split(':') for line in self.proc.open(pid, 'io').readlines() if ':' in line)
+            read_bytes, write_bytes = float(io['read_bytes']), float(io['write_bytes'])
+        except (LookupError, KeyError):
+            read_bytes, write_bytes = float('nan'), float('nan')
+        stat = self.proc.open(pid, 'stat').read()
+        # The command name may contain spaces and parentheses, the fields start after the last ')'
+        fields = stat[stat.rfind(')') + 2:].split()
+        # utime and stime are the 14th and 15th fields of stat, the state being the 3rd
+        cpu_time = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        voluntary, involuntary, threads = 0, 0, 0
+        for line in self.proc.open(pid, 'status').readlines():
+            if line.startswith('voluntary_ctxt_switches:'):
+                voluntary = int(line.split()[1])
+            elif line.startswith('nonvoluntary_ctxt_switches:'):
+                involuntary = int(line.split()[1])
+            elif line.startswith('Threads:'):
+                threads = int(line.split()[1])
+        return ProcessActivity(read_bytes, write_bytes, cpu_time, voluntary, involuntary, threads, time.monotonic())
+
+    def process_memory(self,
+                       pid: int,
+                       split_args: bool = False,
+                       discriminate_by_pid: bool = False,
+                       with_activity: bool = False) -> ProcessMemory:
+        r"""Memory (and activity if with_activity) of a process,
+        raises LookupError if the process is gone or not accessible"""
+        cmd = getCmdName(pid, split_args, discriminate_by_pid, proc_fs=self.proc)
+        try:
+            private, shared, swap, rss, mem_id = self.mem_stats(pid)
+            activity = self.activity_stats(pid) if with_activity else None
+        except (RuntimeError, IndexError, ValueError):
+            raise LookupError  # process gone
+        return ProcessMemory(pid, cmd, private, shared, swap, rss, mem_id, activity)
+
+    def sample(self,
+               pids: List[int] = None,
+               split_args: bool = False,
+               discriminate_by_pid: bool = False,
+               include_self: bool = False,
+               only_self: bool = False,
+               with_activity: bool = False) -> List[ProcessMemory]:
+        r"""Memory (and activity if with_activity) of the processes,
+        all the (accessible) processes if pids is None"""
+        our_pid = os.getpid()
+        if only_self:
+            pids = [our_pid]
+        elif pids is None:
+            pids = [int(pid) for pid in os.listdir(self.proc.path('')) if pid.isdigit()]
+        processes = []
+        for pid in pids:
+            if pid == our_pid and not (include_self or only_self):
+                continue
+            try:
+                processes.append(self.process_memory(pid, split_args, discriminate_by_pid, with_activity))
+            except LookupError:
+                # operation not permitted
+                # kernel threads don't have exe links or
+                # process gone
+                continue
+        return processes
+
+    def program_usage(self, processes: List[ProcessMemory]) -> MemoryUsage:
+        r"""Memory usage per program from the memory of its processes"""
+        cmds = {}
+        shareds = {}
+        mem_ids = {}
+        count = {}
+        swaps = {}
+        for p in processes:
+            cmd, shared = p.cmd, p.shared
+            if shareds.get(cmd):
+                if self.have_pss:  # add shared portion of PSS together
+                    shareds[cmd] += shared
+                elif shareds[cmd] < shared:  # just take largest shared val
+                    shareds[cmd] = shared
+            else:
+                shareds[cmd] = shared
+            cmds[cmd] = cmds.setdefault(cmd, 0) + p.private
+            count[cmd] = count.get(cmd, 0) + 1
+            mem_ids.setdefault(cmd, {}).update({p.mem_id: None})
+
+            # Swap (overcounting for now...)
+            swaps[cmd] = swaps.setdefault(cmd, 0) + p.swap
+
+        # Total swaped mem for each program
+        total_swap = 0
+
+        # Add shared mem for each program
+        total = 0
+
+        programs = []
+        for cmd in cmds:
+            cmd_count = count[cmd]
+            if len(mem_ids[cmd]) == 1 and cmd_count > 1:
+                # Assume this program is using CLONE_VM without CLONE_THREAD
+                # so only account for one of the processes
+                cmds[cmd] /= cmd_count
+                if self.have_pss:
+                    shareds[cmd] /= cmd_count
+            ram = cmds[cmd] + shareds[cmd]
+            total += ram  # valid if PSS available
+            total_swap += swaps[cmd]
+            if ram:
+                programs.append(ProgramMemory(cmd, cmds[cmd], shareds[cmd], ram, swaps[cmd], cmd_count))
+
+        programs.sort(key=lambda x: x.ram)
+        return MemoryUsage(programs, total, total_swap)
+
+    def memory_usage(self,
+                     pids: List[int] = None,
+                     split_args: bool = False,
+                     discriminate_by_pid: bool = False,
                      include_self: bool = False,
-                     only_self: bool = False):
-    r"""Memory usage"""
-    cmds = {}
-    shareds = {}
-    mem_ids = {}
-    count = {}
-    swaps = {}
-    for pid in os.listdir(proc.path('')):
-        if not pid.isdigit():
-            continue
-        pid = int(pid)
+                     only_self: bool = False) -> MemoryUsage:
+        r"""Memory usage per program"""
+        return self.program_usage(self.sample(pids, split_args, discriminate_by_pid, include_self, only_self))
+
+    def activity_rates(self, processes: List[ProcessMemory]) -> List[ActivityRates]:
+        r"""Activity rates of the processes since their previous call to activity_rates
+
+        The processes must have been sampled with with_activity.
+        The rates of a process seen for the first time are nan.
+
+        """
+        rates = []
+        with self._lock:
+            previous_activity = self._previous_activity
+            self._previous_activity = {p.pid: p.activity for p in processes if p.activity is not None}
+        for p in processes:
+            a = p.activity
+            if a is None:
+                continue
+            previous = previous_activity.get(p.pid)
+            dt = 0. if previous is None else a.time - previous.time
+            if dt <= 0:
+                nan = float('nan')
+                rates.append(ActivityRates(p.pid, p.cmd, p.private + p.shared, nan, nan, nan, nan, nan, a.threads))
+                continue
+            rates.append(ActivityRates(p.pid, p.cmd, p.private + p.shared,
+                                       (a.read_bytes - previous.read_bytes) / dt,
+                                       (a.write_bytes - previous.write_bytes) / dt,
+                                       (a.cpu_time - previous.cpu_time) / dt,
+                                       (a.voluntary_switches - previous.voluntary_switches) / dt,
+                                       (a.involuntary_switches - previous.involuntary_switches) / dt,
+                                       a.threads))
+        return rates
+
+    def accuracy(self, show_swap: bool) -> Tuple[int, int]:
+        r"""RAM and swap accuracy (see val_accuracy), determined once"""
+        with self._lock:
+            if show_swap not in self._accuracy:
+                self._accuracy[show_swap] = val_accuracy(show_swap, self.kernel_version)
+            return self._accuracy[show_swap]
 
-        # Some filters
-        if only_self and pid != our_pid:
-            continue
-        if pid == our_pid and not include_self:
-            continue
-        if pids_to_show is not None and pid not in pids_to_show:
-            continue
 
+#
+#   MPI jobs
+#
+
+# Programs that launch or relay the ranks of an MPI job
+MPI_LAUNCHERS = ('mpirun', 'mpiexec', 'mpiexec.hydra', 'orterun', 'orted',
+                 'prterun', 'prted', 'hydra_pmi_proxy', 'srun', 'slurmstepd')
+
+# Environment variables holding the rank of a process, by MPI implementation
+RANK_ENVIRON_VARIABLES = (b'OMPI_COMM_WORLD_RANK', b'PMIX_RANK', b'PMI_RANK', b'SLURM_PROCID')
+
+RankMemory = namedtuple('RankMemory', 'pid, rank, cmd, private, shared, pss, swap')
+
+
+def have_children_files(pid: int, proc_fs: Proc = None) -> bool:
+    r"""Does the kernel expose /proc/<pid>/task/<tid>/children (CONFIG_PROC_CHILDREN)?"""
+    if proc_fs is None:
+        proc_fs = proc
+    return os.path.exists(proc_fs.path(pid, 'task', pid, 'children'))
+
+
+def get_ppid(pid: int, proc_fs: Proc = None) -> int:
+    r"""Parent PID of a process"""
+    if proc_fs is None:
+        proc_fs = proc
+    stat = proc_fs.open(pid, 'stat').read()
+    # The command name may contain spaces and parentheses, the fields start after the last ')'
+    return int(stat[stat.rfind(')') + 2:].split()[1])
+
+
+def get_children(pid: int, proc_fs: Proc = None) -> List[int]:
+    r"""Children PIDs of a process, read from the children files of its threads"""
+    if proc_fs is None:
+        proc_fs = proc
+    children = []
+    try:
+        tids = os.listdir(proc_fs.path(pid, 'task'))
+    except OSError:
+        raise LookupError
+    for tid in tids:
         try:
-            cmd = getCmdName(pid, split_args, discriminate_by_pid)
-        except LookupError:
-            # operation not permitted
-            # kernel threads don't have exe links or
-            # process gone
+            children.extend(int(c) for c in proc_fs.open(pid, 'task', tid, 'children').read().split())
+        except (LookupError, IOError, OSError):
+            continue  # thread gone
+    return children
+
+
+def get_children_map(proc_fs: Proc = None) -> Dict[int, List[int]]:
+    r"""Children PIDs of every process, from a scan of all the processes (fallback)"""
+    if proc_fs is None:
+        proc_fs = proc
+    children_map = {}
+    for pid in os.listdir(proc_fs.path('')):
+        if not pid.isdigit():
             continue
-
         try:
-            private, shared, swap, mem_id = getMemStats(pid)
-        except RuntimeError:
+            children_map.setdefault(get_ppid(int(pid), proc_fs), []).append(int(pid))
+        except (LookupError, IOError, OSError):
             continue  # process gone
-        if shareds.get(cmd):
-            if have_pss:  # add shared portion of PSS together
-                shareds[cmd] += shared
-            elif shareds[cmd] < shared:  # just take largest shared val
-                shareds[cmd] = shared
-        else:
-            shareds[cmd] = shared
-        cmds[cmd] = cmds.setdefault(cmd, 0) + private
-        if cmd in count:
-            count[cmd] += 1
+    return children_map
+
+
+def get_process_tree(pid: int, proc_fs: Proc = None) -> List[int]:
+    r"""PIDs of a process and all its descendants, breadth first
+
+    The children files are used when available so that the cost
+    is proportional to the size of the tree and not to the number
+    of processes on the machine.
+
+    """
+    children_map = None if have_children_files(pid, proc_fs) else get_children_map(proc_fs)
+    tree = [pid]
+    n = 0
+    while n < len(tree):
+        if children_map is None:
+            try:
+                tree.extend(get_children(tree[n], proc_fs))
+            except LookupError:
+                pass  # process gone
         else:
-            count[cmd] = 1
-        mem_ids.setdefault(cmd, {}).update({mem_id: None})
+            tree.extend(children_map.get(tree[n], []))
+        n += 1
+    return tree
 
-        # Swap (overcounting for now...)
-        swaps[cmd] = swaps.setdefault(cmd, 0) + swap
 
-    # Total swaped mem for each program
-    total_swap = 0
+def is_mpi_launcher(pid: int, proc_fs: Proc = None) -> bool:
+    r"""Is the process an MPI launcher (mpirun, orted ...)?"""
+    return getCmdName(pid, False, False, exe_only=True, proc_fs=proc_fs) in MPI_LAUNCHERS
 
-    # Add shared mem for each program
-    total = 0
 
-    for cmd in cmds:
-        cmd_count = count[cmd]
-        if len(mem_ids[cmd]) == 1 and cmd_count > 1:
-            # Assume this program is using CLONE_VM without CLONE_THREAD
-            # so only account for one of the processes
-            cmds[cmd] /= cmd_count
-            if have_pss:
-                shareds[cmd] /= cmd_count
-        cmds[cmd] += shareds[cmd]
-        total += cmds[cmd]  # valid if PSS available
-        total_swap += swaps[cmd]
+def find_job_root(pid: int, proc_fs: Proc = None) -> int:
+    r"""Outermost MPI launcher above a solver PID, or the PID itself if not launched by MPI"""
+    root = pid
+    while True:
+        try:
+            ppid = get_ppid(root, proc_fs)
+            if ppid <= 1 or not is_mpi_launcher(ppid, proc_fs):
+                return root
+        except LookupError:
+            return root
+        root = ppid
 
-    sorted_cmds = sorted(cmds.items(), key=lambda x: x[1])
-    sorted_cmds = [x for x in sorted_cmds if x[1]]
 
-    return sorted_cmds, shareds, count, total, swaps, total_swap
+def get_rank(pid: int, proc_fs: Proc = None) -> Union[int, None]:
+    r"""MPI rank of a process from its environment, None if unknown or not readable"""
+    if proc_fs is None:
+        proc_fs = proc
+    try:
+        environ = proc_fs.open(pid, 'environ').read().encode(errors='ignore').split(b'\0')
+    except (LookupError, IOError, OSError):
+        return None
+    for variable in RANK_ENVIRON_VARIABLES:
+        for entry in environ:
+            if entry.startswith(variable + b'='):
+                try:
+                    return int(entry[len(variable) + 1:])
+                except ValueError:
+                    return None
+    return None
+
+
+def get_job_processes(pid: int, proc_fs: Proc = None) -> Tuple[List[int], List[int]]:
+    r"""Rank and launcher PIDs of the MPI job that contains pid
+
+    Parameters
+    ----------
+    pid : PID of mpirun or of one of the solver processes
+    proc_fs : slash-proc directory, the default one if None
+
+    Returns
+    -------
+    A tuple of the ranks PIDs and the launchers PIDs
+
+    """
+    ranks, launchers = [], []
+    for p in get_process_tree(find_job_root(pid, proc_fs), proc_fs):
+        try:
+            if is_mpi_launcher(p, proc_fs):
+                launchers.append(p)
+            else:
+                ranks.append(p)
+        except LookupError:
+            continue  # process gone or kernel thread
+    return ranks, launchers
+
+
+def get_job_memory_usage(sampler: MemorySampler,
+                         ranks: List[int],
+                         launchers: List[int]) -> Tuple[List[RankMemory], List[RankMemory]]:
+    r"""Per process memory usage of the ranks and launchers of an MPI job
+
+    Only the listed processes are read, so that the cost of a refresh
+    only depends on the number of ranks.
+
+    Returns
+    -------
+    A tuple of the ranks RankMemory list (sorted by rank) and the launchers RankMemory list
+
+    """
+    def _usage(pids, with_rank):
+        usage = []
+        for pid in pids:
+            try:
+                cmd = getCmdName(pid, False, False, exe_only=True, proc_fs=sampler.proc)
+                private, shared, swap, _, _ = sampler.mem_stats(pid)
+            except (LookupError, RuntimeError):
+                continue  # process gone
+            rank = get_rank(pid, sampler.proc) if with_rank else None
+            usage.append(RankMemory(pid, rank, cmd, private, shared, private + shared, swap))
+        return usage
+
+    rank_usage = _usage(ranks, True)
+    # Unknown ranks (environment not readable) are sorted by PID after the known ones
+    rank_usage.sort(key=lambda x: (x.rank is None, x.rank if x.rank is not None else x.pid))
+    return rank_usage, _usage(launchers, False)
+
+
+def job_statistics(rank_usage: List[RankMemory]) -> Dict[str, Tuple[float, float, float, float]]:
+    r"""Min, max, mean and total across ranks of the private, PSS and swap memory
+
+    Returns
+    -------
+    A dict where the key is the memory kind ('private', 'pss' or 'swap')
+    and the value is a (min, max, mean, total) tuple
+
+    """
+    stats = {}
+    for kind in ('private', 'pss', 'swap'):
+        values = [getattr(r, kind) for r in rank_usage]
+        if values:
+            stats[kind] = (min(values), max(values), sum(values) / len(values), sum(values))
+        else:
+            stats[kind] = (0, 0, 0, 0)
+    return stats
+
+
+def record_memory_usage(sampler: MemorySampler,
+                        record_file: str,
+                        pids_to_show: List[int],
+                        split_args: bool,
+                        watch: Union[int, None],
+                        job_pid: Union[int, None] = None,
+                        progress: Union[SolverLogProgress, DatFileProgress, None] = None):
+    r"""Append per process memory samples to a memory log, every watch seconds if watch is not None
+
+    If job_pid is not None, the ranks and launchers of the MPI job containing job_pid are sampled.
+    If progress is not None, the samples are tagged with the simulated time and iteration it reports.
+
+    """
+    pids = pids_to_show
+    rediscover = False
+    if job_pid is not None:
+        ranks, launchers = get_job_processes(job_pid, sampler.proc)
+        pids = ranks + launchers
+        # Without the children files, the process tree is only discovered once (see show_job_memory_usage)
+        rediscover = have_children_files(job_pid, sampler.proc)
+    with MemoryLogWriter(record_file) as writer:
+        try:
+            while True:
+                processes = sampler.sample(pids, split_args)
+                if not processes:
+                    sys.stdout.write('Process does not exist anymore.\n')
+                    break
+                if progress is not None:
+                    sim_time, iteration = progress.poll()
+                    writer.write_sample(time.time(), processes, sim_time, iteration)
+                else:
+                    writer.write_sample(time.time(), processes)
+                if watch is None:
+                    break
+                time.sleep(watch)
+                if rediscover:
+                    ranks, launchers = get_job_processes(job_pid, sampler.proc)
+                    pids = ranks + launchers
+        except KeyboardInterrupt:
+            pass
 
 
 def print_header(show_swap: bool, discriminate_by_pid: bool):
@@ -577,27 +994,25 @@ def print_header(show_swap: bool, discriminate_by_pid: bool):
     sys.stdout.write(output_string)
 
 
-def print_memory_usage(sorted_cmds,
-                       shareds,
-                       count,
-                       total,
-                       swaps,
-                       total_swap,
-                       show_swap):
+def print_memory_usage(usage: MemoryUsage,
+                       show_swap: bool,
+                       have_pss: bool,
+                       have_swap_pss: bool):
     r"""Print memory usage"""
-    for cmd in sorted_cmds:
+    for program in usage.programs:
 
         output_string = "%9s + %9s = %9s"
-        output_data = (human(cmd[1]-shareds[cmd[0]]),
-                       human(shareds[cmd[0]]), human(cmd[1]))
+        output_data = (human(program.private),
+                       human(program.shared), human(program.ram))
         if show_swap:
             output_string += "   %9s"
-            output_data += (human(swaps[cmd[0]]),)
+            output_data += (human(program.swap),)
         output_string += "\t%s\n"
-        output_data += (cmd_with_count(cmd[0], count[cmd[0]]),)
+        output_data += (cmd_with_count(program.cmd, program.count),)
 
         sys.stdout.write(output_string % output_data)
 
+    total, total_swap = usage.total, usage.total_swap
     # Only show totals if appropriate
     if have_swap_pss and show_swap:  # kernel will have_pss
         sys.stdout.write("%s\n%s%9s%s%9s\n%s\n" %
@@ -608,6 +1023,41 @@ def print_memory_usage(sorted_cmds,
                          ("-" * 33, " " * 24, human(total), "=" * 33))
 
 
+def print_activity_rates(rates: List[ActivityRates]):
+    r"""Print per process memory and activity rates"""
+    output_string = "%8s %11s %13s %13s %7s %10s %10s %7s\t%s\n"
+    sys.stdout.write(output_string % ("PID", "RAM used", "Read", "Write", "CPU", "Vol. cs/s", "Inv. cs/s",
+                                      "Threads", "Program"))
+    for r in rates:
+        sys.stdout.write(output_string % (r.pid, human(r.ram),
+                                          "-" if r.read_rate != r.read_rate else human(r.read_rate / 1024) + "/s",
+                                          "-" if r.write_rate != r.write_rate else human(r.write_rate / 1024) + "/s",
+                                          "%.2f" % r.cpu_usage, "%.1f" % r.voluntary_rate,
+                                          "%.1f" % r.involuntary_rate, r.threads, r.cmd))
+    sys.stdout.write("=" * 90 + "\n")
+
+
+def print_job_memory_usage(rank_usage: List[RankMemory],
+                           launcher_usage: List[RankMemory]):
+    r"""Print per rank memory usage and statistics across ranks of an MPI job"""
+    output_string = "%6s %8s %11s %11s %11s\t%s\n"
+    sys.stdout.write(output_string % ("Rank", "PID", "Private", "PSS", "Swap", "Program"))
+    for r in rank_usage:
+        sys.stdout.write(output_string % ("?" if r.rank is None else r.rank, r.pid,
+                                          human(r.private), human(r.pss), human(r.swap), r.cmd))
+    sys.stdout.write("-" * 62 + "\n")
+    stats = job_statistics(rank_usage)
+    for i, title in enumerate(("min", "max", "mean", "total")):
+        sys.stdout.write(output_string % (title, "", human(stats['private'][i]),
+                                          human(stats['pss'][i]), human(stats['swap'][i]), ""))
+    if stats['pss'][2] > 0:
+        sys.stdout.write(f"PSS imbalance (max / mean) : {stats['pss'][1] / stats['pss'][2]:.3f}\n")
+    for r in launcher_usage:
+        sys.stdout.write(output_string % ("-", r.pid, human(r.private), human(r.pss), human(r.swap),
+                                          f"{r.cmd} (launcher)"))
+    sys.stdout.write("=" * 62 + "\n")
+
+
 def verify_environment(pids_to_show: List[int]):
     r"""Check permissions and OS"""
     if os.geteuid() != 0 and not pids_to_show:
@@ -628,58 +1078,153 @@ def verify_environment(pids_to_show: List[int]):
             raise
 
 
+def show_job_memory_usage(sampler: MemorySampler, job_pid: int, watch: Union[int, None]):
+    r"""Show the memory usage of the MPI job containing job_pid, every watch seconds if watch is not None"""
+    ranks, launchers = get_job_processes(job_pid, sampler.proc)
+    # Without the children files, the process tree is only discovered once
+    # as a full scan of /proc at each refresh would not scale with the ranks
+    rediscover = have_children_files(job_pid, sampler.proc)
+    try:
+        while True:
+            rank_usage, launcher_usage = get_job_memory_usage(sampler, ranks, launchers)
+            if not rank_usage and not launcher_usage:
+                sys.stdout.write('Process does not exist anymore.\n')
+                break
+            print_job_memory_usage(rank_usage, launcher_usage)
+            sys.stdout.flush()
+            if watch is None:
+                break
+            time.sleep(watch)
+            if rediscover:
+                ranks, launchers = get_job_processes(job_pid, sampler.proc)
+    except KeyboardInterrupt:
+        pass
+
+
+def is_openfoam_program(cmd: str) -> bool:
+    r"""Is the program an OpenFOAM solver (<something>Foam) or utility?"""
+    exe = cmd.split()[0] if cmd else cmd
+    return exe.endswith('Foam') or exe in OPENFOAM_UTILITIES
+
+
+def get_openfoam_processes(sampler: MemorySampler) -> List[int]:
+    r"""PIDs of the OpenFOAM processes, selected by command name only (no memory or activity read)"""
+    pids = []
+    for pid in os.listdir(sampler.proc.path('')):
+        if not pid.isdigit():
+            continue
+        try:
+            if is_openfoam_program(getCmdName(int(pid), False, False, proc_fs=sampler.proc)):
+                pids.append(int(pid))
+        except (LookupError, IOError, OSError, IndexError):
+            continue  # kernel thread, process gone or not accessible
+    return pids
+
+
+def show_activity_rates(sampler: MemorySampler,
+                        pids_to_show: List[int],
+                        watch: Union[int, None],
+                        job_pid: Union[int, None] = None):
+    r"""Show per process memory and activity rates, every watch seconds if watch is not None
+
+    The processes are the ranks and launchers of the MPI job containing job_pid if job_pid is not None,
+    the processes in pids_to_show if it is not None, the OpenFOAM processes otherwise.
+
+    """
+    pids = pids_to_show
+    discover = job_pid is not None
+    # Without the children files, the process tree is only discovered once (see show_job_memory_usage)
+    rediscover = discover and have_children_files(job_pid, sampler.proc)
+    try:
+        while True:
+            if discover:
+                ranks, launchers = get_job_processes(job_pid, sampler.proc)
+                pids = ranks + launchers
+                discover = rediscover
+            # The OpenFOAM processes are selected by command name before sampling, the memory and activity
+            # files being the costly reads
+            processes = sampler.sample(get_openfoam_processes(sampler) if pids is None else pids,
+                                       with_activity=True)
+            rates = sampler.activity_rates(processes)
+            if not processes:
+                sys.stdout.write('Process does not exist anymore.\n')
+                break
+            # The first rates are unknown, sample again after 1 s for a one shot run
+            if all(r.cpu_usage != r.cpu_usage for r in rates):
+                time.sleep(1 if watch is None else watch)
+                continue
+            print_activity_rates(rates)
+            sys.stdout.flush()
+            if watch is None:
+                break
+            time.sleep(watch)
+    except KeyboardInterrupt:
+        pass
+
+
+def show_memory_usage(sampler: MemorySampler,
+                      usage: MemoryUsage,
+                      only_total: bool,
+                      show_swap: bool):
+    r"""Show the memory usage or only the total"""
+    if only_total and show_swap and sampler.have_swap_pss:
+        sys.stdout.write(human(usage.total_swap, units=1)+'\n')
+    elif only_total and not show_swap and sampler.have_pss:
+        sys.stdout.write(human(usage.total, units=1)+'\n')
+    elif not only_total:
+        print_memory_usage(usage, show_swap, sampler.have_pss, sampler.have_swap_pss)
+
+
 def memory_usage_main():
     r"""Main (service) function"""
+    # Exit cleanly on Ctrl-C or EPIPE
+    sys.excepthook = std_exceptions
+
     # Force the stdout and stderr streams to be unbuffered
     sys.stdout = Unbuffered(sys.stdout)
     sys.stderr = Unbuffered(sys.stderr)
 
-    split_args, pids_to_show, watch, only_total, discriminate_by_pid, show_swap = parse_options()
+    split_args, pids_to_show, watch, only_total, discriminate_by_pid, show_swap, job_pid, record_file, progress, \
+        activity = parse_options()
+
+    verify_environment(pids_to_show if job_pid is None else [job_pid])
 
-    verify_environment(pids_to_show)
+    sampler = MemorySampler()
 
-    if not only_total:
+    if not only_total and job_pid is None and record_file is None and not activity:
         print_header(show_swap, discriminate_by_pid)
 
-    if watch is not None:
+    if record_file is not None:
+        record_memory_usage(sampler, record_file, pids_to_show, split_args, watch, job_pid, progress)
+    elif activity:
+        show_activity_rates(sampler, pids_to_show, watch, job_pid)
+    elif job_pid is not None:
+        show_job_memory_usage(sampler, job_pid, watch)
+    elif watch is not None:
         try:
-            sorted_cmds = True
-            while sorted_cmds:
-                sorted_cmds, shareds, count, total, swaps, total_swap = \
-                    get_memory_usage(pids_to_show,
-                                     split_args,
-                                     discriminate_by_pid)
-                if only_total and show_swap and have_swap_pss:
-                    sys.stdout.write(human(total_swap, units=1)+'\n')
-                elif only_total and not show_swap and have_pss:
-                    sys.stdout.write(human(total, units=1)+'\n')
-                elif not only_total:
-                    print_memory_usage(sorted_cmds, shareds, count, total,
-                                       swaps, total_swap, show_swap)
+            while True:
+                usage = sampler.memory_usage(pids_to_show,
+                                             split_args,
+                                             discriminate_by_pid)
+                if not usage.programs:
+                    sys.stdout.write('Process does not exist anymore.\n')
+                    break
+                show_memory_usage(sampler, usage, only_total, show_swap)
 
                 sys.stdout.flush()
                 time.sleep(watch)
-            else:
-                sys.stdout.write('Process does not exist anymore.\n')
         except KeyboardInterrupt:
             pass
     else:
         # This is the default behavior
-        sorted_cmds, shareds, count, total, swaps, total_swap = \
-            get_memory_usage(pids_to_show, split_args,
-                             discriminate_by_pid)
-        if only_total and show_swap and have_swap_pss:
-            sys.stdout.write(human(total_swap, units=1)+'\n')
-        elif only_total and not show_swap and have_pss:
-            sys.stdout.write(human(total, units=1)+'\n')
-        elif not only_total:
-            print_memory_usage(sorted_cmds, shareds, count, total, swaps,
-                               total_swap, show_swap)
+        usage = sampler.memory_usage(pids_to_show, split_args,
+                                     discriminate_by_pid)
+        show_memory_usage(sampler, usage, only_total, show_swap)
 
     # We must close explicitly, so that any EPIPE exception
     # is handled by our excepthook, rather than the default
     # one which is reenabled after this script finishes.
     sys.stdout.close()
 
-    ram_accuracy, swap_accuracy = val_accuracy(show_swap)
+    ram_accuracy, swap_accuracy = sampler.accuracy(show_swap)
     show_val_accuracy(ram_accuracy, swap_accuracy, only_total, show_swap)
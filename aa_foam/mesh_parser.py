@@ -2,32 +2,60 @@
 
 r"""Mesh parser (OpenFOAM polymesh) from https://github.com/dayigu"""
 
+import logging
 import os
+import re
 from collections import namedtuple
+from itertools import chain
 import struct
-from typing import Tuple, List, Dict, Union, Generator, Callable
+from typing import Tuple, List, Dict, Union, Generator, Callable, TYPE_CHECKING
 import numpy as np
 
+if TYPE_CHECKING:
+    from scipy.spatial import cKDTree
+
 from aa_foam.diffing import parse_internal_field
-from aa_foam.utils import is_binary_format, is_integer
+from aa_foam.utils import is_binary_format, is_integer, open_foam_file, read_foam_files
+
+logger = logging.getLogger(__name__)
 
 Boundary = namedtuple('Boundary', 'type, num, start, id')
 
 
+def label_dtype(n: int) -> np.dtype:
+    r"""Smallest integer type (int32 or int64) able to hold the indices up to n"""
+    return np.dtype(np.int32) if n < np.iinfo(np.int32).max else np.dtype(np.int64)
+
+
 class FoamMesh(object):
-    """ FoamMesh class """
-    def __init__(self, path: str):
+    """ FoamMesh class
+
+    Parameters
+    ----------
+    path: case path, the mesh files can be compressed (writeCompression on)
+    read_workers: number of mesh files read (and decompressed) at once
+
+    """
+    def __init__(self, path: str, read_workers: int = 1):
         self.path = os.path.join(path, "constant/polyMesh/")
+        self.read_workers = read_workers
+        self._owner_array = None
+        self._neighbour_array = None
+        self._face_offsets = None
+        self._face_points = None
+        self._cell_tree = None
         self._parse_mesh_data(self.path)
         self.num_point = len(self.points)
         self.num_face = len(self.owner)
         self.num_inner_face = len(self.neighbour)
-        self.num_cell = max(self.owner)
+        self.num_cell = max(self.owner) + 1
         self._set_boundary_faces()
         self._construct_cells()
         self.cell_centres = None
         self.cell_volumes = None
         self.face_areas = None
+        self.face_centres = None
+        self.face_area_vectors = None
 
     def read_cell_centres(self, fn: str):
         """Read cell centres coordinates from data file,
@@ -39,6 +67,7 @@ class FoamMesh(object):
 
         """
         self.cell_centres = parse_internal_field(fn)
+        self._cell_tree = None
 
     def read_cell_volumes(self, fn: str):
         """Read cell volumes from data file,
@@ -61,6 +90,131 @@ class FoamMesh(object):
         """
         self.face_areas = parse_internal_field(fn)
 
+    @property
+    def owner_array(self) -> np.ndarray:
+        """Owner cell of each face, as a numpy array (computed once)"""
+        if self._owner_array is None:
+            self._owner_array = np.array(self.owner, dtype=label_dtype(self.num_cell))
+        return self._owner_array
+
+    @property
+    def neighbour_array(self) -> np.ndarray:
+        """Neighbour cell of each inner face, as a numpy array (computed once)"""
+        if self._neighbour_array is None:
+            self._neighbour_array = np.array(self.neighbour[:self.num_inner_face], dtype=label_dtype(self.num_cell))
+        return self._neighbour_array
+
+    @property
+    def cell_tree(self) -> 'cKDTree':
+        """KD-tree over the cell centres (built once, the geometry is calculated if needed)"""
+        if self._cell_tree is None:
+            # scipy is only imported when needed, it is slow to import
+            from scipy.spatial import cKDTree
+            if self.cell_centres is None:
+                self.calc_geometry()
+            self._cell_tree = cKDTree(self.cell_centres)
+        return self._cell_tree
+
+    @property
+    def face_offsets(self) -> np.ndarray:
+        """Offsets of each face in face_points (num_face + 1 values, compact face list)"""
+        if self._face_offsets is None:
+            self._compact_faces()
+        return self._face_offsets
+
+    @property
+    def face_points(self) -> np.ndarray:
+        """Points of all the faces, concatenated (compact face list)"""
+        if self._face_points is None:
+            self._compact_faces()
+        return self._face_points
+
+    def _compact_faces(self) -> None:
+        """Build the compact (offsets, points) numpy representation of the faces"""
+        sizes = np.fromiter(map(len, self.faces), dtype=np.int64, count=self.num_face)
+        self._face_offsets = np.zeros(self.num_face + 1, dtype=np.int64)
+        np.cumsum(sizes, out=self._face_offsets[1:])
+        self._face_points = np.fromiter(chain.from_iterable(self.faces),
+                                        dtype=label_dtype(self.num_point),
+                                        count=int(self._face_offsets[-1]))
+
+    def calc_geometry(self, chunk_size: int = 2**20) -> None:
+        """Calculate the face centres and area vectors and the cell centres and volumes
+        from the points and faces, the same way OpenFOAM does
+        (faces decomposed in triangles around their average point,
+        cells decomposed in pyramids around their estimated centre)
+
+        Parameters
+        ----------
+        chunk_size: number of faces processed at once, bounds the temporary memory
+
+        """
+        points = np.asarray(self.points, dtype=float)
+        offsets, face_points = self.face_offsets, self.face_points
+        self.face_centres = np.empty((self.num_face, 3))
+        self.face_area_vectors = np.empty((self.num_face, 3))
+        for start in range(0, self.num_face, chunk_size):
+            end = min(start + chunk_size, self.num_face)
+            sub_offsets = offsets[start:end + 1] - offsets[start]
+            sizes = np.diff(sub_offsets)
+            p = points[face_points[offsets[start]:offsets[end]]]
+            # Next point of each point of a face, the last point of a face wrapping to its first one
+            p_next_index = np.arange(1, len(p) + 1)
+            p_next_index[sub_offsets[1:] - 1] = sub_offsets[:-1]
+            p_next = p[p_next_index]
+            face_estimate = np.add.reduceat(p, sub_offsets[:-1], axis=0) / sizes[:, None]
+            estimate = np.repeat(face_estimate, sizes, axis=0)
+            n = np.cross(p_next - p, estimate - p)
+            a = np.sqrt(np.einsum('ij,ij->i', n, n))
+            sum_a = np.add.reduceat(a, sub_offsets[:-1])
+            sum_ac = np.add.reduceat(a[:, None] * (p + p_next + estimate), sub_offsets[:-1], axis=0)
+            degenerate = sum_a < np.finfo(float).tiny
+            sum_a[degenerate] = 1.
+            centres = sum_ac / (3. * sum_a[:, None])
+            centres[degenerate] = face_estimate[degenerate]
+            self.face_centres[start:end] = centres
+            self.face_area_vectors[start:end] = 0.5 * np.add.reduceat(n, sub_offsets[:-1], axis=0)
+
+        owner = self.owner_array
+        neighbour = self.neighbour_array
+        n_inner = self.num_inner_face
+        nc = self.num_cell
+
+        def cell_sum(weights_owner, weights_neighbour):
+            return (np.bincount(owner, weights_owner, minlength=nc)
+                    + np.bincount(neighbour, weights_neighbour, minlength=nc))
+
+        # Estimated cell centres : average of the face centres
+        n_cell_faces = np.bincount(owner, minlength=nc) + np.bincount(neighbour, minlength=nc)
+        cell_estimate = np.empty((nc, 3))
+        for i in range(3):
+            cell_estimate[:, i] = cell_sum(self.face_centres[:, i], self.face_centres[:n_inner, i]) / n_cell_faces
+
+        # 3 x volume of the pyramids with a face as base and the estimated cell centre as apex
+        pyr3_owner = np.einsum('ij,ij->i', self.face_area_vectors, self.face_centres - cell_estimate[owner])
+        pyr3_neighbour = np.einsum('ij,ij->i', self.face_area_vectors[:n_inner],
+                                   cell_estimate[neighbour] - self.face_centres[:n_inner])
+        volumes3 = cell_sum(pyr3_owner, pyr3_neighbour)
+        self.cell_centres = np.empty((nc, 3))
+        for i in range(3):
+            # Pyramid centroids are at 3/4 of the way from the apex to the base centroid
+            pc_owner = 0.75 * self.face_centres[:, i] + 0.25 * cell_estimate[owner, i]
+            pc_neighbour = 0.75 * self.face_centres[:n_inner, i] + 0.25 * cell_estimate[neighbour, i]
+            self.cell_centres[:, i] = cell_sum(pyr3_owner * pc_owner, pyr3_neighbour * pc_neighbour)
+        degenerate = np.abs(volumes3) < np.finfo(float).tiny
+        volumes3[degenerate] = 1.
+        self.cell_centres /= volumes3[:, None]
+        self.cell_centres[degenerate] = cell_estimate[degenerate]
+        volumes3[degenerate] = 0.
+        self.cell_volumes = volumes3 / 3.
+        self._cell_tree = None
+
+    def ensure_geometry(self) -> None:
+        """Calculate the geometry (see calc_geometry) if it is not calculated yet"""
+        if (self.face_area_vectors is None or self.face_centres is None
+                or self.cell_volumes is None or self.cell_centres is None):
+            self.calc_geometry()
+
     def cell_neighbour_cells(self, i: int) -> List[int]:
         """Return neighbour cells of cell i
 
@@ -166,11 +320,19 @@ class FoamMesh(object):
         path: path of mesh files
 
         """
-        self.boundary = self.parse_mesh_file(os.path.join(path, 'boundary'), self.parse_boundary_content)
-        self.points = self.parse_mesh_file(os.path.join(path, 'points'), self.parse_points_content)
-        self.faces = self.parse_mesh_file(os.path.join(path, 'faces'), self.parse_faces_content)
-        self.owner = self.parse_mesh_file(os.path.join(path, 'owner'), self.parse_owner_neighbour_content)
-        self.neighbour = self.parse_mesh_file(os.path.join(path, 'neighbour'), self.parse_owner_neighbour_content)
+        parsers = {'boundary': self.parse_boundary_content,
+                   'points': self.parse_points_content,
+                   'faces': self.parse_faces_content,
+                   'owner': self.parse_owner_neighbour_content,
+                   'neighbour': self.parse_owner_neighbour_content}
+        fns = [os.path.join(path, name) for name in parsers]
+        contents = read_foam_files(fns, self.read_workers)
+        for name, fn, content in zip(parsers, fns, contents):
+            if content is None:
+                print(f'file not found: {fn}')
+                setattr(self, name, None)
+            else:
+                setattr(self, name, self._parse_content(fn, content, parsers[name]))
 
     @classmethod
     def parse_mesh_file(cls,
@@ -189,12 +351,24 @@ class FoamMesh(object):
 
         """
         try:
-            with open(fn, "rb") as f:
+            with open_foam_file(fn) as f:
                 content = f.readlines()
-                return parser(content, is_binary_format(content))
         except FileNotFoundError:
             print(f'file not found: {fn}')
             return None
+        return cls._parse_content(fn, content, parser)
+
+    @staticmethod
+    def _parse_content(fn: str,
+                       content: List[bytes],
+                       parser: Callable) -> Union[np.ndarray, List, Dict, None]:
+        """Parse the contents of a mesh file, the parser errors are raised with the file name"""
+        try:
+            return parser(content, is_binary_format(content))
+        except ValueError as e:
+            msg = f'{fn}: {e}'
+            logger.error(msg)
+            raise ValueError(msg) from e
 
     @classmethod
     def parse_points_content(cls,
@@ -294,10 +468,14 @@ class FoamMesh(object):
                     buf = b''.join(content[n+1:])
                     disp = struct.calcsize('c')
                     idx = struct.unpack('{}i'.format(num), buf[disp:num*struct.calcsize('i') + disp])
-                    disp = 3*struct.calcsize('c') + 2*struct.calcsize('i')
+                    # the point labels list follows the offsets list: ')' number of labels '('
+                    disp += num*struct.calcsize('i')
+                    match = re.compile(rb'\)\s*\d+\s*\(').match(buf, disp)
+                    if match is None:
+                        raise ValueError("truncated binary faces, the point labels list is missing")
+                    disp = match.end()
                     pp = struct.unpack('{}i'.format(idx[-1]),
-                                       buf[disp+num*struct.calcsize('i'):
-                                           disp+(num+idx[-1])*struct.calcsize('i')])
+                                       buf[disp:disp+idx[-1]*struct.calcsize('i')])
                     data = []
                     for i in range(num - 1):
                         data.append(pp[idx[i]:idx[i+1]])
@@ -0,0 +1,94 @@
+# coding: utf-8
+
+r"""Near wall mesh planning : y+ -> viscous layers -> outer block grading
+
+Chains the y+ wall spacing estimate, the viscous layers sizing and the grading of the block
+between the layers and the far field in one call, vectorized over arrays of flow conditions
+and lengths (the arrays are broadcast together) for operating envelope sweeps.
+
+"""
+
+from collections import namedtuple
+from typing import Union
+import logging
+
+import numpy as np
+
+from aa_foam.grading import numbers_of_cells_and_expansion_ratios
+from aa_foam.viscous_layer import viscous_layers
+from aa_foam.y_plus import y_plus_calc
+
+logger = logging.getLogger(__name__)
+
+NearWallMeshPlan = namedtuple('NearWallMeshPlan',
+                              'first_layer, reynolds, nb_layers, layers_thickness, outermost_layer, '
+                              'outer_nb_cells, outer_size_ratio, outer_growth_ratio, valid')
+
+_Array = Union[float, np.ndarray]
+
+
+def plan_near_wall_mesh(u_freestream: _Array,
+                        density: _Array,
+                        mu: _Array,
+                        length: _Array,
+                        y_plus: _Array,
+                        far_field_size: _Array,
+                        outer_length: _Array,
+                        growth_ratio: _Array = 1.2,
+                        nb_layers: _Array = None,
+                        correlation: str = 'white',
+                        layer_fraction: _Array = 0.1) -> NearWallMeshPlan:
+    r"""Plan the near wall mesh from the flow conditions to the far field cell size
+
+    Parameters
+    ----------
+    u_freestream : Freestream velocity [m/s]
+    density : Density [kg/m3]
+    mu : Dynamic viscosity [kg/m s]
+    length : Reference length [m]
+    y_plus : Desired y+
+    far_field_size : cell size at the far field end of the outer block [m]
+    outer_length : distance from the wall to the far field end of the outer block [m]
+    growth_ratio : the thickness ratio between a layer and the one just inside it
+    nb_layers : number of viscous layers, by default as many as possible
+                with the outermost layer not thicker than layer_fraction times the far field cell size
+    correlation : skin friction correlation, one of y_plus.SKIN_FRICTION_CORRELATIONS
+    layer_fraction : largest outermost layer thickness of the default number of layers, as a fraction of
+                     the far field cell size, the outer block grading from the layers to the far field size
+
+    Returns
+    -------
+    NearWallMeshPlan, arrays with the broadcast shape of the inputs:
+    first_layer : first layer thickness (wall spacing) [m]
+    reynolds : Reynolds number [-]
+    nb_layers : number of viscous layers
+    layers_thickness : total thickness of the viscous layers [m]
+    outermost_layer : thickness of the outermost layer [m]
+    outer_nb_cells, outer_size_ratio, outer_growth_ratio : number of cells, size ratio (far field cell size /
+    first cell size) and growth ratio of the outer block, that starts with a cell one growth ratio
+    thicker than the outermost layer (see grading.numbers_of_cells_and_expansion_ratios)
+    valid : False where the outer block cannot be graded (e.g. the layers are thicker than outer_length)
+
+    """
+    u_freestream, density, mu, length, y_plus, far_field_size, outer_length, growth_ratio, layer_fraction = \
+        np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in (u_freestream, density, mu, length, y_plus,
+                                                                     far_field_size, outer_length, growth_ratio,
+                                                                     layer_fraction)])
+    first_layer, reynolds, _ = y_plus_calc(u_freestream, density, mu, length, y_plus, correlation)
+    first_layer, reynolds = np.asarray(first_layer), np.asarray(reynolds)
+
+    log_growth = np.log(growth_ratio)
+    if nb_layers is None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nb_layers = np.floor(np.log(layer_fraction * far_field_size / first_layer) / log_growth + 1e-9) + 1
+        nb_layers = np.where(np.isfinite(nb_layers), np.maximum(nb_layers, 1), 1)
+    nb_layers = np.broadcast_to(np.asarray(nb_layers), first_layer.shape).astype(np.int64)
+
+    layers_thickness, outermost_layer = viscous_layers(first_layer, growth_ratio, nb_layers)
+
+    outer_first = np.minimum(outermost_layer * growth_ratio, far_field_size)
+    outer_nb_cells, outer_size_ratio, outer_growth_ratio, valid = \
+        numbers_of_cells_and_expansion_ratios(outer_length - layers_thickness, outer_first, far_field_size)
+
+    return NearWallMeshPlan(first_layer, reynolds, nb_layers, layers_thickness, outermost_layer,
+                            outer_nb_cells, outer_size_ratio, outer_growth_ratio, valid)
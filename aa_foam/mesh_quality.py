@@ -0,0 +1,181 @@
+# coding: utf-8
+
+r"""Mesh quality metrics, as reported by checkMesh
+
+Face non-orthogonality and skewness, cell aspect ratio and volume ratio,
+computed from the FoamMesh geometry (see FoamMesh.calc_geometry) with the
+OpenFOAM definitions (primitiveMeshTools), vectorized and processed by
+chunks of faces to bound the temporary memory.
+
+"""
+
+from typing import Dict, Tuple
+import logging
+
+import numpy as np
+
+from aa_foam.mesh_parser import FoamMesh
+
+logger = logging.getLogger(__name__)
+
+# checkMesh thresholds
+NON_ORTHOGONALITY_THRESHOLD = 70.
+SKEWNESS_THRESHOLD = 4.
+ASPECT_RATIO_THRESHOLD = 1000.
+
+_ROOT_VSMALL = np.sqrt(np.finfo(float).tiny)
+
+
+def non_orthogonality(mesh: FoamMesh, chunk_size: int = 2**20) -> np.ndarray:
+    """Non-orthogonality of the inner faces: angle (degrees) between the face area vector
+    and the vector from the owner cell centre to the neighbour cell centre
+
+    Returns
+    -------
+    numpy array, one value per inner face
+
+    """
+    mesh.ensure_geometry()
+    owner, neighbour = mesh.owner_array, mesh.neighbour_array
+    angles = np.empty(mesh.num_inner_face)
+    for start in range(0, mesh.num_inner_face, chunk_size):
+        end = min(start + chunk_size, mesh.num_inner_face)
+        d = mesh.cell_centres[neighbour[start:end]] - mesh.cell_centres[owner[start:end]]
+        sf = mesh.face_area_vectors[start:end]
+        cos = np.einsum('ij,ij->i', d, sf) / (np.sqrt(np.einsum('ij,ij->i', d, d) * np.einsum('ij,ij->i', sf, sf))
+                                              + _ROOT_VSMALL)
+        angles[start:end] = np.degrees(np.arccos(np.clip(cos, -1., 1.)))
+    return angles
+
+
+def skewness(mesh: FoamMesh, chunk_size: int = 2**20) -> np.ndarray:
+    """Skewness of the faces: distance from the face centre to the intersection of the face
+    with the line between the cell centres, normalised by the extent of the face in that direction
+    (for the boundary faces, the line from the owner cell centre along the face normal)
+
+    Returns
+    -------
+    numpy array, one value per face
+
+    """
+    mesh.ensure_geometry()
+    points = np.asarray(mesh.points, dtype=float)
+    offsets, face_points = mesh.face_offsets, mesh.face_points
+    owner, neighbour = mesh.owner_array, mesh.neighbour_array
+    n_inner = mesh.num_inner_face
+    values = np.empty(mesh.num_face)
+    for start in range(0, mesh.num_face, chunk_size):
+        end = min(start + chunk_size, mesh.num_face)
+        sf = mesh.face_area_vectors[start:end]
+        cf = mesh.face_centres[start:end]
+        cpf = cf - mesh.cell_centres[owner[start:end]]
+        d = np.empty_like(cpf)
+        inner_end = min(max(n_inner - start, 0), end - start)
+        d[:inner_end] = (mesh.cell_centres[neighbour[start:start + inner_end]]
+                         - mesh.cell_centres[owner[start:start + inner_end]])
+        if inner_end < end - start:
+            sfb = sf[inner_end:]
+            normal = sfb / (np.sqrt(np.einsum('ij,ij->i', sfb, sfb))[:, None] + _ROOT_VSMALL)
+            d[inner_end:] = normal * np.einsum('ij,ij->i', normal, cpf[inner_end:])[:, None]
+        # Skewness vector
+        ratio = np.einsum('ij,ij->i', sf, cpf) / (np.einsum('ij,ij->i', sf, d) + _ROOT_VSMALL)
+        sv = cpf - ratio[:, None] * d
+        mag_sv = np.sqrt(np.einsum('ij,ij->i', sv, sv))
+        sv_hat = sv / (mag_sv[:, None] + _ROOT_VSMALL)
+        # Normalisation distance: extent of the face from its centre in the direction of the skewness vector
+        sub_offsets = offsets[start:end + 1] - offsets[start]
+        sizes = np.diff(sub_offsets)
+        p = points[face_points[offsets[start]:offsets[end]]] - np.repeat(cf, sizes, axis=0)
+        extent = np.abs(np.einsum('ij,ij->i', p, np.repeat(sv_hat, sizes, axis=0)))
+        fd = np.maximum(np.maximum.reduceat(extent, sub_offsets[:-1]),
+                        0.2 * np.sqrt(np.einsum('ij,ij->i', d, d)) + _ROOT_VSMALL)
+        values[start:end] = mag_sv / fd
+    return values
+
+
+def aspect_ratio(mesh: FoamMesh) -> np.ndarray:
+    """Aspect ratio of the cells: maximum of the ratio of the largest to the smallest
+    projected area of the cell faces on the coordinate planes and of the ratio of the cell
+    surface to the surface of a cube of the same volume
+
+    Returns
+    -------
+    numpy array, one value per cell
+
+    """
+    mesh.ensure_geometry()
+    owner, neighbour = mesh.owner_array, mesh.neighbour_array
+    n_inner = mesh.num_inner_face
+    nc = mesh.num_cell
+    sum_mag = np.empty((nc, 3))
+    for i in range(3):
+        mag = np.abs(mesh.face_area_vectors[:, i])
+        sum_mag[:, i] = np.bincount(owner, mag, minlength=nc) + np.bincount(neighbour, mag[:n_inner], minlength=nc)
+    ratio = sum_mag.max(axis=1) / (sum_mag.min(axis=1) + _ROOT_VSMALL)
+    v = np.maximum(mesh.cell_volumes, _ROOT_VSMALL)
+    return np.maximum(ratio, sum_mag.sum(axis=1) / (6. * v ** (2. / 3.)))
+
+
+def volume_ratio(mesh: FoamMesh) -> Tuple[np.ndarray, np.ndarray]:
+    """Volume ratio of the cells on each side of the inner faces (smallest over largest)
+
+    Returns
+    -------
+    numpy array of the face volume ratios, one value per inner face,
+    numpy array of the cell volume ratios, the smallest ratio of the cell faces (1. for a cell without neighbour)
+
+    """
+    mesh.ensure_geometry()
+    v_owner = mesh.cell_volumes[mesh.owner_array[:mesh.num_inner_face]]
+    v_neighbour = mesh.cell_volumes[mesh.neighbour_array]
+    face_ratio = np.minimum(v_owner, v_neighbour) / (np.maximum(v_owner, v_neighbour) + _ROOT_VSMALL)
+    cell_ratio = np.ones(mesh.num_cell)
+    np.minimum.at(cell_ratio, mesh.owner_array[:mesh.num_inner_face], face_ratio)
+    np.minimum.at(cell_ratio, mesh.neighbour_array, face_ratio)
+    return face_ratio, cell_ratio
+
+
+def worst(values: np.ndarray, n: int = 10, largest: bool = True) -> np.ndarray:
+    """Indices of the n worst values (largest first, or smallest first if largest is False)"""
+    values = np.asarray(values)
+    keys = -values if largest else values
+    n = min(n, len(values))
+    if n <= 0:
+        return np.empty(0, dtype=np.int64)
+    index = np.argpartition(keys, n - 1)[:n]
+    return index[np.argsort(keys[index], kind='stable')]
+
+
+def histogram(values: np.ndarray, bins: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+    """Histogram of the finite values: counts and bin edges (see numpy.histogram)"""
+    values = np.asarray(values)
+    return np.histogram(values[np.isfinite(values)], bins=bins)
+
+
+def check_mesh(mesh: FoamMesh, n_worst: int = 10, bins: int = 10) -> Dict[str, dict]:
+    """All the quality metrics of a mesh, with their statistics
+
+    Returns
+    -------
+    dict by metric name ('non_orthogonality', 'skewness', 'aspect_ratio', 'volume_ratio') of dicts with
+    'values' (numpy array, per face or per cell), 'max', 'mean', 'worst' (indices of the n_worst worst values),
+    'histogram' (counts, bin edges) and 'num_failed' (number of values over the checkMesh threshold, if any)
+
+    """
+    mesh.ensure_geometry()
+    face_volume_ratio, cell_volume_ratio = volume_ratio(mesh)
+    metrics = {'non_orthogonality': (non_orthogonality(mesh), True, NON_ORTHOGONALITY_THRESHOLD),
+               'skewness': (skewness(mesh), True, SKEWNESS_THRESHOLD),
+               'aspect_ratio': (aspect_ratio(mesh), True, ASPECT_RATIO_THRESHOLD),
+               'volume_ratio': (cell_volume_ratio, False, None)}
+    report = {}
+    for name, (values, largest, threshold) in metrics.items():
+        report[name] = {'values': values,
+                        'max': float(values.max()) if len(values) else np.nan,
+                        'mean': float(values.mean()) if len(values) else np.nan,
+                        'worst': worst(values, n_worst, largest),
+                        'histogram': histogram(values, bins),
+                        'num_failed': int((values > threshold).sum()) if threshold is not None else 0}
+        if report[name]['num_failed']:
+            logger.warning(f"{report[name]['num_failed']} {name} value(s) over {threshold}")
+    return report
@@ -0,0 +1,234 @@
+# coding: utf-8
+
+r"""Integration of boundary fields over patches
+
+Sums, area weighted averages and integrals of the boundary values of a field over named patches,
+and pressure / viscous forces and moments from the p and wallShearStress fields,
+to cross-check the forces function object without running OpenFOAM.
+
+The patch faces are the contiguous slice [start, start + num) of the mesh faces (see FoamMesh.boundary),
+the face area vectors come from FoamMesh.calc_geometry (see FoamMesh.ensure_geometry).
+
+"""
+
+from os.path import join
+from typing import Dict, List, Tuple, Union
+import logging
+
+import numpy as np
+
+from aa_foam.diffing import parse_field
+from aa_foam.mesh_parser import FoamMesh
+from aa_foam.utils import time_directories, is_foam_file, map_time_series, pool_worker_data
+
+logger = logging.getLogger(__name__)
+
+FORCES_SERIES_COLUMNS = ('time',
+                         'fp_x', 'fp_y', 'fp_z', 'fv_x', 'fv_y', 'fv_z',
+                         'mp_x', 'mp_y', 'mp_z', 'mv_x', 'mv_y', 'mv_z')
+
+
+def patch_slice(mesh: FoamMesh, patch: bytes) -> slice:
+    """Slice of the faces of a patch (patch name as bytes, as in mesh.boundary)"""
+    b = mesh.boundary[patch]
+    return slice(b.start, b.start + b.num)
+
+
+def face_values(internal: Union[float, np.ndarray],
+                boundary: Dict[bytes, Dict[bytes, Union[np.ndarray, float]]],
+                patch: bytes,
+                owner: np.ndarray) -> np.ndarray:
+    """Values of a field on the faces of a patch, from the owner cells of the patch faces
+    (see patch_face_values, the mesh being not needed, e.g. in worker processes)
+
+    The nonuniform values are the 2-d arrays (one row per face or cell, see parse_field), the floats and
+    the 1-d arrays (a single vector / tensor) are uniform.
+
+    """
+    values = boundary.get(patch, {}).get(b'value')
+    if values is None:
+        # no value entry (e.g. zeroGradient) : values of the cells next to the patch
+        values = np.asarray(internal, dtype=float)
+        if values.ndim > 1:
+            values = values[owner]
+    values = np.asarray(values, dtype=float)
+    if values.ndim < 2:
+        return np.broadcast_to(values, (len(owner),) + values.shape)
+    # scalar rows as 1-d arrays
+    return values[:, 0] if values.shape[1] == 1 else values
+
+
+def patch_face_values(mesh: FoamMesh,
+                      internal: Union[float, np.ndarray],
+                      boundary: Dict[bytes, Dict[bytes, Union[np.ndarray, float]]],
+                      patch: bytes) -> np.ndarray:
+    """Values of a field on the faces of a patch
+
+    Parameters
+    ----------
+    mesh: FoamMesh object
+    internal: internal field (see parse_field)
+    boundary: boundary field (see parse_field)
+    patch: patch name
+
+    Returns
+    -------
+    numpy array, one row per patch face : the patch 'value' entry (broadcast if uniform)
+    or, if the patch has none (e.g. zeroGradient), the values of the cells next to the patch
+
+    """
+    return face_values(internal, boundary, patch, mesh.owner_array[patch_slice(mesh, patch)])
+
+
+def patch_sum(mesh: FoamMesh, values: np.ndarray, patch: bytes) -> Union[float, np.ndarray]:
+    """Sum of face values over a patch, values being given for the patch faces or for all the faces"""
+    values = np.asarray(values, dtype=float)
+    if len(values) == mesh.num_face:
+        values = values[patch_slice(mesh, patch)]
+    return values.sum(axis=0)
+
+
+def patch_integral(mesh: FoamMesh, values: np.ndarray, patch: bytes) -> Union[float, np.ndarray]:
+    """Integral of face values over a patch: sum of the values times the face areas"""
+    mesh.ensure_geometry()
+    s = patch_slice(mesh, patch)
+    values = np.asarray(values, dtype=float)
+    if len(values) == mesh.num_face:
+        values = values[s]
+    mag_sf = np.sqrt(np.einsum('ij,ij->i', mesh.face_area_vectors[s], mesh.face_area_vectors[s]))
+    return np.tensordot(mag_sf, values, axes=(0, 0))
+
+
+def patch_area(mesh: FoamMesh, patch: bytes) -> float:
+    """Area of a patch"""
+    return float(patch_integral(mesh, np.ones(mesh.boundary[patch].num), patch))
+
+
+def patch_area_average(mesh: FoamMesh, values: np.ndarray, patch: bytes) -> Union[float, np.ndarray]:
+    """Area weighted average of face values over a patch"""
+    return patch_integral(mesh, values, patch) / patch_area(mesh, patch)
+
+
+def _forces(sf: np.ndarray,
+            r: np.ndarray,
+            p: np.ndarray = None,
+            wall_shear_stress: np.ndarray = None,
+            rho: float = 1.,
+            p_ref: float = 0.) -> np.ndarray:
+    """Pressure and viscous forces and moments on faces (area vectors sf, arms r)
+
+    Returns
+    -------
+    numpy array (4, 3) : pressure force, viscous force, pressure moment, viscous moment
+
+    """
+    out = np.zeros((4, 3))
+    if p is not None:
+        fp = rho * (p - p_ref)[:, None] * sf
+        out[0] = fp.sum(axis=0)
+        out[2] = np.cross(r, fp).sum(axis=0)
+    if wall_shear_stress is not None:
+        # wallShearStress is -n.R, the force on the wall is Sf.R
+        fv = -rho * np.sqrt(np.einsum('ij,ij->i', sf, sf))[:, None] * wall_shear_stress
+        out[1] = fv.sum(axis=0)
+        out[3] = np.cross(r, fv).sum(axis=0)
+    return out
+
+
+def patch_forces(mesh: FoamMesh,
+                 patches: List[bytes],
+                 p: Tuple[np.ndarray, dict] = None,
+                 wall_shear_stress: Tuple[np.ndarray, dict] = None,
+                 rho: float = 1.,
+                 p_ref: float = 0.,
+                 centre_of_rotation: Union[list, np.ndarray] = (0., 0., 0.)) -> Dict[str, np.ndarray]:
+    """Pressure and viscous forces and moments on patches, as the forces function object computes them
+
+    Parameters
+    ----------
+    mesh: FoamMesh object
+    patches: patch names
+    p: pressure (internal field, boundary field, see parse_field),
+       kinematic for incompressible cases (then rho is rhoInf)
+    wall_shear_stress: wallShearStress (internal field, boundary field)
+    rho: density
+    p_ref: reference pressure
+    centre_of_rotation: point about which the moments are computed
+
+    Returns
+    -------
+    dict with 'pressure_force', 'viscous_force', 'pressure_moment', 'viscous_moment' (numpy arrays (3,))
+
+    """
+    mesh.ensure_geometry()
+    total = np.zeros((4, 3))
+    for patch in patches:
+        s = patch_slice(mesh, patch)
+        total += _forces(mesh.face_area_vectors[s],
+                         mesh.face_centres[s] - np.asarray(centre_of_rotation, dtype=float),
+                         None if p is None else patch_face_values(mesh, *p, patch),
+                         None if wall_shear_stress is None else patch_face_values(mesh, *wall_shear_stress, patch),
+                         rho, p_ref)
+    return dict(zip(('pressure_force', 'viscous_force', 'pressure_moment', 'viscous_moment'), total))
+
+
+# ******************** *
+# Time series pipeline *
+# ******************** *
+
+def _forces_time_values(fn_p: str, fn_wss: str = None) -> Tuple[float, ...]:
+    """Forces and moments on the patches from the p (and wallShearStress) files of a time directory
+    (patch data of patch_forces_time_series)"""
+    d = pool_worker_data
+    fields = {}
+    for fn in (fn_p, fn_wss):
+        if fn is not None:
+            # each file is parsed once for all the patches
+            fields[fn] = parse_field(fn)
+    total = np.zeros((4, 3))
+    for patch, (sf, r, owner) in d['patches'].items():
+        values = [None if fn is None else face_values(*fields[fn], patch, owner)
+                  for fn in (fn_p, fn_wss)]
+        total += _forces(sf, r, values[0], values[1], d['rho'], d['p_ref'])
+    return tuple(total.ravel().tolist())
+
+
+def patch_forces_time_series(case_path: str,
+                             patches: List[bytes],
+                             p_field: str = 'p',
+                             wall_shear_stress_field: str = 'wallShearStress',
+                             rho: float = 1.,
+                             p_ref: float = 0.,
+                             centre_of_rotation: Union[list, np.ndarray] = (0., 0., 0.),
+                             workers: int = None) -> np.ndarray:
+    """Pressure and viscous forces and moments on patches for all the time directories of a case
+
+    The mesh is loaded once and the fields of the time directories are processed by a pool of processes
+    (see vof_utils.vof_time_series). The viscous forces are zero for the times without a wallShearStress file.
+
+    Returns
+    -------
+    numpy array, one row per time, columns as in FORCES_SERIES_COLUMNS
+
+    """
+    times = [t for t in time_directories(case_path) if is_foam_file(join(case_path, t, p_field))]
+    if not times:
+        return np.empty((0, len(FORCES_SERIES_COLUMNS)))
+
+    mesh = FoamMesh(case_path)
+    mesh.calc_geometry()
+    centre = np.asarray(centre_of_rotation, dtype=float)
+    patch_data = {}
+    for patch in patches:
+        s = patch_slice(mesh, patch)
+        # face area vectors, arms and owner cells
+        patch_data[patch] = (mesh.face_area_vectors[s], mesh.face_centres[s] - centre, mesh.owner_array[s])
+    data = dict(patches=patch_data, rho=rho, p_ref=p_ref)
+    del mesh
+
+    jobs = []
+    for t in times:
+        fn_wss = join(case_path, t, wall_shear_stress_field)
+        jobs.append((t, (join(case_path, t, p_field), fn_wss if is_foam_file(fn_wss) else None)))
+    rows = [(float(t),) + values for t, values in map_time_series(_forces_time_values, jobs, data, workers)]
+    return np.array(rows).reshape(-1, len(FORCES_SERIES_COLUMNS))
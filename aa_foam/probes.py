@@ -0,0 +1,125 @@
+# coding: utf-8
+
+r"""Spatial queries on the cell centres of a FoamMesh and field probes
+
+The queries use the KD-tree over the cell centres of the mesh (FoamMesh.cell_tree),
+built on first use, and are batched: the points are given as a (num_point, 3) array.
+
+"""
+
+from typing import List, Tuple, Union
+import logging
+
+import numpy as np
+
+from aa_foam.diffing import field_rows
+from aa_foam.mesh_parser import FoamMesh
+
+logger = logging.getLogger(__name__)
+
+
+def _as_points(points: Union[list, np.ndarray]) -> np.ndarray:
+    """Points as a (num_point, 3) float array"""
+    return np.asarray(points, dtype=float).reshape(-1, 3)
+
+
+def nearest_cells(mesh: FoamMesh,
+                  points: Union[list, np.ndarray],
+                  max_distance: float = np.inf) -> Tuple[np.ndarray, np.ndarray]:
+    """Nearest cell (by cell centre) of each point
+
+    Parameters
+    ----------
+    mesh: FoamMesh object
+    points: points coordinates, (num_point, 3)
+    max_distance: points farther than this from any cell centre get the cell index -1
+
+    Returns
+    -------
+    cell indices and distances to the cell centres (inf where the cell index is -1)
+
+    """
+    distances, cells = mesh.cell_tree.query(_as_points(points), distance_upper_bound=max_distance)
+    cells = np.asarray(cells, dtype=np.int64)
+    cells[cells == mesh.cell_tree.n] = -1
+    return cells, distances
+
+
+def cells_within_radius(mesh: FoamMesh,
+                        points: Union[list, np.ndarray],
+                        radius: float) -> List[np.ndarray]:
+    """Cells whose centre is within radius of each point
+
+    Returns
+    -------
+    list of cell indices arrays (sorted), one per point
+
+    """
+    found = mesh.cell_tree.query_ball_point(_as_points(points), radius, return_sorted=True)
+    return [np.array(cells, dtype=np.int64) for cells in found]
+
+
+def cells_in_box(mesh: FoamMesh,
+                 box_min: Union[list, np.ndarray],
+                 box_max: Union[list, np.ndarray]) -> np.ndarray:
+    """Cells whose centre is in the axis aligned box [box_min, box_max]
+
+    Returns
+    -------
+    cell indices array (sorted)
+
+    """
+    box_min = np.asarray(box_min, dtype=float)
+    box_max = np.asarray(box_max, dtype=float)
+    centre = 0.5 * (box_min + box_max)
+    half_size = 0.5 * (box_max - box_min)
+    # Cube (infinity norm ball) around the box centre, then restricted to the box
+    cells = np.array(mesh.cell_tree.query_ball_point(centre, half_size.max(), p=np.inf, return_sorted=True),
+                     dtype=np.int64)
+    inside = np.all(np.abs(mesh.cell_centres[cells] - centre) <= half_size, axis=1)
+    return cells[inside]
+
+
+def probe(mesh: FoamMesh,
+          field: np.ndarray,
+          points: Union[list, np.ndarray],
+          max_distance: float = np.inf) -> np.ndarray:
+    """Sample a cell field at points (value of the nearest cell)
+
+    Parameters
+    ----------
+    mesh: FoamMesh object
+    field: cell values, e.g. from parse_internal_field (a uniform field is broadcast, see diffing.is_uniform)
+    points: probe points coordinates, (num_point, 3)
+    max_distance: points farther than this from any cell centre get nan
+
+    Returns
+    -------
+    values at the points, one row per point
+
+    """
+    cells, _ = nearest_cells(mesh, points, max_distance)
+    field = field_rows(field, mesh.num_cell)
+    values = field[cells]
+    missing = cells < 0
+    if missing.any():
+        logger.warning(f"{int(missing.sum())} probe point(s) farther than {max_distance} from the mesh")
+        values[missing] = np.nan
+    return values
+
+
+def sample_line(mesh: FoamMesh,
+                field: np.ndarray,
+                start: Union[list, np.ndarray],
+                end: Union[list, np.ndarray],
+                num: int = 100,
+                max_distance: float = np.inf) -> Tuple[np.ndarray, np.ndarray]:
+    """Sample a cell field at num points evenly spaced from start to end
+
+    Returns
+    -------
+    points coordinates (num, 3) and values at the points (see probe)
+
+    """
+    points = np.linspace(np.asarray(start, dtype=float), np.asarray(end, dtype=float), num)
+    return points, probe(mesh, field, points, max_distance)
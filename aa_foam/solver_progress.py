@@ -0,0 +1,127 @@
+# coding: utf-8
+
+r"""Solver progress (simulated time and iteration) from a solver log or a postProcessing .dat file.
+
+The files are tailed: each poll only reads the bytes appended since the previous poll.
+
+"""
+
+import os
+from glob import glob
+from os.path import join
+from typing import Tuple, List, Union
+import logging
+
+from aa_foam.utils import is_foam_file, open_foam_file
+
+logger = logging.getLogger(__name__)
+
+
+class FileTail(object):
+    r"""Incremental reader of the complete lines appended to a growing file
+
+    Parameters
+    ----------
+    fn : file name
+
+    """
+    def __init__(self, fn: str):
+        self.fn = fn
+        self._offset = 0
+        self._remainder = b''
+
+    def new_lines(self) -> List[bytes]:
+        r"""Complete lines appended since the previous call"""
+        try:
+            with open(self.fn, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < self._offset:
+                    # The file was truncated / rewritten (solver restart)
+                    logger.warning(f"{self.fn} was truncated, reading it from the start")
+                    self._offset = 0
+                    self._remainder = b''
+                    self.reset()
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        self._offset += len(data)
+        lines = (self._remainder + data).split(b'\n')
+        # The last element is an incomplete line (or b'' if data ends with a newline)
+        self._remainder = lines.pop()
+        return lines
+
+    def reset(self) -> None:
+        r"""Reset the parsed state, called when the file has been truncated"""
+        pass
+
+
+class SolverProgress(FileTail):
+    r"""Latest simulated time and iteration of a tailed file, each parsed line being one iteration"""
+    def __init__(self, fn: str):
+        super().__init__(fn)
+        self.time = float('nan')
+        self.iteration = -1
+
+    def reset(self) -> None:
+        self.time = float('nan')
+        self.iteration = -1
+
+    def parse_line(self, line: bytes) -> Union[float, None]:
+        r"""Simulated time of a line, None if the line does not start an iteration"""
+        raise NotImplementedError
+
+    def poll(self) -> Tuple[float, int]:
+        r"""Latest simulated time and iteration, (nan, -1) before the first iteration"""
+        for line in self.new_lines():
+            t = self.parse_line(line)
+            if t is not None:
+                self.time = t
+                self.iteration += 1
+        return self.time, self.iteration
+
+
+class SolverLogProgress(SolverProgress):
+    r"""Simulated time and iteration (number of time steps) from a solver log (Time = ... lines)"""
+    def parse_line(self, line: bytes) -> Union[float, None]:
+        if not line.startswith(b'Time = '):
+            return None
+        try:
+            return float(line[7:].split()[0])
+        except (ValueError, IndexError):
+            return None
+
+
+class DatFileProgress(SolverProgress):
+    r"""Simulated time and iteration (number of data lines) from a postProcessing .dat file"""
+    def parse_line(self, line: bytes) -> Union[float, None]:
+        if line.startswith(b'#') or not line.strip():
+            return None
+        try:
+            return float(line.split()[0])
+        except ValueError:
+            return None
+
+
+def latest_dat_file(case_path: str = '.') -> Union[str, None]:
+    r"""Most recently modified .dat file in the postProcessing folder of a case, None if there is none"""
+    dat_files = glob(join(case_path, 'postProcessing', '**', '*.dat'), recursive=True)
+    if not dat_files:
+        return None
+    return max(dat_files, key=os.path.getmtime)
+
+
+def number_of_cells(case_path: str = '.') -> int:
+    r"""Number of cells of a case, from the note in the header of constant/polyMesh/owner
+
+    OpenFOAM writes 'note "nPoints:... nCells:... nFaces:... nInternalFaces:..."' in the owner file header.
+
+    """
+    fn = join(case_path, 'constant', 'polyMesh', 'owner')
+    if not is_foam_file(fn):
+        raise FileNotFoundError(f"Could not find {fn}")
+    with open_foam_file(fn) as f:
+        for _ in range(20):
+            line = f.readline()
+            if b'nCells:' in line:
+                return int(line.split(b'nCells:')[1].split()[0].strip(b'";'))
+    raise ValueError(f"Could not find the number of cells in the header of {fn}")
@@ -0,0 +1,263 @@
+# coding: utf-8
+
+r"""Sub-meshes: regions of interest of a FoamMesh
+
+Cell selections (box, sphere, predicate on the cell centres, cellZones, cellSets)
+and a compact renumbered view of the selected cells (SubMesh) with the same attributes as FoamMesh
+(points, faces, owner / neighbour, boundary, geometry), so that the finite volume operators
+and the mesh quality metrics can run on it.
+
+The sub-mesh only stores index arrays into its parent mesh, the geometry is taken from the parent when asked for.
+The faces between a selected cell and a cell that is not selected are exposed in the 'oldInternalFaces' patch
+(as subsetMesh does), oriented out of the selected cell.
+
+"""
+
+import os
+import re
+from typing import Callable, Dict, Union
+
+import numpy as np
+
+from aa_foam.diffing import is_uniform, parse_internal_field_cells
+from aa_foam.mesh_parser import FoamMesh, Boundary, label_dtype
+from aa_foam.probes import cells_in_box, cells_within_radius
+from aa_foam.utils import is_binary_format, is_foam_file, open_foam_file
+
+EXPOSED_PATCH = b'oldInternalFaces'
+
+
+# ************** *
+# Cell selection *
+# ************** *
+
+
+def select_box(mesh: FoamMesh,
+               box_min: Union[list, np.ndarray],
+               box_max: Union[list, np.ndarray]) -> np.ndarray:
+    """Cells whose centre is in the axis aligned box [box_min, box_max]"""
+    return cells_in_box(mesh, box_min, box_max)
+
+
+def select_sphere(mesh: FoamMesh, centre: Union[list, np.ndarray], radius: float) -> np.ndarray:
+    """Cells whose centre is in the sphere"""
+    return cells_within_radius(mesh, [centre], radius)[0]
+
+
+def select_where(mesh: FoamMesh, predicate: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+    """Cells for which predicate(cell_centres) is True (predicate : (num_cell, 3) array -> boolean array)"""
+    if mesh.cell_centres is None:
+        mesh.calc_geometry()
+    return np.flatnonzero(predicate(mesh.cell_centres))
+
+
+def _read_label_list(data: bytes, pos: int, num: int, is_binary: bool, label_size: int) -> np.ndarray:
+    """Read num labels from data, pos being just after the opening parenthesis of the list"""
+    if is_binary:
+        return np.frombuffer(data, dtype='<i{}'.format(label_size), count=num, offset=pos).astype(np.int64)
+    end = data.index(b')', pos)
+    return np.array(data[pos:end].split(), dtype=np.int64)
+
+
+def _header_end(data: bytes) -> int:
+    """Position of the end of the FoamFile header dictionary"""
+    start = data.find(b'FoamFile')
+    return data.index(b'}', start) + 1 if start >= 0 else 0
+
+
+def _label_size(data: bytes) -> int:
+    """Size in bytes of the binary labels (arch entry of the header)"""
+    return 8 if b'label=64' in data[:_header_end(data)] else 4
+
+
+def read_cell_zones(case_path: str) -> Dict[bytes, np.ndarray]:
+    """Read the cellZones of a case (constant/polyMesh/cellZones)
+
+    Returns
+    -------
+    dict of cell indices arrays by zone name (bytes), empty if the case has no cellZones file
+
+    """
+    fn = os.path.join(case_path, 'constant/polyMesh/cellZones')
+    if not is_foam_file(fn):
+        return {}
+    with open_foam_file(fn) as f:
+        data = f.read()
+    is_binary = is_binary_format(data.splitlines(True))
+    label_size = _label_size(data)
+    zones = {}
+    pattern = re.compile(rb'([^\s{};()]+)\s*\{[^{}]*?cellLabels\s+List<label>\s*(\d+)\s*\(')
+    pos = _header_end(data)
+    while True:
+        m = pattern.search(data, pos)
+        if m is None:
+            break
+        num = int(m.group(2))
+        zones[m.group(1)] = _read_label_list(data, m.end(), num, is_binary, label_size)
+        pos = m.end() + (num * label_size if is_binary else 0)
+    return zones
+
+
+def read_cell_set(case_path: str, name: str) -> np.ndarray:
+    """Read a cellSet of a case (constant/polyMesh/sets/<name>)
+
+    Returns
+    -------
+    cell indices array (sorted)
+
+    """
+    with open_foam_file(os.path.join(case_path, 'constant/polyMesh/sets', name)) as f:
+        data = f.read()
+    is_binary = is_binary_format(data.splitlines(True))
+    m = re.compile(rb'(\d+)\s*\(').search(data, _header_end(data))
+    if m is None:
+        return np.empty(0, dtype=np.int64)
+    return np.sort(_read_label_list(data, m.end(), int(m.group(1)), is_binary, _label_size(data)))
+
+
+# ******** *
+# Sub mesh *
+# ******** *
+
+
+class SubMesh(object):
+    """Compact renumbered view of a set of cells of a FoamMesh
+
+    Attributes
+    ----------
+    parent: parent FoamMesh
+    cells: parent cell index of each cell
+    faces: parent face index of each face (inner faces first, then the boundary faces by patch)
+    face_flip: True for the exposed faces oriented the other way round than in the parent mesh
+    point_ids: parent point index of each point
+    owner_array, neighbour_array, face_offsets, face_points, boundary: as in FoamMesh, renumbered
+
+    """
+    def __init__(self, parent: FoamMesh, cells: Union[list, np.ndarray]):
+        self.parent = parent
+        self.cells = np.unique(np.asarray(cells, dtype=np.int64))
+        self.num_cell = len(self.cells)
+        cell_map = np.full(parent.num_cell, -1, dtype=label_dtype(parent.num_cell))
+        cell_map[self.cells] = np.arange(self.num_cell)
+
+        n_inner = parent.num_inner_face
+        owner = cell_map[parent.owner_array]
+        neighbour = cell_map[parent.neighbour_array]
+        owner_in = owner >= 0
+        neighbour_in = neighbour >= 0
+        inner = np.flatnonzero(owner_in[:n_inner] & neighbour_in)
+        exposed_owner = np.flatnonzero(owner_in[:n_inner] & ~neighbour_in)
+        exposed_neighbour = np.flatnonzero(~owner_in[:n_inner] & neighbour_in)
+
+        face_list = [inner]
+        self.boundary = {}
+        start = len(inner)
+        bid = 0
+        for name, b in sorted(parent.boundary.items(), key=lambda item: item[1].start):
+            patch_faces = b.start + np.flatnonzero(owner_in[b.start:b.start + b.num])
+            face_list.append(patch_faces)
+            self.boundary[name] = Boundary(b.type, len(patch_faces), start, -10 - bid)
+            start += len(patch_faces)
+            bid += 1
+        exposed = np.concatenate([exposed_owner, exposed_neighbour])
+        exposed_flip = np.concatenate([np.zeros(len(exposed_owner), dtype=bool),
+                                       np.ones(len(exposed_neighbour), dtype=bool)])
+        order = np.argsort(exposed, kind='stable')
+        exposed, exposed_flip = exposed[order], exposed_flip[order]
+        face_list.append(exposed)
+        self.boundary[EXPOSED_PATCH] = Boundary(b'internal', len(exposed), start, -10 - bid)
+
+        self.faces = np.concatenate(face_list)
+        self.num_face = len(self.faces)
+        self.num_inner_face = len(inner)
+        self.face_flip = np.zeros(self.num_face, dtype=bool)
+        self.face_flip[self.num_face - len(exposed):] = exposed_flip
+
+        dtype = label_dtype(self.num_cell)
+        self.owner_array = owner[self.faces].astype(dtype)
+        flipped = np.flatnonzero(self.face_flip)
+        self.owner_array[flipped] = neighbour[self.faces[flipped]]
+        self.neighbour_array = neighbour[inner].astype(dtype)
+
+        self._build_faces()
+
+        self._cell_centres = None
+        self._cell_volumes = None
+        self._face_centres = None
+        self._face_area_vectors = None
+
+    def _build_faces(self) -> None:
+        """Compact (offsets, points) faces, renumbered, the flipped faces being reversed"""
+        parent_offsets = self.parent.face_offsets
+        sizes = parent_offsets[self.faces + 1] - parent_offsets[self.faces]
+        self.face_offsets = np.zeros(self.num_face + 1, dtype=np.int64)
+        np.cumsum(sizes, out=self.face_offsets[1:])
+        # Position of each face point in its face, reversed (keeping the first point) for the flipped faces
+        local = np.arange(self.face_offsets[-1]) - np.repeat(self.face_offsets[:-1], sizes)
+        flip = np.repeat(self.face_flip, sizes)
+        local[flip & (local > 0)] = np.repeat(sizes, sizes)[flip & (local > 0)] - local[flip & (local > 0)]
+        parent_points = self.parent.face_points[np.repeat(parent_offsets[self.faces], sizes) + local]
+        self.point_ids, face_points = np.unique(parent_points, return_inverse=True)
+        self.num_point = len(self.point_ids)
+        self.face_points = face_points.astype(label_dtype(self.num_point))
+
+    @property
+    def points(self) -> np.ndarray:
+        """Points coordinates"""
+        return np.asarray(self.parent.points)[self.point_ids]
+
+    def calc_geometry(self) -> None:
+        """Take the geometry from the parent mesh (calculated if needed)"""
+        self.parent.ensure_geometry()
+        self._cell_centres = self.parent.cell_centres[self.cells]
+        self._cell_volumes = self.parent.cell_volumes[self.cells]
+        self._face_centres = self.parent.face_centres[self.faces]
+        self._face_area_vectors = self.parent.face_area_vectors[self.faces]
+        self._face_area_vectors[self.face_flip] *= -1.
+
+    def ensure_geometry(self) -> None:
+        """Take the geometry from the parent mesh if not done yet (see FoamMesh.ensure_geometry)"""
+        if self._face_area_vectors is None:
+            self.calc_geometry()
+
+    @property
+    def cell_centres(self) -> np.ndarray:
+        """Cell centres (from the parent mesh geometry)"""
+        if self._cell_centres is None:
+            self.calc_geometry()
+        return self._cell_centres
+
+    @property
+    def cell_volumes(self) -> np.ndarray:
+        """Cell volumes (from the parent mesh geometry)"""
+        if self._cell_volumes is None:
+            self.calc_geometry()
+        return self._cell_volumes
+
+    @property
+    def face_centres(self) -> np.ndarray:
+        """Face centres (from the parent mesh geometry)"""
+        if self._face_centres is None:
+            self.calc_geometry()
+        return self._face_centres
+
+    @property
+    def face_area_vectors(self) -> np.ndarray:
+        """Face area vectors, oriented out of the owner cell (from the parent mesh geometry)"""
+        if self._face_area_vectors is None:
+            self.calc_geometry()
+        return self._face_area_vectors
+
+    def restrict(self, field: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """Values of a parent cell field on the sub-mesh cells (a uniform field is returned as is)"""
+        if is_uniform(field, self.parent.num_cell):
+            return field
+        return np.asarray(field)[self.cells]
+
+    def read_internal_field(self, fn: str) -> Union[float, np.ndarray]:
+        """Parse the internal field of a parent mesh field file, on the sub-mesh cells only"""
+        return parse_internal_field_cells(fn, self.cells)
+
+    def restrict_faces(self, face_values: np.ndarray) -> np.ndarray:
+        """Values of a parent face field on the sub-mesh faces (oriented values are not flipped)"""
+        return np.asarray(face_values)[self.faces]
@@ -0,0 +1,270 @@
+# coding: utf-8
+
+r"""Synthetic OpenFOAM cases, for benchmarks and tests at production scale
+
+write_box_case writes a structured hex mesh of a box (constant/polyMesh, ASCII or binary), with the faces
+ordered as OpenFOAM orders them (internal faces by owner then neighbour, then the boundary faces patch by patch),
+nonuniform p, U and alpha.water fields in time directories and a postProcessing/forces/0/force.dat file.
+The mesh is generated and written by slabs of cells, so that 1e7 cells cases can be written with little memory.
+
+Patches : xmin (inlet, patch), xmax (outlet, patch), ymin, ymax, zmin, zmax (walls).
+
+"""
+
+from os import makedirs
+from os.path import join
+from typing import BinaryIO, Iterator, Tuple, Union
+import logging
+
+import numpy as np
+
+from aa_foam.field_writer import BANNER, SEPARATOR, write_field
+
+logger = logging.getLogger(__name__)
+
+PATCHES = (('xmin', 'patch'), ('xmax', 'patch'),
+           ('ymin', 'wall'), ('ymax', 'wall'),
+           ('zmin', 'wall'), ('zmax', 'wall'))
+
+_Shape = Tuple[int, int, int]
+
+
+def box_shape(num_cells: Union[int, float]) -> _Shape:
+    r"""Numbers of cells along x, y, z of a box of about num_cells cubic cells (2:1:1 proportions)"""
+    n = max(1, int(round((float(num_cells) / 2) ** (1 / 3))))
+    return 2 * n, n, n
+
+
+def _header(f: BinaryIO, binary: bool, class_name: str, location: str, object_name: str) -> None:
+    """FoamFile header"""
+    lines = [BANNER, "FoamFile\n{\n",
+             "    version     2.0;\n",
+             f"    format      {'binary' if binary else 'ascii'};\n"]
+    if binary:
+        lines.append('    arch        "LSB;label=32;scalar=64";\n')
+    lines += [f"    class       {class_name};\n",
+              f'    location    "{location}";\n',
+              f"    object      {object_name};\n", "}\n", SEPARATOR, "\n\n"]
+    f.write("".join(lines).encode())
+
+
+def _write_rows(f: BinaryIO, rows: np.ndarray, binary: bool, fmt: str) -> None:
+    """Write rows of labels or scalars, binary or one formatted row per line"""
+    if binary:
+        f.write(np.ascontiguousarray(rows, dtype='<i4' if rows.dtype.kind == 'i' else '<f8').tobytes())
+    elif len(rows):
+        columns = rows.T.tolist() if rows.ndim > 1 else [rows.tolist()]
+        f.write(("\n".join(map(fmt.format, *columns)) + "\n").encode())
+
+
+def _point_ids(shape: _Shape, i: np.ndarray, j: np.ndarray, k: np.ndarray) -> np.ndarray:
+    """Point labels of point (i, j, k) of the structured grid"""
+    nx, ny, _ = shape
+    return i + (nx + 1) * (j + (ny + 1) * k)
+
+
+def _quads(shape: _Shape, i: np.ndarray, j: np.ndarray, k: np.ndarray, direction: int, flip: bool) -> np.ndarray:
+    """Point labels (n, 4) of the faces normal to direction at the lower corner (i, j, k),
+    oriented along +direction (-direction if flip)"""
+    # the two in plane directions, such that e_a x e_b = e_direction
+    a, b = (direction + 1) % 3, (direction + 2) % 3
+    corners = [(0, 0), (1, 0), (1, 1), (0, 1)]
+    if flip:
+        corners = corners[::-1]
+    quads = []
+    for da, db in corners:
+        ijk = [i, j, k]
+        ijk[a] = ijk[a] + da
+        ijk[b] = ijk[b] + db
+        quads.append(_point_ids(shape, *ijk))
+    return np.stack(quads, axis=-1)
+
+
+def _internal_faces(shape: _Shape, chunk_cells: int) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Internal faces (point labels, owner, neighbour) by chunks of owner cells, in the OpenFOAM order"""
+    nx, ny, nz = shape
+    num_cells = nx * ny * nz
+    strides = (1, nx, nx * ny)
+    for start in range(0, num_cells, chunk_cells):
+        cells = np.arange(start, min(start + chunk_cells, num_cells), dtype=np.int64)
+        ijk = (cells % nx, (cells // nx) % ny, cells // (nx * ny))
+        # for each owner the +x, +y, +z faces, neighbours in increasing order
+        faces = np.stack([_quads(shape, ijk[0] + (d == 0), ijk[1] + (d == 1), ijk[2] + (d == 2), d, False)
+                          for d in range(3)], axis=1)
+        neighbours = cells[:, None] + np.array(strides)
+        inside = np.stack([ijk[d] < shape[d] - 1 for d in range(3)], axis=1)
+        yield faces[inside], np.broadcast_to(cells[:, None], inside.shape)[inside], neighbours[inside]
+
+
+def _boundary_faces(shape: _Shape, patch: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Faces (point labels) and owners of a patch of PATCHES, outward oriented"""
+    nx, ny, _ = shape
+    direction, high = divmod(patch, 2)
+    ranges = [np.arange(n) for n in shape]
+    ranges[direction] = np.array([shape[direction] - 1 if high else 0])
+    # the layer of cells next to the patch, in increasing cell order
+    ijk = [x.ravel(order='F') for x in np.meshgrid(*ranges, indexing='ij')]
+    owners = ijk[0] + nx * (ijk[1] + ny * ijk[2])
+    ijk[direction] = ijk[direction] + high
+    return _quads(shape, *ijk, direction, not high), owners
+
+
+def write_box_mesh(case_path: str,
+                   shape: _Shape,
+                   size: Tuple[float, float, float] = (2., 1., 1.),
+                   binary: bool = False,
+                   chunk_cells: int = 2**18) -> None:
+    """Write the constant/polyMesh files of a structured hex mesh of a box
+
+    Parameters
+    ----------
+    case_path: case directory
+    shape: numbers of cells along x, y, z
+    size: box size along x, y, z [m]
+    binary: write the points, faces, owner and neighbour files in binary format
+    chunk_cells: number of cells generated and written at once
+
+    """
+    nx, ny, nz = shape
+    path = join(case_path, 'constant', 'polyMesh')
+    makedirs(path, exist_ok=True)
+    location = 'constant/polyMesh'
+    num_cells = nx * ny * nz
+    num_internal = (nx - 1) * ny * nz + nx * (ny - 1) * nz + nx * ny * (nz - 1)
+    boundary = [_boundary_faces(shape, p) for p in range(len(PATCHES))]
+    num_faces = num_internal + sum(len(owners) for _, owners in boundary)
+
+    # points, x fastest
+    xs, ys, zs = (np.linspace(0., s, n + 1) for s, n in zip(size, shape))
+    with open(join(path, 'points'), 'wb') as f:
+        _header(f, binary, 'vectorField', location, 'points')
+        f.write(f"{(nx + 1) * (ny + 1) * (nz + 1)}\n(".encode() + (b"" if binary else b"\n"))
+        x, y = np.meshgrid(xs, ys, indexing='xy')
+        for z in zs:
+            _write_rows(f, np.column_stack([x.ravel(), y.ravel(), np.full(x.size, z)]), binary, "({!r} {!r} {!r})")
+        f.write(b")\n")
+
+    # faces, owner and neighbour written together, chunk by chunk
+    with open(join(path, 'faces'), 'wb') as f_faces, \
+            open(join(path, 'owner'), 'wb') as f_owner, \
+            open(join(path, 'neighbour'), 'wb') as f_neighbour:
+        _header(f_faces, binary, 'faceCompactList' if binary else 'faceList', location, 'faces')
+        _header(f_owner, binary, 'labelList', location, 'owner')
+        _header(f_neighbour, binary, 'labelList', location, 'neighbour')
+        f_owner.write(f"{num_faces}\n(".encode() + (b"" if binary else b"\n"))
+        f_neighbour.write(f"{num_internal}\n(".encode() + (b"" if binary else b"\n"))
+        if binary:
+            # faceCompactList : the offsets (all quads) then the point labels
+            f_faces.write(f"{num_faces + 1}\n(".encode())
+            _write_rows(f_faces, np.arange(0, 4 * (num_faces + 1), 4, dtype=np.int32), True, "")
+            f_faces.write(f")\n{4 * num_faces}\n(".encode())
+        else:
+            f_faces.write(f"{num_faces}\n(\n".encode())
+
+        def write_faces(quads, owners):
+            _write_rows(f_faces, quads.astype(np.int32), binary, "4({} {} {} {})")
+            _write_rows(f_owner, owners.astype(np.int32), binary, "{}")
+
+        for quads, owners, neighbours in _internal_faces(shape, chunk_cells):
+            write_faces(quads, owners)
+            _write_rows(f_neighbour, neighbours.astype(np.int32), binary, "{}")
+        for quads, owners in boundary:
+            write_faces(quads, owners)
+        for f in (f_faces, f_owner, f_neighbour):
+            f.write(b")\n")
+
+    with open(join(path, 'boundary'), 'wb') as f:
+        _header(f, False, 'polyBoundaryMesh', location, 'boundary')
+        lines = [f"{len(PATCHES)}\n(\n"]
+        start = num_internal
+        for (name, patch_type), (_, owners) in zip(PATCHES, boundary):
+            lines.append(f"    {name}\n    {{\n"
+                         f"        type            {patch_type};\n"
+                         f"        nFaces          {len(owners)};\n"
+                         f"        startFace       {start};\n    }}\n")
+            start += len(owners)
+        lines.append(")\n")
+        f.write("".join(lines).encode())
+    logger.info(f"Wrote a {nx} x {ny} x {nz} mesh ({num_cells} cells, {num_faces} faces) to {path}")
+
+
+def cell_centres(shape: _Shape, size: Tuple[float, float, float] = (2., 1., 1.)) -> np.ndarray:
+    """Cell centres of the box mesh of write_box_mesh, in the cell order"""
+    axes = [(np.arange(n) + 0.5) * s / n for n, s in zip(shape, size)]
+    x, y, z = np.meshgrid(*axes, indexing='ij')
+    return np.column_stack([x.ravel(order='F'), y.ravel(order='F'), z.ravel(order='F')])
+
+
+def write_box_fields(case_path: str,
+                     shape: _Shape,
+                     size: Tuple[float, float, float] = (2., 1., 1.),
+                     times: Tuple[str, ...] = ('1', '2'),
+                     binary: bool = False) -> None:
+    """Write nonuniform p, U and alpha.water fields (smooth, time dependent) in time directories
+
+    The free surface of alpha.water is a wave of the height of the box, so that the VOF interface crosses cells.
+
+    """
+    cc = cell_centres(shape, size)
+    zero_gradient = {name: {'type': 'zeroGradient'} for name, _ in PATCHES}
+    u_boundary = {name: {'type': 'noSlip' if patch_type == 'wall' else 'zeroGradient'} for name, patch_type in PATCHES}
+    u_boundary['xmin'] = {'type': 'fixedValue', 'value': [1., 0., 0.]}
+    for t in times:
+        tf = float(t)
+        path = join(case_path, t)
+        makedirs(path, exist_ok=True)
+        p = np.sin(np.pi * cc[:, 0] / size[0] + tf) * np.cos(np.pi * cc[:, 1] / size[1]) + cc[:, 2]
+        write_field(join(path, 'p'), p, zero_gradient, dimensions="[0 2 -2 0 0 0 0]", location=t, binary=binary)
+        u = np.column_stack([1. + 0.1 * np.sin(tf + cc[:, 2]), 0.1 * np.cos(cc[:, 0]), 0.01 * cc[:, 1]])
+        write_field(join(path, 'U'), u, u_boundary, dimensions="[0 1 -1 0 0 0 0]", location=t, binary=binary)
+        level = 0.5 * size[2] + 0.1 * size[2] * np.sin(2 * np.pi * cc[:, 0] / size[0] + tf)
+        dz = size[2] / shape[2]
+        alpha = np.clip(0.5 - (cc[:, 2] - level) / dz, 0., 1.)
+        write_field(join(path, 'alpha.water'), alpha, zero_gradient, location=t, binary=binary)
+
+
+def write_forces_file(case_path: str, num_lines: int = 1000) -> str:
+    """Write a postProcessing/forces/0/force.dat file (new format) of num_lines time steps, returns its name"""
+    path = join(case_path, 'postProcessing', 'forces', '0')
+    makedirs(path, exist_ok=True)
+    t = np.arange(1, num_lines + 1, dtype=float)
+    pressure = np.column_stack([1. / t, 0.01 * np.sin(t / 10), np.zeros_like(t)])
+    viscous = np.column_stack([0.5 / np.sqrt(t), 0.001 * np.cos(t / 10), np.zeros_like(t)])
+    total = pressure + viscous
+    fn = join(path, 'force.dat')
+    with open(fn, 'w') as f:
+        f.write("# Force       \n# CofR        : (0.000000e+00 0.000000e+00 0.000000e+00)\n#\n"
+                "# Time        \t(total_x total_y total_z)\t(pressure_x pressure_y pressure_z)"
+                "\t(viscous_x viscous_y viscous_z)\n")
+        for row in zip(t.tolist(), total.tolist(), pressure.tolist(), viscous.tolist()):
+            f.write(f"{row[0]:<14g}\t" + "\t".join("({:e} {:e} {:e})".format(*v) for v in row[1:]) + "\n")
+    return fn
+
+
+def write_box_case(case_path: str,
+                   num_cells: Union[int, float, _Shape] = 1000,
+                   size: Tuple[float, float, float] = (2., 1., 1.),
+                   times: Tuple[str, ...] = ('1', '2'),
+                   binary: bool = False,
+                   force_lines: int = 1000) -> _Shape:
+    """Write a synthetic case : box mesh, fields in the time directories and forces file
+
+    Parameters
+    ----------
+    case_path: case directory
+    num_cells: approximate number of cells (see box_shape) or numbers of cells along x, y, z
+    size: box size along x, y, z [m]
+    times: time directories names
+    binary: write the mesh and the fields in binary format
+    force_lines: number of time steps of the forces file
+
+    Returns
+    -------
+    numbers of cells along x, y, z
+
+    """
+    shape = tuple(int(n) for n in num_cells) if isinstance(num_cells, (tuple, list)) else box_shape(num_cells)
+    write_box_mesh(case_path, shape, size, binary)
+    write_box_fields(case_path, shape, size, times, binary)
+    write_forces_file(case_path, force_lines)
+    return shape
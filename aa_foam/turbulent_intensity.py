@@ -9,22 +9,133 @@ Based on paper:
     Turbulence Intensity Scaling: A Fugue
     https://www.mdpi.com/2311-5521/4/4/180
 
-"""
-
-import numpy as np
-from scipy.optimize import fsolve
-
+Pipe flow friction factor and turbulence intensity, and the k / epsilon / omega inlet values derived from them.
+The functions take scalars or numpy arrays of Reynolds numbers and roughness (broadcast together),
+e.g. a whole table of inlet conditions in one call.
 
-def smooth(x):
-    r"""smooth friction factor (Eq. 19 in paper)"""
-    out = [np.power(x[0], -0.5) - 1.930 * np.log10(Re * np.sqrt(x[0])) + 0.537]
-    return out
+"""
 
+from collections import namedtuple
+from typing import Union
+import logging
 
-def rough(x):
-    r"""rough friction factor (Eq. 20 in paper)"""
-    out = [np.power(x[0], -0.5) + 2 * np.log10(k_s_norm / (2 * 3.7) + 2.51 / (Re * np.sqrt(x[0])))]
-    return out
+import numpy as np
+from scipy.special import lambertw
+
+logger = logging.getLogger(__name__)
+
+InletTurbulence = namedtuple('InletTurbulence', 'friction_factor, intensity, k, epsilon, omega')
+
+_Array = Union[float, np.ndarray]
+
+_LN10 = np.log(10.)
+
+
+def smooth(re: _Array) -> np.ndarray:
+    r"""smooth friction factor (Eq. 19 in paper)
+
+    1 / sqrt(f) = 1.930 log10(Re sqrt(f)) - 0.537 is x + B ln(x) = A for x = 1 / sqrt(f),
+    with B = 1.930 / ln(10) and A = 1.930 log10(Re) - 0.537, solved explicitly with the Lambert W function:
+    x = B W(exp(A / B) / B)
+
+    """
+    re = np.asarray(re, dtype=float)
+    b = 1.930 / _LN10
+    # exp(A / B) = Re exp(-0.537 / B)
+    x = b * lambertw(re * np.exp(-0.537 / b) / b).real
+    return x**-2
+
+
+def rough(re: _Array, k_s_norm: _Array, tol: float = 1e-12, max_iter: int = 50) -> np.ndarray:
+    r"""rough friction factor (Eq. 20 in paper)
+
+    1 / sqrt(f) = -2 log10(k_s_norm / (2 * 3.7) + 2.51 / (Re sqrt(f))), solved by Newton iterations
+    on x = 1 / sqrt(f), for all the (Re, k_s_norm) pairs at once
+
+    Parameters
+    ----------
+    re : Reynolds number [-]
+    k_s_norm : sand-grain roughness normalized by the pipe radius [-]
+    tol : relative tolerance on x
+    max_iter : maximum number of iterations
+
+    """
+    re, k_s_norm = np.broadcast_arrays(np.asarray(re, dtype=float), np.asarray(k_s_norm, dtype=float))
+    a = k_s_norm / (2 * 3.7)
+    b = 2.51 / re
+    # g(x) = x + 2 log10(a + b x) is increasing and concave: the Newton iterates started left of the root
+    # increase monotonically to it. x = 1e-3 is left of the root as long as a + 1e-3 b < 1.
+    x = np.full(re.shape, 1e-3)
+    active = np.ones(re.shape, dtype=bool)
+    for _ in range(max_iter):
+        xa, aa, ba = x[active], a[active], b[active]
+        s = aa + ba * xa
+        dx = (xa + 2 * np.log10(s)) / (1 + 2 * ba / (_LN10 * s))
+        x[active] = xa - dx
+        converged = np.abs(dx) <= tol * np.abs(x[active])
+        active[active] = ~converged
+        if not active.any():
+            break
+    else:
+        logger.warning(f"Rough friction factor not converged for {int(active.sum())} values")
+    return x**-2
+
+
+def friction_factor(re: _Array, k_s_norm: _Array = 0.) -> np.ndarray:
+    r"""Friction factor, smooth (Eq. 19) where k_s_norm is 0 and rough (Eq. 20) elsewhere
+
+    Parameters
+    ----------
+    re : Reynolds number [-]
+    k_s_norm : sand-grain roughness normalized by the pipe radius [-]
+
+    """
+    re, k_s_norm = np.broadcast_arrays(np.asarray(re, dtype=float), np.asarray(k_s_norm, dtype=float))
+    ff = np.array(smooth(re), dtype=float)
+    is_rough = k_s_norm != 0
+    if is_rough.any():
+        ff[is_rough] = rough(re[is_rough], k_s_norm[is_rough])
+    return ff
+
+
+def turbulence_intensity(ff: _Array) -> np.ndarray:
+    r"""turbulence intensity from the friction factor (Eq. 29 in paper)"""
+    return 0.0276 * np.log(ff) + 0.1794
+
+
+def inlet_turbulence(re: _Array,
+                     u: _Array,
+                     diameter: _Array,
+                     k_s: _Array = 0.,
+                     length_scale_ratio: float = 0.07,
+                     c_mu: float = 0.09) -> InletTurbulence:
+    r"""Turbulence quantities at a pipe (or duct, with the hydraulic diameter) inlet
+
+    Parameters
+    ----------
+    re : Reynolds number [-]
+    u : mean velocity [m/s]
+    diameter : pipe diameter [m]
+    k_s : sand-grain roughness [m]
+    length_scale_ratio : turbulent length scale / diameter
+    c_mu : turbulence model constant
+
+    Returns
+    -------
+    InletTurbulence, arrays with the broadcast shape of the inputs:
+    friction_factor [-], intensity [-], k = 1.5 (u I)**2 [m2/s2],
+    epsilon = c_mu**0.75 k**1.5 / l [m2/s3] and omega = sqrt(k) / (c_mu**0.25 l) [1/s],
+    l = length_scale_ratio * diameter
+
+    """
+    re, u, diameter, k_s = np.broadcast_arrays(*[np.asarray(x, dtype=float) for x in (re, u, diameter, k_s)])
+    ff = friction_factor(re, k_s / (diameter / 2))
+    intensity = turbulence_intensity(ff)
+    k = 1.5 * (u * intensity)**2
+    length_scale = length_scale_ratio * diameter
+    epsilon = c_mu**0.75 * k**1.5 / length_scale
+    omega = np.sqrt(k) / (c_mu**0.25 * length_scale)
+    return InletTurbulence(ff, intensity, k, epsilon, omega)
 
 
 if __name__ == "__main__":
@@ -43,16 +154,15 @@ if __name__ == "__main__":
     # calculate friction factor
     if k_s == 0:
         print('Smooth pipe')
-        ff = fsolve(smooth, 0.01)
     else:
         print('Rough pipe')
-        ff = fsolve(rough, 0.01)
+    ff = friction_factor(Re, k_s_norm)
 
     print('friction factor:')
     print(ff)
 
     # calculate turbulence intensity (Eq. 29 in paper)
-    TI = 0.0276 * np.log(ff) + 0.1794
+    TI = turbulence_intensity(ff)
 
     print('turbulence intensity:')
     print(TI)
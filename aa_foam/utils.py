@@ -2,7 +2,13 @@
 
 r"""Utility functions."""
 
-from typing import List, Any
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import gzip
+import logging
+import os
+from typing import List, Any, BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 
 def is_integer(s: Any) -> bool:
@@ -14,6 +20,22 @@ def is_integer(s: Any) -> bool:
         return False
 
 
+def is_float(s: Any) -> bool:
+    r"""Is the supplied value convertible to a float?"""
+    try:
+        _ = float(s)
+        return True
+    except ValueError:
+        return False
+
+
+def time_directories(case_path: str) -> List[str]:
+    r"""Time directories names of a case, sorted by increasing time"""
+    names = [name for name in os.listdir(case_path)
+             if is_float(name) and os.path.isdir(os.path.join(case_path, name))]
+    return sorted(names, key=float)
+
+
 def is_binary_format(content: List[bytes], maxline: int = 20) -> bool:
     """Parse file header to judge the format is binary or not
 
@@ -33,3 +55,98 @@ def is_binary_format(content: List[bytes], maxline: int = 20) -> bool:
                 return True
             return False
     return False
+
+
+def foam_file(fn: str) -> Optional[str]:
+    r"""Path of an OpenFOAM file or of its compressed version (writeCompression on), None if neither exists"""
+    if os.path.isfile(fn):
+        return fn
+    if not fn.endswith('.gz') and os.path.isfile(fn + '.gz'):
+        return fn + '.gz'
+    return None
+
+
+def is_foam_file(fn: str) -> bool:
+    r"""Does the OpenFOAM file, or its compressed version, exist?"""
+    return foam_file(fn) is not None
+
+
+def open_foam_file(fn: str) -> BinaryIO:
+    r"""Open an OpenFOAM file for reading, in binary mode, its compressed version (fn.gz) being
+    decompressed on the fly if fn does not exist
+
+    Raises
+    ------
+    FileNotFoundError if neither fn nor fn.gz exists
+
+    """
+    path = foam_file(fn)
+    if path is None:
+        raise FileNotFoundError(f"No such file: {fn} (or {fn}.gz)")
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def read_foam_files(fns: List[str], workers: int = 1) -> List[Optional[List[bytes]]]:
+    r"""Read the lines of OpenFOAM files (possibly compressed), None for the missing files
+
+    Parameters
+    ----------
+    fns: file names
+    workers: number of files read at once by a pool of threads (the decompression releases the GIL)
+
+    """
+    def read(fn):
+        try:
+            with open_foam_file(fn) as f:
+                return f.readlines()
+        except FileNotFoundError:
+            return None
+
+    if workers is None or workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(read, fns))
+    return [read(fn) for fn in fns]
+
+
+# Data shared by the jobs of the worker processes of map_time_series, set once per process by _init_pool_worker
+pool_worker_data = {}
+
+
+def _init_pool_worker(data: Dict[str, Any]) -> None:
+    r"""Store the data shared by the jobs in the worker process"""
+    pool_worker_data.update(data)
+
+
+def map_time_series(func: Callable,
+                    jobs: List[Tuple[str, tuple]],
+                    data: Dict[str, Any],
+                    workers: int = None) -> Iterator[Tuple[str, Any]]:
+    r"""Process the time directories of a case in a pool of processes
+
+    The data shared by the jobs (e.g. mesh arrays) is sent once to each worker process, where func reads it
+    from pool_worker_data, only the job arguments (e.g. file names) being sent for each time.
+
+    Parameters
+    ----------
+    func: module level function, called as func(*args) in the worker processes
+    jobs: (time, args) pairs
+    data: data shared by the jobs, in pool_worker_data
+    workers: number of worker processes, os.cpu_count() if None
+
+    Yields
+    ------
+    (time, func(*args)) as soon as each time is processed, in the order of the jobs, the times for which
+    func raises being skipped with a warning (e.g. a time directory being written by the solver)
+
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker, initargs=(data,)) as executor:
+        futures = [executor.submit(func, *args) for _, args in jobs]
+        for (t, _), future in zip(jobs, futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning(f"Skipping time {t} : {e}")
+                continue
+            yield t, result
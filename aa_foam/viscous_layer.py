@@ -2,26 +2,70 @@
 
 r"""Viscous layers computations"""
 
-from typing import Tuple, List
+from typing import Tuple, List, Union
 
+import numpy as np
 
-def viscous_layer_mesh(thickness_first_layer: float,
-                       growth_ratio: float,
-                       nb_layers: int) -> Tuple[float, float, List[float]]:
+_Array = Union[float, np.ndarray]
+
+
+def viscous_layers(thickness_first_layer: _Array,
+                   growth_ratio: _Array,
+                   nb_layers: _Array) -> Tuple[np.ndarray, np.ndarray]:
+    r"""Total and outermost layer thicknesses of viscous layers, closed form geometric sums
+
+    The arguments are scalars or numpy arrays, broadcast together.
+
+    Parameters
+    ----------
+    thickness_first_layer : thickness of layer closest to the wall
+    growth_ratio : the thickness ratio between a cell and the one just inside it
+    nb_layers : total number of viscous layers
+
+    Returns
+    -------
+    A tuple of total thickness, thickness of outermost cell (arrays with the broadcast shape of the inputs)
+
+    """
+    thickness_first_layer, growth_ratio, nb_layers = \
+        np.broadcast_arrays(np.asarray(thickness_first_layer, dtype=float),
+                            np.asarray(growth_ratio, dtype=float),
+                            np.asarray(nb_layers, dtype=float))
+    log_growth = np.log(growth_ratio)
+    # first * (r**n - 1) / (r - 1), with expm1 to stay accurate for r close to 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        thickness_total = np.where(np.abs(log_growth) < 1e-12, nb_layers * thickness_first_layer,
+                                   thickness_first_layer * np.expm1(nb_layers * log_growth) / np.expm1(log_growth))
+    thickness_outermost_cell = thickness_first_layer * growth_ratio ** (nb_layers - 1)
+    return thickness_total, thickness_outermost_cell
+
+
+def viscous_layer_mesh(thickness_first_layer: _Array,
+                       growth_ratio: _Array,
+                       nb_layers: _Array) -> Tuple[_Array, _Array, Union[List[float], np.ndarray]]:
     r"""Viscous layer mesh
 
     Parameters
     ----------
-    thickness_first_layer : thickness of layer clsest to the wall
+    thickness_first_layer : thickness of layer closest to the wall
     growth_ratio : the thickness ratio between a cell and the one just inside it
     nb_layers : total number of viscous layers
 
     Returns
     -------
-    A tuple of total thickness, thickness of outermost cell, list of thicknesses
+    A tuple of total thickness, thickness of outermost cell, list of thicknesses.
+    For array inputs (broadcast together), the totals and outermost thicknesses are arrays
+    and the thicknesses an array with an extra last axis of length max(nb_layers), padded with nan.
 
     """
-    thicknesses = [thickness_first_layer * growth_ratio ** i for i in range(nb_layers)]
-    thickness_total = sum(thicknesses)  # total thickness of BL meshing
-    thickness_outermost_cell = thicknesses[-1]  # outermost BL meshing cell thickness
-    return thickness_total, thickness_outermost_cell, thicknesses
+    total, outermost = viscous_layers(thickness_first_layer, growth_ratio, nb_layers)
+    if all(np.ndim(x) == 0 for x in (thickness_first_layer, growth_ratio, nb_layers)):
+        thicknesses = (thickness_first_layer * growth_ratio ** np.arange(int(nb_layers))).tolist()
+        return float(total), float(outermost), thicknesses
+
+    first, growth, n = np.broadcast_arrays(np.asarray(thickness_first_layer, dtype=float),
+                                           np.asarray(growth_ratio, dtype=float),
+                                           np.asarray(nb_layers))
+    i = np.arange(int(n.max()) if n.size else 0)
+    thicknesses = np.where(i < n[..., None], first[..., None] * growth[..., None] ** i, np.nan)
+    return total, outermost, thicknesses
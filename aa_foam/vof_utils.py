@@ -8,10 +8,41 @@ https://github.com/dayigu
 
 """
 
-from typing import Union
+from os.path import join, isfile, getsize
+from typing import Union, List, Tuple
+import logging
+import warnings
+
 import numpy as np
 
+from aa_foam.diffing import parse_internal_field
 from aa_foam.mesh_parser import FoamMesh
+from aa_foam.utils import time_directories, is_foam_file, map_time_series, pool_worker_data
+
+logger = logging.getLogger(__name__)
+
+
+def _inner_face_areas(mesh: FoamMesh,
+                      face_area: Union[float, list, np.ndarray] = None) -> Union[float, np.ndarray]:
+    """Areas of the inner faces, as a scalar (same area for all faces) or as an array
+
+    Parameters
+    ----------
+    mesh: FoamMesh object
+    face_area: face area, scalar or list or numpy array of areas or of area vectors,
+               mesh.face_areas (or 1.) if None
+
+    """
+    if face_area is None:
+        face_area = 1. if mesh.face_areas is None else mesh.face_areas
+    face_area = np.asarray(face_area, dtype=float)
+    if face_area.size == 1:
+        return float(face_area.ravel()[0])
+    face_area = face_area[:mesh.num_inner_face]
+    if face_area.ndim == 2:
+        # face area vectors
+        return np.sqrt(np.einsum('ij,ij->i', face_area, face_area))
+    return face_area
 
 
 def calc_phase_surface_area(mesh: FoamMesh,
@@ -24,7 +55,7 @@ def calc_phase_surface_area(mesh: FoamMesh,
     ----------
     mesh: FoamMesh object
     phi: vof data, numpy array
-    face_area: face area, scalar or list or numpy array
+    face_area: face area, scalar or list or numpy array (areas or area vectors)
     omg: power index
 
     Returns
@@ -32,15 +63,147 @@ def calc_phase_surface_area(mesh: FoamMesh,
     phase surface area
 
     """
-    if face_area is not None:
-        try:
-            if len(face_area) == 1:
-                face_area = [face_area[0]] * mesh.num_face
-        except TypeError:
-            face_area = [face_area] * mesh.num_face
+    phi = np.asarray(phi, dtype=float)
+    jump = np.abs(phi[mesh.owner_array[:mesh.num_inner_face]] - phi[mesh.neighbour_array]) ** omg
+    area = _inner_face_areas(mesh, face_area)
+    if isinstance(area, float):
+        return area * float(jump.sum())
+    return float(np.dot(area, jump))
+
+
+def calc_phase_surface_area_series(mesh: FoamMesh,
+                                   phis: Union[List[np.ndarray], np.ndarray],
+                                   face_area: Union[float, list, np.ndarray] = None,
+                                   omg: float = 1.5,
+                                   chunk_size: int = 2**24) -> np.ndarray:
+    """Calculate phase surface area for VOF for a stack of vof fields (e.g. one per time step)
+
+    Parameters
+    ----------
+    mesh: FoamMesh object
+    phis: vof data, numpy array (number of fields x number of cells) or list of numpy arrays
+    face_area: face area, scalar or list or numpy array (areas or area vectors)
+    omg: power index
+    chunk_size: maximum number of face values computed at once, bounds the temporary memory
+
+    Returns
+    -------
+    phase surface area of each field, numpy array
+
+    """
+    phis = np.asarray(phis, dtype=float)
+    owner = mesh.owner_array[:mesh.num_inner_face]
+    neighbour = mesh.neighbour_array
+    area = _inner_face_areas(mesh, face_area)
+    areas = np.empty(len(phis))
+    step = max(1, chunk_size // max(1, mesh.num_inner_face))
+    for i in range(0, len(phis), step):
+        jump = np.abs(phis[i:i + step, owner] - phis[i:i + step, neighbour]) ** omg
+        areas[i:i + step] = jump.sum(axis=1) * area if isinstance(area, float) else jump @ area
+    return areas
+
+
+# ******************** *
+# Time series pipeline *
+# ******************** *
+
+VOF_SERIES_COLUMNS = ('time', 'area', 'volume', 'centre_x', 'centre_y', 'centre_z')
+
+
+def _vof_time_values(fn: str) -> Tuple[float, float, float, float, float]:
+    """Interface area, phase volume and phase centre of mass of a vof field file (mesh data of vof_time_series)"""
+    m = pool_worker_data
+    phi = parse_internal_field(fn)
+    if phi is None:
+        raise ValueError(f"Could not parse the internal field of {fn}")
+    phi = np.broadcast_to(np.asarray(phi, dtype=float), m['cell_volumes'].shape)
+    area = float(np.dot(m['face_area'], np.abs(phi[m['owner']] - phi[m['neighbour']]) ** m['omg']))
+    phase_volumes = phi * m['cell_volumes']
+    volume = float(phase_volumes.sum())
+    if volume > 0:
+        centre = phase_volumes @ m['cell_centres'] / volume
     else:
-        if mesh.face_areas is None:
-            face_area = [1.] * mesh.num_face
-        else:
-            face_area = mesh.face_areas
-    return sum([face_area[n]*abs(phi[mesh.owner[n]] - phi[mesh.neighbour[n]])**omg for n in range(mesh.num_inner_face)])
+        centre = np.full(3, np.nan)
+    return area, volume, float(centre[0]), float(centre[1]), float(centre[2])
+
+
+def read_vof_time_series(fn: str) -> np.ndarray:
+    """Read a vof time series table written by vof_time_series
+
+    Returns
+    -------
+    numpy array, one row per time, columns as in VOF_SERIES_COLUMNS
+
+    """
+    if not isfile(fn) or getsize(fn) == 0:
+        return np.empty((0, len(VOF_SERIES_COLUMNS)))
+    with warnings.catch_warnings():
+        # header only, e.g. a run interrupted before its first row
+        warnings.simplefilter('ignore', UserWarning)
+        rows = np.loadtxt(fn, ndmin=2)
+    if not rows.size:
+        return np.empty((0, len(VOF_SERIES_COLUMNS)))
+    return rows
+
+
+def vof_time_series(case_path: str,
+                    field: str = 'alpha.water',
+                    output: str = None,
+                    workers: int = None,
+                    omg: float = 1.5) -> np.ndarray:
+    """Interface area, phase volume and phase centre of mass for all the time directories of a case
+
+    The mesh is loaded once, its geometry computed from the points and faces,
+    and the vof fields of the time directories are processed by a pool of processes.
+    If output is given, a row is appended to it as soon as a time is processed,
+    and the times already in it are skipped so that the series of a run
+    still in progress can be updated by running again.
+
+    Parameters
+    ----------
+    case_path: path to the case
+    field: vof field name
+    output: output file name (text table, one row per time)
+    workers: number of worker processes, os.cpu_count() if None
+    omg: power index (see calc_phase_surface_area)
+
+    Returns
+    -------
+    numpy array, one row per time, columns as in VOF_SERIES_COLUMNS
+
+    """
+    rows = read_vof_time_series(output) if output is not None else np.empty((0, len(VOF_SERIES_COLUMNS)))
+    done = set(rows[:, 0].tolist())
+    times = [t for t in time_directories(case_path)
+             if float(t) not in done and is_foam_file(join(case_path, t, field))]
+    if not times:
+        return rows
+
+    mesh = FoamMesh(case_path)
+    mesh.calc_geometry()
+    face_area = _inner_face_areas(mesh, mesh.face_area_vectors)
+    data = dict(owner=mesh.owner_array[:mesh.num_inner_face], neighbour=mesh.neighbour_array, face_area=face_area,
+                cell_volumes=mesh.cell_volumes, cell_centres=mesh.cell_centres, omg=omg)
+    del mesh
+
+    new_rows = []
+    out = None
+    if output is not None:
+        new_file = not isfile(output) or getsize(output) == 0
+        out = open(output, 'a')
+        if new_file:
+            out.write('# ' + ' '.join(VOF_SERIES_COLUMNS) + '\n')
+    try:
+        # the times skipped (e.g. a time directory being written by the solver) are processed next time
+        jobs = [(t, (join(case_path, t, field),)) for t in times]
+        for t, values in map_time_series(_vof_time_values, jobs, data, workers):
+            new_rows.append((float(t),) + values)
+            if out is not None:
+                out.write(' '.join(repr(v) for v in new_rows[-1]) + '\n')
+                out.flush()
+    finally:
+        if out is not None:
+            out.close()
+
+    rows = np.vstack([rows, np.array(new_rows).reshape(-1, len(VOF_SERIES_COLUMNS))])
+    return rows[np.argsort(rows[:, 0], kind='stable')]
@@ -0,0 +1,210 @@
+# coding: utf-8
+
+r"""Export of a FoamMesh and cell fields to VTK unstructured grid (.vtu) files
+
+The cells are written as VTK polyhedra and the data arrays as raw binary appended data.
+The arrays are streamed by blocks of cells, so that the temporary memory stays bounded,
+and their sizes and offsets are patched in the XML header once they are known.
+
+"""
+
+from typing import Dict, List, Union, BinaryIO
+from xml.sax.saxutils import quoteattr
+import logging
+
+import numpy as np
+
+from aa_foam.diffing import field_rows, parse_internal_field
+from aa_foam.mesh_parser import FoamMesh
+
+logger = logging.getLogger(__name__)
+
+VTK_POLYHEDRON = 42
+
+# Width of the offset attributes in the XML header, patched once the data is written
+_OFFSET_WIDTH = 20
+
+
+class _AppendedWriter(object):
+    """Writes the data arrays one after the other in the appended data section
+    (names: data arrays in the order of the header, offsets: offset of each data array written)"""
+    def __init__(self, f: BinaryIO, names: List[str]):
+        self.f = f
+        self.names = names
+        self.start = f.tell()
+        self.offsets = []
+        self._header_position = None
+        self._size = 0
+
+    def begin(self, name: str) -> None:
+        """Start a data array, its size is written by end, in the order of the header data arrays"""
+        expected = self.names[len(self.offsets)] if len(self.offsets) < len(self.names) else None
+        if name != expected:
+            msg = f"Data array {name} written where the header expects {expected}"
+            logger.error(msg)
+            raise ValueError(msg)
+        self.offsets.append(self.f.tell() - self.start)
+        self._header_position = self.f.tell()
+        self.f.write(np.uint64(0).tobytes())
+        self._size = 0
+
+    def write(self, values: np.ndarray) -> None:
+        """Write a block of values of the current data array"""
+        values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+        self.f.write(memoryview(values).cast('B'))
+        self._size += values.nbytes
+
+    def end(self) -> None:
+        """Write the size of the current data array in its header"""
+        position = self.f.tell()
+        self.f.seek(self._header_position)
+        self.f.write(np.uint64(self._size).tobytes())
+        self.f.seek(position)
+
+
+def _cell_face_order(mesh: FoamMesh) -> tuple:
+    """Faces of each cell: face indices sorted by cell, their flip flag (neighbour side) and the cells offsets"""
+    cells = np.concatenate([mesh.owner_array, mesh.neighbour_array])
+    order = np.argsort(cells, kind='stable')
+    faces = np.concatenate([np.arange(mesh.num_face), np.arange(mesh.num_inner_face)])[order]
+    flip = order >= mesh.num_face
+    cell_offsets = np.searchsorted(cells[order], np.arange(mesh.num_cell + 1))
+    return faces, flip, cell_offsets
+
+
+def _face_block(mesh: FoamMesh, faces: np.ndarray, flip: np.ndarray) -> tuple:
+    """Sizes and points of faces, the flipped faces being reversed (keeping their first point)"""
+    offsets, face_points = mesh.face_offsets, mesh.face_points
+    sizes = offsets[faces + 1] - offsets[faces]
+    starts = np.zeros(len(faces) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=starts[1:])
+    local = np.arange(starts[-1]) - np.repeat(starts[:-1], sizes)
+    reverse = np.repeat(flip, sizes) & (local > 0)
+    local[reverse] = np.repeat(sizes, sizes)[reverse] - local[reverse]
+    return sizes, face_points[np.repeat(offsets[faces], sizes) + local].astype(np.int64)
+
+
+def _field_array(mesh: FoamMesh, field: Union[str, float, np.ndarray]) -> np.ndarray:
+    """Cell values of a field given as an array, a uniform value or a field file name"""
+    if isinstance(field, str):
+        field = parse_internal_field(field)
+    return field_rows(field, mesh.num_cell).reshape(mesh.num_cell, -1)
+
+
+def write_vtu(mesh: FoamMesh,
+              fn: str,
+              fields: Dict[str, Union[str, float, np.ndarray]] = None,
+              chunk_size: int = 2**18) -> None:
+    """Write a mesh and cell fields to a VTK unstructured grid file with raw binary appended data
+
+    Parameters
+    ----------
+    mesh: FoamMesh object (or SubMesh)
+    fn: output file name (.vtu)
+    fields: cell fields by name, as arrays (e.g. from parse_internal_field), uniform values
+            or field file names (e.g. the <field>_diff file written by diff_non_uniform_fields)
+    chunk_size: number of cells processed at once, bounds the temporary memory
+
+    """
+    fields = {name: _field_array(mesh, field) for name, field in (fields or {}).items()}
+    faces, flip, cell_offsets = _cell_face_order(mesh)
+    num_cell = mesh.num_cell
+
+    arrays = [('points', 'Float64', 3), ('connectivity', 'Int64', 1), ('offsets', 'Int64', 1),
+              ('types', 'UInt8', 1), ('faces', 'Int64', 1), ('faceoffsets', 'Int64', 1)]
+    arrays += [(name, 'Float64', values.shape[1]) for name, values in fields.items()]
+
+    def data_array(i):
+        # the offset placeholders are positional, the names (e.g. alpha.water) are escaped
+        name, vtk_type, components = arrays[i]
+        name = quoteattr(name).replace('{', '{{').replace('}', '}}')
+        return (f'        <DataArray type="{vtk_type}" Name={name} NumberOfComponents="{components}" '
+                f'format="appended" offset="{{{i}}}"/>\n')
+
+    xml = ['<?xml version="1.0"?>\n',
+           '<VTKFile type="UnstructuredGrid" version="1.0" byte_order="LittleEndian" header_type="UInt64">\n',
+           '  <UnstructuredGrid>\n',
+           f'    <Piece NumberOfPoints="{mesh.num_point}" NumberOfCells="{num_cell}">\n',
+           '      <Points>\n', data_array(0), '      </Points>\n',
+           '      <Cells>\n'] + [data_array(i) for i in range(1, 6)] + ['      </Cells>\n',
+           '      <CellData>\n'] + [data_array(i) for i in range(6, len(arrays))] + ['      </CellData>\n',
+           '    </Piece>\n',
+           '  </UnstructuredGrid>\n',
+           '  <AppendedData encoding="raw">\n   _']
+    header = ''.join(xml)
+
+    with open(fn, 'wb') as f:
+        f.write(header.format(*['0' * _OFFSET_WIDTH] * len(arrays)).encode())
+        w = _AppendedWriter(f, [name for name, _, _ in arrays])
+
+        w.begin('points')
+        points = np.asarray(mesh.points, dtype=float)
+        for start in range(0, len(points), chunk_size):
+            w.write(points[start:start + chunk_size])
+        w.end()
+
+        # Points of each cell, without duplicates
+        n_cell_points = np.empty(num_cell, dtype=np.int64)
+        w.begin('connectivity')
+        for start in range(0, num_cell, chunk_size):
+            end = min(start + chunk_size, num_cell)
+            block = slice(cell_offsets[start], cell_offsets[end])
+            sizes, points = _face_block(mesh, faces[block], flip[block])
+            cells = np.repeat(np.repeat(np.arange(start, end), np.diff(cell_offsets[start:end + 1])), sizes)
+            keys = np.unique(cells * mesh.num_point + points)
+            n_cell_points[start:end] = np.bincount(keys // mesh.num_point - start, minlength=end - start)
+            w.write(keys % mesh.num_point)
+        w.end()
+
+        w.begin('offsets')
+        w.write(np.cumsum(n_cell_points))
+        w.end()
+        del n_cell_points
+
+        w.begin('types')
+        for start in range(0, num_cell, chunk_size):
+            w.write(np.full(min(chunk_size, num_cell - start), VTK_POLYHEDRON, dtype=np.uint8))
+        w.end()
+
+        # Faces of each cell : number of faces, then for each face its number of points and its points
+        face_stream_end = np.empty(num_cell, dtype=np.int64)
+        total = 0
+        w.begin('faces')
+        for start in range(0, num_cell, chunk_size):
+            end = min(start + chunk_size, num_cell)
+            block = slice(cell_offsets[start], cell_offsets[end])
+            sizes, points = _face_block(mesh, faces[block], flip[block])
+            n_faces = np.diff(cell_offsets[start:end + 1])
+            # Position of each face in the stream: after the previous faces (1 + size values each)
+            # and the headers of the cells up to its own
+            face_start = np.zeros(len(sizes), dtype=np.int64)
+            np.cumsum(sizes[:-1] + 1, out=face_start[1:])
+            face_start += np.repeat(np.arange(1, end - start + 1), n_faces)
+            cell_start = face_start[cell_offsets[start:end] - cell_offsets[start]] - 1
+            point_start = np.cumsum(sizes) - sizes
+            stream = np.empty(end - start + len(sizes) + len(points), dtype=np.int64)
+            stream[cell_start] = n_faces
+            stream[face_start] = sizes
+            stream[np.repeat(face_start + 1 - point_start, sizes) + np.arange(len(points))] = points
+            face_stream_end[start:end] = total + np.append(cell_start[1:], len(stream))
+            total += len(stream)
+            w.write(stream)
+        w.end()
+
+        w.begin('faceoffsets')
+        w.write(face_stream_end)
+        w.end()
+        del face_stream_end
+
+        for name, values in fields.items():
+            w.begin(name)
+            for start in range(0, num_cell, chunk_size):
+                w.write(np.asarray(values[start:start + chunk_size], dtype=float))
+            w.end()
+
+        f.write(b'\n  </AppendedData>\n</VTKFile>\n')
+
+        # Patch the offsets of the data arrays in the header
+        f.seek(0)
+        f.write(header.format(*[str(offset).zfill(_OFFSET_WIDTH) for offset in w.offsets]).encode())
+    logger.info(f"Wrote {num_cell} cells and {len(fields)} field(s) to {fn}")
@@ -0,0 +1,217 @@
+# coding: utf-8
+
+r"""y+ on the wall patches of a solved case
+
+The a posteriori counterpart of y_plus.y_plus_calc : the y+ of every wall face from the wall distance
+of its owner cell centre and the friction velocity, taken from the wallShearStress field
+or, for the times without it, from the nut and U fields (as the nutWallFunction yPlus does).
+Per patch statistics (min, max, area weighted mean, area fraction by y+ range) for all the time directories.
+
+"""
+
+from os.path import join
+from typing import Dict, List, Tuple, Union
+import logging
+
+import numpy as np
+
+from aa_foam.diffing import parse_field
+from aa_foam.mesh_parser import FoamMesh
+from aa_foam.patch_integrals import patch_slice, face_values
+from aa_foam.utils import time_directories, is_foam_file, map_time_series, pool_worker_data
+
+logger = logging.getLogger(__name__)
+
+# y+ ranges of the statistics : viscous sublayer, buffer layer, log layer, beyond
+Y_PLUS_BINS = (0., 1., 5., 30., 300., np.inf)
+
+Y_PLUS_SERIES_COLUMNS = ('time', 'min', 'max', 'mean') + \
+                        tuple(f"frac_{lo:g}_{hi:g}" for lo, hi in zip(Y_PLUS_BINS[:-1], Y_PLUS_BINS[1:]))
+
+_Field = Tuple[Union[float, np.ndarray], Dict[bytes, Dict[bytes, Union[np.ndarray, float]]]]
+
+
+def wall_patches(mesh: FoamMesh) -> List[bytes]:
+    """Names of the patches of type wall"""
+    return [name for name, b in mesh.boundary.items() if b.type == b'wall']
+
+
+def _wall_data(mesh: FoamMesh, patch: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Wall distance of the owner cell centres, face areas and owner cells of the faces of a patch"""
+    mesh.ensure_geometry()
+    s = patch_slice(mesh, patch)
+    owner = mesh.owner_array[s]
+    sf = mesh.face_area_vectors[s]
+    mag_sf = np.sqrt(np.einsum('ij,ij->i', sf, sf))
+    # normal distance, as nearWallDist
+    y = np.abs(np.einsum('ij,ij->i', mesh.face_centres[s] - mesh.cell_centres[owner], sf)) / mag_sf
+    return y, mag_sf, owner
+
+
+def _y_plus(y: np.ndarray,
+            owner: np.ndarray,
+            patch: bytes,
+            nu: float,
+            rho: float,
+            wall_shear_stress: _Field = None,
+            nut: _Field = None,
+            u: _Field = None) -> np.ndarray:
+    """y+ of the faces of a patch (see patch_y_plus)"""
+    if wall_shear_stress is not None:
+        wss = face_values(*wall_shear_stress, patch, owner)
+        u_tau = np.sqrt(np.sqrt(np.einsum('ij,ij->i', wss, wss)) / rho)
+    elif nut is not None and u is not None:
+        nut_wall = face_values(*nut, patch, owner)
+        if b'value' in u[1].get(patch, {}):
+            u_wall = face_values(*u, patch, owner)
+        else:
+            # no value entry on a wall (noSlip) : the wall does not move
+            u_wall = np.zeros((len(owner), 3))
+        u_cell = face_values(u[0], {}, patch, owner)
+        du = u_cell - u_wall
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u_tau = np.sqrt((nu + nut_wall) * np.sqrt(np.einsum('ij,ij->i', du, du)) / y)
+    else:
+        msg = "y+ needs the wallShearStress field or the nut and U fields"
+        logger.error(msg)
+        raise ValueError(msg)
+    return y * u_tau / nu
+
+
+def patch_y_plus(mesh: FoamMesh,
+                 patch: bytes,
+                 nu: float,
+                 wall_shear_stress: _Field = None,
+                 nut: _Field = None,
+                 u: _Field = None,
+                 rho: float = 1.) -> np.ndarray:
+    """y+ of the faces of a wall patch
+
+    Parameters
+    ----------
+    mesh: FoamMesh object
+    patch: patch name
+    nu: kinematic viscosity [m2/s]
+    wall_shear_stress: wallShearStress (internal field, boundary field, see parse_field)
+    nut: nut (internal field, boundary field), used with u when wall_shear_stress is None
+    u: U (internal field, boundary field)
+    rho: density, to divide wallShearStress by if it is not kinematic (compressible cases)
+
+    Returns
+    -------
+    numpy array, y+ of the patch faces
+
+    """
+    y, _, owner = _wall_data(mesh, patch)
+    return _y_plus(y, owner, patch, nu, rho, wall_shear_stress, nut, u)
+
+
+def y_plus_statistics(y_plus: np.ndarray,
+                      face_areas: np.ndarray,
+                      bins: Union[tuple, np.ndarray] = Y_PLUS_BINS) -> Dict[str, Union[float, np.ndarray]]:
+    """Statistics of the y+ of the faces of a patch
+
+    Returns
+    -------
+    dict with 'min', 'max', 'mean' (area weighted), 'counts' (number of faces by y+ range)
+    and 'area_fractions' (area fraction by y+ range), the ranges being given by the bin edges
+
+    """
+    y_plus = np.asarray(y_plus, dtype=float)
+    face_areas = np.asarray(face_areas, dtype=float)
+    finite = np.isfinite(y_plus)
+    y_plus, face_areas = y_plus[finite], face_areas[finite]
+    if not len(y_plus):
+        return {'min': np.nan, 'max': np.nan, 'mean': np.nan,
+                'counts': np.zeros(len(bins) - 1, dtype=np.int64), 'area_fractions': np.zeros(len(bins) - 1)}
+    area = face_areas.sum()
+    return {'min': float(y_plus.min()),
+            'max': float(y_plus.max()),
+            'mean': float(np.dot(face_areas, y_plus) / area),
+            'counts': np.histogram(y_plus, bins=bins)[0],
+            'area_fractions': np.histogram(y_plus, bins=bins, weights=face_areas)[0] / area}
+
+
+def wall_y_plus(mesh: FoamMesh,
+                nu: float,
+                wall_shear_stress: _Field = None,
+                nut: _Field = None,
+                u: _Field = None,
+                rho: float = 1.,
+                patches: List[bytes] = None,
+                bins: Union[tuple, np.ndarray] = Y_PLUS_BINS) -> Dict[bytes, dict]:
+    """y+ and its statistics on the wall patches
+
+    Returns
+    -------
+    dict by patch name of the y_plus_statistics dicts, with the face values under 'y_plus'
+
+    """
+    report = {}
+    for patch in wall_patches(mesh) if patches is None else patches:
+        y, mag_sf, owner = _wall_data(mesh, patch)
+        values = _y_plus(y, owner, patch, nu, rho, wall_shear_stress, nut, u)
+        report[patch] = y_plus_statistics(values, mag_sf, bins)
+        report[patch]['y_plus'] = values
+    return report
+
+
+# ******************** *
+# Time series pipeline *
+# ******************** *
+
+def _y_plus_time_values(fn_wss: str = None,
+                        fn_nut: str = None,
+                        fn_u: str = None) -> Dict[bytes, Tuple[float, ...]]:
+    """y+ statistics on the patches from the files of a time directory
+    (patch data of y_plus_time_series : wall distances, face areas, owner cells)"""
+    d = pool_worker_data
+    # each file is parsed once for all the patches
+    wss, nut, u = (None if fn is None else parse_field(fn) for fn in (fn_wss, fn_nut, fn_u))
+    values = {}
+    for patch, (y, mag_sf, owner) in d['patches'].items():
+        stats = y_plus_statistics(_y_plus(y, owner, patch, d['nu'], d['rho'], wss, nut, u), mag_sf)
+        values[patch] = (stats['min'], stats['max'], stats['mean']) + tuple(stats['area_fractions'].tolist())
+    return values
+
+
+def y_plus_time_series(case_path: str,
+                       nu: float,
+                       patches: List[bytes] = None,
+                       wall_shear_stress_field: str = 'wallShearStress',
+                       nut_field: str = 'nut',
+                       u_field: str = 'U',
+                       rho: float = 1.,
+                       workers: int = None) -> Dict[bytes, np.ndarray]:
+    """y+ statistics on the wall patches for all the time directories of a case
+
+    The mesh is loaded once and the fields of the time directories are processed by a pool of processes
+    (see vof_utils.vof_time_series). The times without a wallShearStress file use the nut and U files,
+    the times with neither are skipped.
+
+    Returns
+    -------
+    dict by patch name of numpy arrays, one row per time, columns as in Y_PLUS_SERIES_COLUMNS
+
+    """
+    jobs = []
+    for t in time_directories(case_path):
+        fn_wss, fn_nut, fn_u = (join(case_path, t, f) for f in (wall_shear_stress_field, nut_field, u_field))
+        if is_foam_file(fn_wss):
+            jobs.append((t, (fn_wss, None, None)))
+        elif is_foam_file(fn_nut) and is_foam_file(fn_u):
+            jobs.append((t, (None, fn_nut, fn_u)))
+
+    mesh = FoamMesh(case_path)
+    if patches is None:
+        patches = wall_patches(mesh)
+    series = {patch: [] for patch in patches}
+    if jobs:
+        patch_data = {patch: _wall_data(mesh, patch) for patch in patches}
+        data = dict(patches=patch_data, nu=nu, rho=rho)
+        del mesh
+
+        for t, values in map_time_series(_y_plus_time_values, jobs, data, workers):
+            for patch in patches:
+                series[patch].append((float(t),) + values[patch])
+    return {patch: np.array(rows).reshape(-1, len(Y_PLUS_SERIES_COLUMNS)) for patch, rows in series.items()}
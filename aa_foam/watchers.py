@@ -0,0 +1,127 @@
+# coding: utf-8
+
+r"""Live matplotlib plots of OpenFOAM computed forces and coefficients
+
+matplotlib is imported with this module : the command line tools import it only when a watcher is started.
+
+"""
+
+from os import getcwd
+from os.path import basename, isfile
+from typing import Tuple, List, Any
+import logging
+
+import matplotlib.pyplot as plt
+import matplotlib.animation as animation
+
+from aa_foam.coefficients import coefficients_line2values
+from aa_foam.forces import force_data
+
+logger = logging.getLogger(__name__)
+
+
+def forces_file(timestep: int) -> Tuple[str, bool]:
+    r"""Forces file of a timestep subfolder of postProcessing/forces and whether it is in the old format
+
+    Raises
+    ------
+    IOError if there is no forces file
+
+    """
+    if isfile(f"postProcessing/forces/{timestep}/force.dat"):
+        return f"postProcessing/forces/{timestep}/force.dat", False
+    elif isfile(f"postProcessing/forces/{timestep}/forces.dat"):
+        return f"postProcessing/forces/{timestep}/forces.dat", True
+    raise IOError("Could not find a forces file")
+
+
+def checks(timestep: int) -> Tuple[bool, str]:
+    r"""Check the existence of a suitable forces file"""
+    try:
+        filename_force, old_format = forces_file(timestep)
+    except IOError:
+        return False, "ERROR : Could not find a forces file"
+    return True, f"Found force file at {filename_force}\nThe force file is in {'OLD' if old_format else 'NEW'} format"
+
+
+def animate_forces(frame: int, *fargs: List[Any]) -> None:
+    r"""Function for the matplotlib animation.FuncAnimation call of watch_forces"""
+    axs = fargs[0]
+    timestep = fargs[1]
+    plot_last: int = fargs[2]
+    precision: int = fargs[3]
+
+    # Should never raise as this has been checked before launching the animate loop
+    filename_force, old_format = forces_file(timestep)
+
+    times, ys, titles, avgs = force_data(filename_force, old_format, avg_last=plot_last)
+
+    colors = {'x': "red", 'y': "green", 'z': "blue"}
+
+    plt.suptitle(f"{basename(getcwd())} | averages and ranges on last {plot_last} timesteps", fontsize=10)
+
+    for ax, y, title in zip(axs, ys, titles):
+        ax.clear()
+        ax.set_title(f"{title} ({str(round(avgs[title], precision))})")
+        ax.set_ylim(min(y[-plot_last:-1])-0.0001, max(y[-plot_last:-1])+0.0001)
+        # Convention : 4th letter of title must be x, y or z and determines the colour.
+        ax.plot(times, y, color=colors[title[3]])
+        ax.grid()
+
+
+def watch_forces(timestep: int = 0, last: int = 100, refresh: int = 1, precision: int = 4) -> None:
+    r"""Live graphs of the forces of postProcessing/forces/<timestep>, refreshed every refresh seconds"""
+    fig, axs = plt.subplots(3, 3, sharex='col')
+    _ = animation.FuncAnimation(fig, animate_forces,
+                                fargs=[axs.ravel(), timestep, last, precision],
+                                interval=refresh * 1000)
+    plt.show()
+
+
+def animate_coefficients(frame: int, *fargs: List[Any]) -> None:
+    r"""Function for the matplotlib animation.FuncAnimation call of watch_coefficients"""
+    times, Cds, Css, Cls, CmRolls, CmPitchs, CmYaws, Cd_fs, Cd_rs, Cs_fs, Cs_rs, Cl_fs, Cl_rs = \
+        [], [], [], [], [], [], [], [], [], [], [], [], []
+
+    axs = fargs[0]
+    coef_file: str = fargs[1]
+    plot_last: int = fargs[2]
+    precision: int = fargs[3]
+
+    if not isfile(coef_file):
+        raise IOError("Could not find a coefficients file")
+
+    with open(coef_file) as fd:
+        for line in fd:
+            if line[0] == "#":
+                continue
+            time, Cd, Cs, Cl, CmRoll, CmPitch, CmYaw, Cd_f, Cd_r, Cs_f, Cs_r, Cl_f, Cl_r = \
+                coefficients_line2values(line)
+            times.append(time)
+            Cls.append(Cl)
+            Cds.append(Cd)
+            Css.append(Cs)  # Side force (i.e. Z up or down in XY 2D foil case)
+            CmRolls.append(CmRoll)
+            CmPitchs.append(CmPitch)
+            CmYaws.append(CmYaw)
+
+            ys = [Cls, Cds, Css, CmRolls, CmPitchs, CmYaws]
+            titles = ['Cl', 'Cd', 'Cs', 'Cm Roll', 'Cm Pitch', 'Cm Yaw']
+
+    plt.suptitle("%s | averages and ranges on last %d timesteps" % (basename(getcwd()), plot_last), fontsize=10)
+
+    for ax, y, title in zip(axs, ys, titles):
+        ax.clear()
+        ax.set_title("%s (%s)" % (title, str(round(sum(y[-plot_last:-1]) / len(y[-plot_last:-1]), precision))))
+        ax.set_ylim(min(y[-plot_last:-1])-0.0001, max(y[-plot_last:-1])+0.0001)
+        ax.plot(times, y)
+        ax.grid()
+
+
+def watch_coefficients(coef_file: str, last: int = 100, refresh: int = 1, precision: int = 4) -> None:
+    r"""Live graphs of the coefficients of a coefficient.dat file, refreshed every refresh seconds"""
+    fig, axs = plt.subplots(2, 3, sharex='col')
+    _ = animation.FuncAnimation(fig, animate_coefficients,
+                                fargs=[axs.ravel(), coef_file, last, precision],
+                                interval=refresh * 1000)
+    plt.show()
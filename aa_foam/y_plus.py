@@ -1,15 +1,69 @@
 # coding: utf-8
 
-r"""Y+ computations."""
+r"""Y+ computations.
 
-from typing import Tuple
+The functions accept scalars or numpy arrays, the arrays being broadcast together,
+e.g. the wall spacing over a grid of speeds and lengths:
 
+>>> u, L = np.meshgrid([1., 5., 10.], [0.5, 1., 2.], indexing='ij')
+>>> delta_s, re, kin = y_plus_calc(u, 1.225, 1.8375e-5, L, 1., correlation='schlichting')
 
-def y_plus_calc(u_freestream: float,
-                density: float,
-                mu: float,
-                length: float,
-                y_plus: float) -> Tuple[float, float, float]:
+"""
+
+from typing import Tuple, Union, Callable, Dict
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_Array = Union[float, np.ndarray]
+
+# Local flat plate skin friction coefficient correlations, cf_x as a function of the Reynolds number Re_x
+# at the distance x from the leading edge (the plate averaged coefficients, e.g. 0.074 / Re**0.2 for Prandtl,
+# overestimate the wall shear stress at x)
+SKIN_FRICTION_CORRELATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    # Turbulent, 1/7 power law (White), the historical default of y_plus_calc
+    'white': lambda re: 0.026 / re**(1 / 7),
+    # Turbulent, Schlichting (Re < 1e9)
+    'schlichting': lambda re: (2 * np.log10(re) - 0.65)**-2.3,
+    # Turbulent, Prandtl 1/5 power law (5e5 < Re < 1e7)
+    'prandtl': lambda re: 0.0592 / re**0.2,
+    # ITTC 1957 model-ship correlation line 0.075 / (log10(Re) - 2)**2, a plate averaged coefficient CF :
+    # local coefficient d(Re CF) / dRe
+    'ittc57': lambda re: 0.075 / (np.log10(re) - 2)**2 * (1 - 2 / ((np.log10(re) - 2) * np.log(10))),
+    # Laminar, Blasius
+    'blasius': lambda re: 0.664 / np.sqrt(re),
+}
+
+
+def skin_friction(re: _Array, correlation: str = 'white') -> _Array:
+    r"""Local flat plate skin friction coefficient
+
+    Parameters
+    ----------
+    re : Reynolds number at the distance from the leading edge [-]
+    correlation : one of SKIN_FRICTION_CORRELATIONS
+
+    Returns
+    -------
+    Skin friction coefficient [-], same shape as re
+
+    """
+    if correlation not in SKIN_FRICTION_CORRELATIONS:
+        msg = f"Unknown skin friction correlation {correlation}, " \
+              f"should be one of {', '.join(SKIN_FRICTION_CORRELATIONS)}"
+        logger.error(msg)
+        raise ValueError(msg)
+    return SKIN_FRICTION_CORRELATIONS[correlation](np.asarray(re, dtype=float))
+
+
+def y_plus_calc(u_freestream: _Array,
+                density: _Array,
+                mu: _Array,
+                length: _Array,
+                y_plus: _Array,
+                correlation: str = 'white') -> Tuple[_Array, _Array, _Array]:
     r"""Y+
 
     Parameters
@@ -17,18 +71,25 @@ def y_plus_calc(u_freestream: float,
     u_freestream : Freestream velocity [m/s]
     density : Density [kg/m3]
     mu : Dynamic viscosity [kg/m s]
-    length : Reference length [m]
+    length : Reference length, distance from the leading edge [m]
     y_plus : Desired y+
+    correlation : skin friction correlation, one of SKIN_FRICTION_CORRELATIONS
 
     Returns
     -------
-    A tuple of wall spacing [m], reynolds[-], kinematic viscosity [m**2/s]
+    A tuple of wall spacing [m], reynolds[-], kinematic viscosity [m**2/s],
+    floats for scalar inputs, arrays with the broadcast shape of the inputs otherwise
 
     """
+    scalar = all(np.ndim(x) == 0 for x in (u_freestream, density, mu, length, y_plus))
+    u_freestream, density, mu, length, y_plus = \
+        (np.asarray(x, dtype=float) for x in (u_freestream, density, mu, length, y_plus))
     kin = mu / density
     re = u_freestream * length / kin
-    cf = 0.026 / re**(1/7)
-    tau_wall = cf * density * u_freestream**2 / 2
-    u_fric = (tau_wall / density)**0.5
-    delta_s = y_plus * mu / (u_fric * density)
+    cf = skin_friction(re, correlation)
+    # u_fric = sqrt(tau_wall / density) with tau_wall = cf * density * u_freestream**2 / 2
+    u_fric = np.abs(u_freestream) * np.sqrt(cf / 2)
+    delta_s = y_plus * kin / u_fric
+    if scalar:
+        return float(delta_s), float(re), float(kin)
     return delta_s, re, kin
@@ -0,0 +1,169 @@
+# coding: utf-8
+
+r"""Benchmark suite (asv conventions : classes with params, setup and time_* methods)
+
+The synthetic cases (see aa_foam.synthetic_case) are written once per size and format in the cases directory
+(AAFOAM_BENCH_CASES, a aafoam_benchmarks directory in the temporary directory by default) and reused.
+The sizes are approximate numbers of cells, AAFOAM_BENCH_SIZES (e.g. '1e3,1e5,1e7') overrides the defaults,
+AAFOAM_BENCH_EDGES the numbers of edges of the grading benchmarks.
+
+Run with benchmarks/run.py, or with asv.
+
+"""
+
+import os
+import shutil
+import tempfile
+import warnings
+from os.path import join, isfile
+
+import numpy as np
+
+from aa_foam.diffing import parse_internal_field, parse_field, diff_non_uniform_fields
+from aa_foam.field_writer import write_field
+from aa_foam.forces import force_data
+from aa_foam.grading import expansion_ratio_from_cells_and_length, expansion_ratios_from_cells_and_length
+from aa_foam.mesh_parser import FoamMesh
+from aa_foam.synthetic_case import PATCHES, write_box_case
+from aa_foam.vof_utils import calc_phase_surface_area
+
+SIZES = [int(float(s)) for s in os.environ.get('AAFOAM_BENCH_SIZES', '1e3,1e4,1e5').split(',')]
+EDGES = [int(float(s)) for s in os.environ.get('AAFOAM_BENCH_EDGES', '1e2,1e3,1e4').split(',')]
+FORMATS = ['ascii', 'binary']
+
+CASES_DIR = os.environ.get('AAFOAM_BENCH_CASES', join(tempfile.gettempdir(), 'aafoam_benchmarks'))
+
+
+def case_path(num_cells: int, fmt: str) -> str:
+    r"""Path of the synthetic case of a size and format, written if it does not exist yet"""
+    path = join(CASES_DIR, f"box_{num_cells}_{fmt}")
+    done = join(path, '.complete')
+    if not isfile(done):
+        # the marker is written last : a case interrupted while being written is written again
+        shutil.rmtree(path, ignore_errors=True)
+        write_box_case(path, num_cells, binary=fmt == 'binary', force_lines=max(1000, num_cells // 10))
+        open(done, 'w').close()
+    return path
+
+
+class MeshLoad:
+    r"""FoamMesh : parsing of the polyMesh files, then geometry"""
+    params = (SIZES, FORMATS)
+    param_names = ['cells', 'format']
+
+    def setup(self, num_cells, fmt):
+        self.case = case_path(num_cells, fmt)
+        self.mesh = FoamMesh(self.case)
+
+    def time_load(self, num_cells, fmt):
+        FoamMesh(self.case)
+
+    def time_calc_geometry(self, num_cells, fmt):
+        self.mesh.calc_geometry()
+
+
+class FieldParse:
+    r"""Parsing of scalar and vector field files"""
+    params = (SIZES, FORMATS, ['p', 'U'])
+    param_names = ['cells', 'format', 'field']
+
+    def setup(self, num_cells, fmt, field):
+        self.fn = join(case_path(num_cells, fmt), '1', field)
+
+    def time_parse_internal_field(self, num_cells, fmt, field):
+        parse_internal_field(self.fn)
+
+    def time_parse_field(self, num_cells, fmt, field):
+        parse_field(self.fn)
+
+
+class Diff:
+    r"""diff_non_uniform_fields of the p files of two time directories (ASCII fields only)"""
+    params = (SIZES,)
+    param_names = ['cells']
+
+    def setup(self, num_cells):
+        self.case = case_path(num_cells, 'ascii')
+
+    def time_diff(self, num_cells):
+        diff_non_uniform_fields(join(self.case, '1', 'p'), join(self.case, '2', 'p'))
+
+    def teardown(self, num_cells):
+        fn = join(self.case, '1', 'p_diff')
+        if isfile(fn):
+            os.remove(fn)
+
+
+class FieldWrite:
+    r"""write_field (ASCII and binary) against diff_non_uniform_fields, which parses two files and writes one"""
+    params = (SIZES, ['p', 'U'])
+    param_names = ['cells', 'field']
+
+    def setup(self, num_cells, field):
+        self.case = case_path(num_cells, 'ascii')
+        self.internal = np.asarray(parse_internal_field(join(self.case, '1', field)))
+        self.boundary = {name: {'type': 'zeroGradient'} for name, _ in PATCHES}
+
+    def time_write_field_ascii(self, num_cells, field):
+        write_field(join(self.case, '1', f"{field}_written"), self.internal, self.boundary)
+
+    def time_write_field_binary(self, num_cells, field):
+        write_field(join(self.case, '1', f"{field}_written"), self.internal, self.boundary, binary=True)
+
+    def time_diff_non_uniform_fields(self, num_cells, field):
+        diff_non_uniform_fields(join(self.case, '1', field), join(self.case, '2', field))
+
+    def teardown(self, num_cells, field):
+        for fn in (f"{field}_diff", f"{field}_written"):
+            if isfile(join(self.case, '1', fn)):
+                os.remove(join(self.case, '1', fn))
+
+
+class ForceLoad:
+    r"""force_data of the postProcessing forces file (one line per 10 cells)"""
+    params = (SIZES,)
+    param_names = ['cells']
+
+    def setup(self, num_cells):
+        self.fn = join(case_path(num_cells, 'ascii'), 'postProcessing', 'forces', '0', 'force.dat')
+
+    def time_force_data(self, num_cells):
+        force_data(self.fn, False)
+
+
+class VofArea:
+    r"""Phase surface area of an alpha.water field, mesh geometry already calculated"""
+    params = (SIZES,)
+    param_names = ['cells']
+
+    def setup(self, num_cells):
+        case = case_path(num_cells, 'binary')
+        self.mesh = FoamMesh(case)
+        self.mesh.calc_geometry()
+        self.alpha = np.asarray(parse_internal_field(join(case, '1', 'alpha.water')))
+
+    def time_phase_surface_area(self, num_cells):
+        calc_phase_surface_area(self.mesh, self.alpha, self.mesh.face_area_vectors)
+
+
+class ExpansionRatios:
+    r"""Expansion ratios of random edges (N up to 2000, xmin / L from 1e-6 to 0.5) :
+    vectorized solver against the fsolve loop"""
+    params = (EDGES,)
+    param_names = ['edges']
+
+    def setup(self, num_edges):
+        rng = np.random.default_rng(0)
+        self.N = rng.integers(2, 2001, num_edges)
+        self.L = np.ones(num_edges)
+        self.xmin = 10 ** rng.uniform(-6., np.log10(0.5), num_edges)
+
+    def time_vectorized(self, num_edges):
+        expansion_ratios_from_cells_and_length(self.L, self.xmin, self.N)
+
+    def time_fsolve_loop(self, num_edges):
+        with warnings.catch_warnings():
+            # some edges do not converge with fsolve
+            warnings.simplefilter('ignore')
+            for L, xmin, N in zip(self.L.tolist(), self.xmin.tolist(), self.N.tolist()):
+                expansion_ratio_from_cells_and_length(L, xmin, N)
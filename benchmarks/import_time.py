@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Import time of the aafoam command line entry point, checked against a budget
+
+Runs python -X importtime -c "import aa_foam.cli" a few times and keeps the fastest cumulative import time
+of aa_foam.cli, then checks that building the parser of every subcommand does not import the heavy
+dependencies (numpy, scipy, matplotlib), which must be imported only when a subcommand runs.
+
+example use (from the repository root, exits with 1 if over budget):
+python benchmarks/import_time.py --budget 100
+
+"""
+
+import os
+import re
+import subprocess
+import sys
+from argparse import ArgumentParser
+from typing import List
+
+HEAVY_MODULES = ('numpy', 'scipy', 'matplotlib')
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_python(args: List[str]) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([_ROOT, os.environ.get('PYTHONPATH', '')]))
+    return subprocess.run([sys.executable] + args, capture_output=True, text=True, env=env, check=True)
+
+
+def cli_import_time(repeat: int = 5) -> float:
+    r"""Fastest cumulative import time of aa_foam.cli over repeat runs [ms]"""
+    times = []
+    for _ in range(repeat):
+        out = _run_python(['-X', 'importtime', '-c', 'import aa_foam.cli']).stderr
+        m = re.search(r'^import time:\s*\d+\s*\|\s*(\d+)\s*\|\s*aa_foam\.cli$', out, re.M)
+        times.append(int(m.group(1)) / 1000.)
+    return min(times)
+
+
+def heavy_imports_at_parse() -> List[str]:
+    r"""Heavy modules imported when building the aafoam parser (should be none)"""
+    code = ("import sys; from aa_foam.cli import build_parser; build_parser(); "
+            f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    return _run_python(['-c', code]).stdout.split()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Import time of the aafoam entry point, checked against a budget")
+    parser.add_argument('-b', '--budget', type=float, default=100., help="Import time budget [ms]")
+    parser.add_argument('-r', '--repeat', type=int, default=5, help="Number of runs, the fastest is kept")
+    args = parser.parse_args()
+
+    t = cli_import_time(args.repeat)
+    heavy = heavy_imports_at_parse()
+    print(f"aa_foam.cli import time : {t:.1f} ms (budget {args.budget:.1f} ms)")
+    print(f"Heavy modules imported by the parser : {', '.join(heavy) if heavy else 'none'}")
+    sys.exit(0 if t <= args.budget and not heavy else 1)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Run the benchmark suite (benchmarks.py) and store / compare the results
+
+Every time_* method of the suite classes is run for every combination of the class params,
+after the class setup, and its fastest time over repeat runs is kept.
+The results are stored in a JSON file (benchmarks/results/<commit>.json by default) and can be compared
+with the results of a previous run, the benchmarks slower by more than the threshold being reported.
+
+example use (from the repository root):
+python benchmarks/run.py
+AAFOAM_BENCH_SIZES=1e3,1e6 python benchmarks/run.py -k MeshLoad --compare benchmarks/results/baseline.json
+
+"""
+
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from itertools import product
+from os.path import abspath, dirname, join
+from typing import Dict
+
+_ROOT = dirname(dirname(abspath(__file__)))
+sys.path.insert(0, _ROOT)
+
+from benchmarks import benchmarks as suite  # noqa: E402
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(pattern: str = None, repeat: int = 3) -> Dict[str, float]:
+    r"""Fastest time [s] of every benchmark, by name 'Class.method(params)'"""
+    results = {}
+    classes = [c for name, c in vars(suite).items() if isinstance(c, type) and c.__module__ == suite.__name__]
+    for cls in classes:
+        methods = [m for m in sorted(vars(cls)) if m.startswith('time_')]
+        params = getattr(cls, 'params', ())
+        for args in product(*params):
+            names = {f"{cls.__name__}.{m}{args!r}".replace(',)', ')'): m for m in methods}
+            names = {name: m for name, m in names.items() if pattern is None or re.search(pattern, name)}
+            if not names:
+                continue
+            bench = cls()
+            if hasattr(bench, 'setup'):
+                bench.setup(*args)
+            for name, m in names.items():
+                times = []
+                for _ in range(repeat):
+                    t = time.perf_counter()
+                    getattr(bench, m)(*args)
+                    times.append(time.perf_counter() - t)
+                    if hasattr(bench, 'teardown'):
+                        bench.teardown(*args)
+                results[name] = min(times)
+                print(f"{name:<70s} {results[name]:12.6f} s", flush=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Run the benchmark suite, store and compare the results")
+    parser.add_argument('-k', '--filter', default=None, help="Run only the benchmarks whose name matches")
+    parser.add_argument('-r', '--repeat', type=int, default=3, help="Number of runs, the fastest is kept")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Results file (default : benchmarks/results/<commit>.json)")
+    parser.add_argument('-c', '--compare', default=None, help="Results file of a previous run")
+    parser.add_argument('-t', '--threshold', type=float, default=1.2,
+                        help="Slowdown ratio over which a benchmark is reported as a regression")
+    args = parser.parse_args()
+
+    commit = _commit()
+    results = run_suite(args.filter, args.repeat)
+
+    output = args.output or join(_ROOT, 'benchmarks', 'results', f"{commit}.json")
+    os.makedirs(dirname(abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'commit': commit,
+                   'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                   'machine': platform.node(),
+                   'python': platform.python_version(),
+                   'sizes': suite.SIZES,
+                   'results': results}, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            previous = json.load(f)['results']
+        regressions = 0
+        print(f"{'benchmark':<70s} {'previous':>12s} {'current':>12s} {'ratio':>8s}")
+        for name, t in results.items():
+            if name not in previous:
+                continue
+            ratio = t / previous[name]
+            flag = ''
+            if ratio > args.threshold:
+                flag = ' REGRESSION'
+                regressions += 1
+            print(f"{name:<70s} {previous[name]:12.6f} {t:12.6f} {ratio:8.2f}{flag}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Turbulence inlet values (k, epsilon, omega, nut) of a table of operating points, written to the cases
+
+example use (operating points table with the columns case U D nu and optionally k_s):
+aaFoamInletTurbulence.py operating_points.dat -p inlet -t base_case
+
+Same as aafoam inlet
+
+"""
+
+import sys
+from aa_foam.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main(['inlet'] + sys.argv[1:]))
@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""Near wall mesh planning : y+ -> viscous layers -> outer block grading
+
+example use:
+aaFoamNearWallPlan.py 2 1025 0.00108 1 1 0.05 2
+
+Same as aafoam plan
+
+"""
+
+import sys
+from aa_foam.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main(['plan'] + sys.argv[1:]))
@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""VOF time series : interface area, phase volume and centre of mass for all the time directories
+
+example use (at case root, while the case is running or when it is solved):
+aaFoamVofSeries.py -o vof_series.dat
+
+Same as aafoam vof
+
+"""
+
+import sys
+from aa_foam.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main(['vof'] + sys.argv[1:]))
@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+r"""y+ on the wall patches for all the time directories, from wallShearStress (or nut and U)
+
+example use (at case root, incompressible case with nu = 1e-6 m2/s):
+aaFoamYPlusWall.py 1e-6
+
+Same as aafoam ywall
+
+"""
+
+import sys
+from aa_foam.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main(['ywall'] + sys.argv[1:]))
@@ -11,7 +11,7 @@ aaFoamYPlusWater.py 1 1 1
 import sys
 import logging
 from argparse import ArgumentParser
-from aa_foam.y_plus import y_plus_calc
+from aa_foam.y_plus import y_plus_calc, SKIN_FRICTION_CORRELATIONS
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +25,8 @@ if __name__ == "__main__":
     parser.add_argument('L', help="Reference length [m]")
     parser.add_argument('y_plus', help="Desired y+")
 
+    parser.add_argument('-c', '--correlation', default='white', choices=list(SKIN_FRICTION_CORRELATIONS),
+                        help="Skin friction correlation")
     args = parser.parse_args()
 
     try:
@@ -44,8 +46,9 @@ if __name__ == "__main__":
         logger.info(f"mu [kg/m.s] : {mu:.8f}")
         logger.info(f"      L [m] : {L:.6f}")
         logger.info(f"         y+ : {y_plus:.3f}")
+        logger.info(f"         cf : {args.correlation}")
 
-        delta_s, re_x, nu = y_plus_calc(u_inf, rho, mu, L, y_plus)
+        delta_s, re_x, nu = y_plus_calc(u_inf, rho, mu, L, y_plus, args.correlation)
 
         logger.info("**** OUTPUT ****")
 
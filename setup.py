@@ -27,7 +27,8 @@ setup(name=aa_foam.__name__,
       keywords='OpenFOAM utilities',
       packages=['aa_foam'],
       package_data={},
-      scripts=['bin/aaFoamCoefsWatcher.py',
+      scripts=['bin/aafoam',
+               'bin/aaFoamCoefsWatcher.py',
                'bin/aaFoamDiff.py',
                'bin/aaFoamForcesWatcher.py',
                'bin/aaFoamVL.py',
@@ -37,5 +38,9 @@ setup(name=aa_foam.__name__,
                'bin/aaFoamYPlusAir.py',
                'bin/aaFoamYPlusWater.py',
                'bin/aaFoamExpansion.py',
-               'bin/aaFoamNbCellsAndExpansion.py']
+               'bin/aaFoamNbCellsAndExpansion.py',
+               'bin/aaFoamVofSeries.py',
+               'bin/aaFoamNearWallPlan.py',
+               'bin/aaFoamYPlusWall.py',
+               'bin/aaFoamInletTurbulence.py']
       )
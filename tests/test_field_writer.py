@@ -0,0 +1,27 @@
+# coding: utf-8
+
+r"""Tests of the volume field writer"""
+
+import numpy as np
+import pytest
+
+from aa_foam.diffing import parse_field
+from aa_foam.field_writer import FIELD_TYPES, write_field
+
+
+@pytest.mark.parametrize('binary', [False, True])
+@pytest.mark.parametrize('num_components', sorted(FIELD_TYPES))
+def test_round_trip(tmp_path, num_components, binary):
+    rng = np.random.default_rng(num_components)
+    shape = (10,) if num_components == 1 else (10, num_components)
+    internal = rng.normal(size=shape)
+    wall = rng.normal(size=(4,) + shape[1:])
+    fn = str(tmp_path / 'field')
+    write_field(fn, internal, {'wall': {'type': 'fixedValue', 'value': wall}, 'outlet': {'type': 'zeroGradient'}},
+                binary=binary)
+
+    parsed_internal, parsed_boundary = parse_field(fn)
+    # nonuniform values are parsed as (num, num_components) rows, scalars included
+    assert parsed_internal.shape == (10, num_components)
+    np.testing.assert_array_equal(parsed_internal.reshape(shape), internal)
+    np.testing.assert_array_equal(parsed_boundary[b'wall'][b'value'].reshape(wall.shape), wall)
@@ -0,0 +1,73 @@
+# coding: utf-8
+
+r"""Tests of the blockMesh edge grading design"""
+
+import logging
+
+import numpy as np
+import pytest
+
+from aa_foam.grading import _segment_end_sizes, _segment_length, design_edge_gradings, max_adjacent_ratio
+
+GROWTH = 1.2
+
+
+def _check_design(grading, L, max_size):
+    """Edge lengths filled, adjacent cell ratios below GROWTH and cells not larger than the maximum sizes"""
+    np.testing.assert_allclose(grading.lengths.sum(axis=-1), L, rtol=1e-9)
+    assert np.all(grading.cells.sum(axis=-1) == grading.num_cells)
+    assert np.all(max_adjacent_ratio(grading.lengths, grading.cells, grading.ratios) <= GROWTH * (1. + 1e-6))
+    first, last = _segment_end_sizes(grading.lengths, grading.cells, grading.ratios)
+    largest = np.nanmax(np.concatenate([first, last], axis=-1), axis=-1)
+    assert np.all(largest <= max_size * (1. + 1e-9))
+
+
+def test_plateau_rounded_up():
+    # 1.01 maximum cell sizes left between the growth and the shrink : 2 uniform cells, the plateau size
+    # has to be solved again for the ratio at the junctions with the sides
+    a, p = 0.1, 1.
+    n = 1 + int(np.ceil(np.log(p / a) / np.log(GROWTH)))
+    L = 2. * _segment_length(np.array(a), np.array(p), np.array(n)) + 1.01 * p
+    grading = design_edge_gradings(L, a, a, p, GROWTH)
+    _check_design(grading, L, p)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_random_edges(seed):
+    rng = np.random.default_rng(seed)
+    num_edge = 2000
+    p = 10 ** rng.uniform(-2., 0., num_edge)
+    L = p * rng.uniform(15., 100., num_edge)
+    a, b = p * 10 ** rng.uniform(-3., 0., (2, num_edge))
+    grading = design_edge_gradings(L, a, b, p, GROWTH)
+    _check_design(grading, L, p)
+    first, last = _segment_end_sizes(grading.lengths, grading.cells, grading.ratios)
+    np.testing.assert_allclose(np.where(grading.cells[:, 0] > 0, first[:, 0], first[:, 1]), a, rtol=1e-9)
+    np.testing.assert_allclose(np.where(grading.cells[:, 2] > 0, last[:, 2], last[:, 1]), b, rtol=1e-9)
+
+
+def test_short_edges():
+    # the growth and the shrink meet below the maximum size
+    L = np.linspace(0.5, 3., 50)
+    grading = design_edge_gradings(L, 0.05, 0.02, 1., GROWTH)
+    assert np.all(grading.cells[:, 1] >= 0)
+    _check_design(grading, L, 1.)
+
+
+def test_groups_share_the_number_of_cells():
+    rng = np.random.default_rng(2)
+    num_group = 500
+    L = np.repeat(10 ** rng.uniform(0., 1., num_group), 4) * rng.uniform(0.9, 1.1, 4 * num_group)
+    a, b = np.repeat(10 ** rng.uniform(-3., -1., (2, num_group)), 4, axis=1)
+    groups = np.arange(4 * num_group) // 4
+    grading = design_edge_gradings(L, a, b, 0.5, GROWTH, groups=groups)
+    num_cells = grading.num_cells.reshape(-1, 4)
+    assert np.all(num_cells == num_cells[:, :1])
+    _check_design(grading, L, 0.5)
+
+
+def test_edge_too_short_warns(caplog):
+    with caplog.at_level(logging.WARNING, logger='aa_foam.grading'):
+        grading = design_edge_gradings(1., 0.001, 0.5, 0.5, GROWTH)
+    assert "too short" in caplog.text
+    np.testing.assert_allclose(grading.lengths.sum(), 1.)
@@ -0,0 +1,41 @@
+# coding: utf-8
+
+r"""Tests of the MPI job discovery"""
+
+import os
+
+import pytest
+
+from aa_foam.memory_usage import Proc, get_job_processes, get_rank
+
+# pid: (exe, ppid, rank)
+_PROCESSES = {100: ('mpirun', 1, None), 101: ('simpleFoam', 100, 1), 102: ('simpleFoam', 100, 0)}
+
+
+def _fake_proc(path, children_files):
+    """slash-proc directory of an mpirun and its two ranks"""
+    for pid, (exe, ppid, rank) in _PROCESSES.items():
+        pid_path = os.path.join(path, str(pid))
+        os.makedirs(os.path.join(pid_path, 'task', str(pid)))
+        os.symlink(os.path.join('/usr/bin', exe), os.path.join(pid_path, 'exe'))
+        with open(os.path.join(pid_path, 'cmdline'), 'w') as f:
+            f.write(exe + '\0')
+        with open(os.path.join(pid_path, 'stat'), 'w') as f:
+            f.write(f'{pid} ({exe}) S {ppid} {pid} {pid} 0\n')
+        with open(os.path.join(pid_path, 'environ'), 'w') as f:
+            f.write('HOME=/root\0' + ('' if rank is None else f'OMPI_COMM_WORLD_RANK={rank}\0'))
+        if children_files:
+            with open(os.path.join(pid_path, 'task', str(pid), 'children'), 'w') as f:
+                f.write(' '.join(str(p) for p, v in _PROCESSES.items() if v[1] == pid))
+    proc_fs = Proc()
+    proc_fs.proc = path
+    return proc_fs
+
+
+@pytest.mark.parametrize('children_files', [True, False])
+def test_job_processes_from_the_sampler_proc(tmp_path, children_files):
+    proc_fs = _fake_proc(str(tmp_path), children_files)
+    ranks, launchers = get_job_processes(101, proc_fs)
+    assert sorted(ranks) == [101, 102]
+    assert launchers == [100]
+    assert [get_rank(pid, proc_fs) for pid in (100, 101, 102)] == [None, 1, 0]
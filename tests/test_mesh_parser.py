@@ -0,0 +1,25 @@
+# coding: utf-8
+
+r"""Tests of the polyMesh parser"""
+
+from os.path import join
+import re
+
+import pytest
+
+from aa_foam.mesh_parser import FoamMesh
+from aa_foam.synthetic_case import write_box_mesh
+
+
+def test_truncated_binary_faces(tmp_path):
+    write_box_mesh(str(tmp_path), (2, 2, 2), binary=True)
+    fn = join(str(tmp_path), 'constant', 'polyMesh', 'faces')
+    with open(fn, 'rb') as f:
+        content = f.read()
+    # cut the file after the offsets list
+    offsets = re.search(rb'\n(\d+)\n\(', content)
+    with open(fn, 'wb') as f:
+        f.write(content[:offsets.end() + 4 * int(offsets.group(1))])
+    assert FoamMesh.parse_mesh_file(fn + '_missing', FoamMesh.parse_faces_content) is None
+    with pytest.raises(ValueError, match=re.escape(fn)):
+        FoamMesh.parse_mesh_file(fn, FoamMesh.parse_faces_content)
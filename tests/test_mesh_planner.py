@@ -0,0 +1,21 @@
+# coding: utf-8
+
+r"""Tests of the near wall mesh planning"""
+
+import numpy as np
+
+from aa_foam.mesh_planner import plan_near_wall_mesh
+
+
+def test_default_layers_leave_an_outer_grading():
+    growth_ratio, far_field_size, layer_fraction = 1.2, 0.05, 0.1
+    plan = plan_near_wall_mesh([1., 5., 20.], 1025., 1e-3, [1., 2., 3.], 1., far_field_size, 1.,
+                               growth_ratio, layer_fraction=layer_fraction)
+    assert np.all(plan.valid)
+    assert np.all(plan.outermost_layer <= layer_fraction * far_field_size * (1. + 1e-9))
+    assert np.all(plan.outermost_layer * growth_ratio > layer_fraction * far_field_size)
+    # the outer block grades from one growth ratio over the outermost layer to the far field size
+    np.testing.assert_allclose(plan.outer_size_ratio, far_field_size / (plan.outermost_layer * growth_ratio))
+    assert np.all(plan.outer_size_ratio > 1. / (layer_fraction * growth_ratio ** 2))
+    assert np.all(plan.outer_growth_ratio > 1.)
+    assert np.all(plan.outer_growth_ratio <= growth_ratio)
@@ -0,0 +1,32 @@
+# coding: utf-8
+
+r"""Tests of the patch face values"""
+
+import numpy as np
+
+from aa_foam.diffing import field_rows, is_uniform
+from aa_foam.patch_integrals import face_values
+
+
+def test_uniform_vector_on_three_faces():
+    owner = np.array([0, 1, 2])
+    values = face_values(0., {b'w': {b'value': np.array([1., 2., 3.])}}, b'w', owner)
+    assert values.shape == (3, 3)
+    np.testing.assert_array_equal(values, np.tile([1., 2., 3.], (3, 1)))
+
+
+def test_nonuniform_values():
+    owner = np.array([0, 1, 2])
+    scalars = face_values(0., {b'w': {b'value': np.array([[1.], [2.], [3.]])}}, b'w', owner)
+    np.testing.assert_array_equal(scalars, [1., 2., 3.])
+    internal = np.arange(15.).reshape(5, 3)
+    np.testing.assert_array_equal(face_values(internal, {}, b'w', owner), internal[owner])
+
+
+def test_cell_field_rows():
+    # a single row on a 3 cells mesh is a uniform vector, 3 scalars are one value per cell
+    assert is_uniform(np.array([[1., 2., 3.]]), 3)
+    assert not is_uniform(np.array([1., 2., 3.]), 3)
+    assert is_uniform(np.array([1., 2., 3.]), 5)
+    np.testing.assert_array_equal(field_rows(np.array([[1., 2., 3.]]), 3), np.tile([1., 2., 3.], (3, 1)))
+    np.testing.assert_array_equal(field_rows(2., 3), [2., 2., 2.])
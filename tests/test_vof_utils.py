@@ -0,0 +1,28 @@
+# coding: utf-8
+
+r"""Tests of the vof time series"""
+
+from os.path import join
+
+import numpy as np
+
+from aa_foam.synthetic_case import write_box_case
+from aa_foam.vof_utils import VOF_SERIES_COLUMNS, read_vof_time_series, vof_time_series
+
+
+def test_resume_after_header_only_output(tmp_path):
+    # a run interrupted after the header and before the first row
+    case = str(tmp_path / 'case')
+    write_box_case(case, 200)
+    output = join(case, 'vof.dat')
+    with open(output, 'w') as f:
+        f.write('# ' + ' '.join(VOF_SERIES_COLUMNS) + '\n')
+    assert read_vof_time_series(output).shape == (0, len(VOF_SERIES_COLUMNS))
+
+    rows = vof_time_series(case, output=output, workers=1)
+    np.testing.assert_array_equal(rows[:, 0], [1., 2.])
+    with open(output) as f:
+        assert sum(line.startswith('#') for line in f) == 1
+    np.testing.assert_array_equal(read_vof_time_series(output), rows)
+    # nothing left to process
+    np.testing.assert_array_equal(vof_time_series(case, output=output, workers=1), rows)
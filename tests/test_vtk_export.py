@@ -0,0 +1,77 @@
+# coding: utf-8
+
+r"""Tests of the VTU writer"""
+
+from io import BytesIO
+from os.path import join
+import xml.etree.ElementTree as ElementTree
+
+import numpy as np
+import pytest
+
+from aa_foam.diffing import parse_internal_field
+from aa_foam.mesh_parser import FoamMesh
+from aa_foam.synthetic_case import write_box_case
+from aa_foam.vtk_export import _AppendedWriter, write_vtu
+
+
+def _read_appended_arrays(fn):
+    """Data arrays of a vtu file written by write_vtu, by name"""
+    with open(fn, 'rb') as f:
+        content = f.read()
+    start = content.index(b'<AppendedData')
+    data_start = content.index(b'_', start) + 1
+    header = ElementTree.fromstring(content[:start] + b'</VTKFile>')
+    dtypes = {'Float64': '<f8', 'Int64': '<i8', 'UInt8': 'u1'}
+    arrays = {}
+    for a in header.iter('DataArray'):
+        pos = data_start + int(a.get('offset'))
+        size = int(np.frombuffer(content, '<u8', 1, pos)[0])
+        values = np.frombuffer(content[pos + 8:pos + 8 + size], dtypes[a.get('type')])
+        arrays[a.get('Name')] = values.reshape(-1, int(a.get('NumberOfComponents')))
+    return arrays
+
+
+@pytest.fixture(scope='module')
+def box_case(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('box'))
+    write_box_case(path, 250)
+    return path
+
+
+def test_write_vtu_dotted_field_name(box_case, tmp_path):
+    mesh = FoamMesh(box_case)
+    alpha = np.asarray(parse_internal_field(join(box_case, '1', 'alpha.water')))
+    fn = str(tmp_path / 'box.vtu')
+    write_vtu(mesh, fn, fields={'alpha.water': alpha, 'p': join(box_case, '1', 'p')})
+
+    arrays = _read_appended_arrays(fn)
+    np.testing.assert_array_equal(arrays['alpha.water'][:, 0], alpha)
+    np.testing.assert_array_equal(arrays['p'][:, 0], parse_internal_field(join(box_case, '1', 'p')))
+    np.testing.assert_array_equal(arrays['points'], np.asarray(mesh.points))
+    assert len(arrays['types']) == mesh.num_cell
+
+
+def test_write_vtu_read_by_vtk(box_case, tmp_path):
+    vtk = pytest.importorskip('vtk')
+    from vtk.util.numpy_support import vtk_to_numpy
+
+    mesh = FoamMesh(box_case)
+    alpha = np.asarray(parse_internal_field(join(box_case, '1', 'alpha.water')))
+    fn = str(tmp_path / 'box.vtu')
+    write_vtu(mesh, fn, fields={'alpha.water': alpha})
+
+    reader = vtk.vtkXMLUnstructuredGridReader()
+    reader.SetFileName(fn)
+    reader.Update()
+    grid = reader.GetOutput()
+    assert grid.GetNumberOfCells() == mesh.num_cell
+    np.testing.assert_array_equal(vtk_to_numpy(grid.GetCellData().GetArray('alpha.water')), alpha)
+
+
+def test_appended_arrays_in_header_order():
+    w = _AppendedWriter(BytesIO(), ['points', 'p'])
+    w.begin('points')
+    w.end()
+    with pytest.raises(ValueError, match='expects p'):
+        w.begin('U')
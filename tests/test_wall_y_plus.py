@@ -0,0 +1,31 @@
+# coding: utf-8
+
+r"""Tests of the y+ of the wall patches"""
+
+from os.path import join
+
+import numpy as np
+
+from aa_foam.diffing import parse_field
+from aa_foam.mesh_parser import FoamMesh
+from aa_foam.patch_integrals import patch_slice
+from aa_foam.synthetic_case import write_box_case
+from aa_foam.wall_y_plus import patch_y_plus
+
+
+def test_y_plus_on_no_slip_wall(tmp_path):
+    # the U boundary of the walls of the synthetic case is noSlip, without value entry
+    case = str(tmp_path)
+    shape = write_box_case(case, (10, 8, 6))
+    mesh = FoamMesh(case)
+    u = parse_field(join(case, '1', 'U'))
+    assert b'value' not in u[1][b'zmin']
+    nu, nut = 1e-6, 1e-5
+
+    y_plus = patch_y_plus(mesh, b'zmin', nu, nut=(nut, {}), u=u)
+
+    owner = mesh.owner_array[patch_slice(mesh, b'zmin')]
+    y = 0.5 * 1. / shape[2]
+    u_cell = np.sqrt(np.einsum('ij,ij->i', u[0][owner], u[0][owner]))
+    np.testing.assert_allclose(y_plus, y * np.sqrt((nu + nut) * u_cell / y) / nu, rtol=1e-9)
+    assert np.all(y_plus > 0)
@@ -0,0 +1,22 @@
+# coding: utf-8
+
+r"""Tests of the skin friction correlations"""
+
+import numpy as np
+import pytest
+
+from aa_foam.y_plus import skin_friction
+
+# Plate averaged coefficients CF(Re), the local coefficients being d(Re CF) / dRe
+_AVERAGED = {'prandtl': lambda re: 0.074 / re**0.2,
+             'ittc57': lambda re: 0.075 / (np.log10(re) - 2)**2,
+             'blasius': lambda re: 1.328 / np.sqrt(re)}
+
+
+@pytest.mark.parametrize('correlation', sorted(_AVERAGED))
+def test_local_coefficients(correlation):
+    re = np.logspace(5., 9., 9)
+    h = 1e-6 * re
+    averaged = _AVERAGED[correlation]
+    local = ((re + h) * averaged(re + h) - (re - h) * averaged(re - h)) / (2 * h)
+    np.testing.assert_allclose(skin_friction(re, correlation), local, rtol=1e-4)